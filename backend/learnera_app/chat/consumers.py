@@ -1,64 +1,63 @@
+import asyncio
 import json
+from channels.consumer import AsyncConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from django.core.exceptions import ValidationError
-from .serializers import UserChatMessageSerializer
+from django.conf import settings
+from .services import (
+    ChatMessageService,
+    ContactService,
+    PresenceService,
+    ReceiptService,
+)
 from chat.models import UserChatMessage
 from loguru import logger  # type: ignore
 
-User = get_user_model()
-
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    RECEIPT_TYPES = {"messages.delivered": "delivered", "messages.read": "read"}
+
     async def connect(self):
         logger.info("WebSocket connection initiated")
 
         try:
-            # Get token from URL
-            token_str = self.scope["url_route"]["kwargs"]["token"]
-            access_token = AccessToken(token_str)
-            user_id = access_token["user_id"]
-
-            self.user = await self.get_user(user_id)
-            if not self.user:
-                await self.close(code=4001)
+            # JWTAuthMiddleware has already checked the token
+            auth_error = self.scope.get("auth_error")
+            if auth_error:
+                logger.error(f"Websocket authentication failed: {auth_error}")
+                await self.close(code=4001 if auth_error == "unknown_user" else 4002)
                 return
+            self.user = self.scope["user"]
 
             self.room_group_name = f"chat_user_{self.user.id}"
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
 
-            # Join global user status group
-            await self.channel_layer.group_add("user_status", self.channel_name)
-
-            # Mark user online in DB
-            await self.set_user_online(True)
+            # Only hear about the presence of the contacts in our sections
+            self.presence_sections = await database_sync_to_async(
+                ContactService.presence_section_ids
+            )(self.user)
+            self.presence_watch_groups = []
+            await self.watch_roster()
+            self.presence_subscriptions = set()
+            self.contact_ids = None
 
-            # Notify everyone that user is online
-            await self.channel_layer.group_send(
-                "user_status",
-                {
-                    "type": "user_status_update",
-                    "user_id": self.user.id,
-                    "is_online": True,
-                },
+            came_online, self.presence_epoch = await PresenceService.connect(
+                self.user.id
             )
+            if came_online:
+                await self.broadcast_presence(True)
+            self.heartbeat_task = asyncio.create_task(self.presence_heartbeat())
 
             await self.accept()
             logger.info(f"User {self.user.username} connected and marked online.")
 
-        except (InvalidToken, TokenError) as e:
-            logger.error(f"Invalid token: {str(e)}")
-            await self.close(code=4002)
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
             await self.close(code=4000)
 
     async def disconnect(self, close_code):
         logger.info(
-            f"User {getattr(self.user, 'username', 'unknown')} disconnected with code {close_code}"
+            f"User {getattr(self.scope.get('user'), 'username', 'unknown')} disconnected with code {close_code}"
         )
 
         if hasattr(self, "room_group_name"):
@@ -66,27 +65,34 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.room_group_name, self.channel_name
             )
 
-        # Leave user_status group
-        await self.channel_layer.group_discard("user_status", self.channel_name)
+        if hasattr(self, "presence_watch_groups"):
+            await self.unwatch_roster()
 
-        if hasattr(self, "user"):
-            await self.set_user_online(False)
-
-            # Broadcast offline status
-            await self.channel_layer.group_send(
-                "user_status",
-                {
-                    "type": "user_status_update",
-                    "user_id": self.user.id,
-                    "is_online": False,
-                },
+        for user_id in getattr(self, "presence_subscriptions", ()):
+            await self.channel_layer.group_discard(
+                PresenceService.user_group(user_id), self.channel_name
             )
 
+        if hasattr(self, "heartbeat_task"):
+            self.heartbeat_task.cancel()
+            if await PresenceService.disconnect(self.user.id, self.presence_epoch):
+                await self.broadcast_presence(False)
+
     async def receive(self, text_data=None):
         logger.info(f"Received message: {text_data}")
 
         try:
             data = json.loads(text_data)
+            if data.get("type") == "presence.subscribe":
+                await self.presence_subscribe(data.get("user_ids", []))
+                return
+            if data.get("type") == "presence.unsubscribe":
+                await self.presence_unsubscribe(data.get("user_ids"))
+                return
+            if data.get("type") in self.RECEIPT_TYPES:
+                await self.send_receipt(data)
+                return
+
             if not all(key in data for key in ["receiver_id", "message"]):
                 await self.send(
                     json.dumps(
@@ -95,24 +101,35 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 )
                 return
 
-            message_info = await self.save_message(data)
-            sender = await self.get_user(self.user.id)
+            receiver_id = int(data["receiver_id"])
+            if not data["message"] or not await self.is_allowed_contact(receiver_id):
+                await self.send(
+                    json.dumps(
+                        {
+                            "status": "error",
+                            "message": "You cannot send this message to that user",
+                        }
+                    )
+                )
+                return
+
+            if settings.CHAT_WRITE_BEHIND:
+                message = await ChatMessageService.queue_message(
+                    self.user.id, receiver_id, data["message"]
+                )
+            else:
+                message = await self.save_message(receiver_id, data["message"])
 
             message_data = {
                 "type": "chat_message",
                 "sender_id": self.user.id,
-                "sender_name": f"{sender.first_name} {sender.last_name}",
-                "message": data["message"],
-                "message_id": message_info["id"],
-                "timestamp": message_info["timestamp"],
+                "receiver_id": receiver_id,
+                "sender_name": f"{self.user.first_name} {self.user.last_name}",
+                "message": message.message,
+                "message_id": message.id,
+                "timestamp": message.timestamp.isoformat(),
             }
-
-            receiver_group = f"chat_user_{data['receiver_id']}"
-            await self.channel_layer.group_send(receiver_group, message_data)
-
-            await self.channel_layer.group_send(
-                self.room_group_name, {**message_data, "status": "send"}
-            )
+            await self.deliver_message(message_data)
 
         except json.JSONDecodeError:
             await self.send(
@@ -122,8 +139,134 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error processing message: {str(e)}")
             await self.send(json.dumps({"status": "error", "message": str(e)}))
 
+    async def deliver_message(self, message_data):
+        """
+        Sends a stored message to the receiver's sockets and acknowledges it
+        on this socket directly, without a round trip through the sender's
+        group. With CHAT_ECHO_TO_OTHER_DEVICES the sender's other sockets get
+        a copy as well.
+        """
+        await self.channel_layer.group_send(
+            f"chat_user_{message_data['receiver_id']}", message_data
+        )
+        await self.chat_message({**message_data, "status": "send"})
+
+        if settings.CHAT_ECHO_TO_OTHER_DEVICES:
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {**message_data, "status": "send", "origin": self.channel_name},
+            )
+
+    async def presence_heartbeat(self):
+        while True:
+            await asyncio.sleep(PresenceService.HEARTBEAT_INTERVAL)
+            self.presence_epoch = await PresenceService.heartbeat(
+                self.user.id, self.presence_epoch
+            )
+
+    async def broadcast_presence(self, is_online):
+        event = PresenceService.status_event(self.user.id, is_online)
+        for group in PresenceService.broadcast_groups(
+            self.user, self.presence_sections
+        ):
+            await self.channel_layer.group_send(group, event)
+
+    async def watch_roster(self):
+        self.presence_watch_groups = ContactService.watch_groups(
+            self.user, self.presence_sections
+        )
+        for group in self.presence_watch_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+
+    async def unwatch_roster(self):
+        for group in self.presence_watch_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.presence_watch_groups = []
+
+    async def presence_subscribe(self, user_ids):
+        """
+        Switches the socket from the presence of its sections to the given
+        contacts only, and replies with their current status.
+        """
+        user_ids = {
+            user_id
+            for user_id in map(int, user_ids)
+            if await self.is_allowed_contact(user_id)
+        }
+
+        if user_ids:
+            await self.unwatch_roster()
+
+        for user_id in user_ids - self.presence_subscriptions:
+            await self.channel_layer.group_add(
+                PresenceService.user_group(user_id), self.channel_name
+            )
+        self.presence_subscriptions |= user_ids
+
+        presence = await PresenceService.aget_presence(sorted(user_ids))
+        for user_id, state in presence.items():
+            await self.user_status_update(
+                PresenceService.status_event(user_id, state["is_online"])
+            )
+
+    async def presence_unsubscribe(self, user_ids=None):
+        """
+        Drops the given subscriptions, or all of them. Without any left the
+        socket goes back to the presence of its sections.
+        """
+        if user_ids is None:
+            user_ids = set(self.presence_subscriptions)
+        else:
+            user_ids = self.presence_subscriptions & {
+                int(user_id) for user_id in user_ids
+            }
+
+        for user_id in user_ids:
+            await self.channel_layer.group_discard(
+                PresenceService.user_group(user_id), self.channel_name
+            )
+        self.presence_subscriptions -= user_ids
+        if not self.presence_subscriptions and not self.presence_watch_groups:
+            await self.watch_roster()
+
+    async def send_receipt(self, data):
+        """
+        Marks every message from a contact up to ``up_to`` as delivered or
+        read and tells the contact, whose sockets get a "receipt" message.
+        In write-behind mode the writer worker applies it once the messages
+        sent before it are stored.
+        """
+        status = self.RECEIPT_TYPES[data["type"]]
+        contact_id = int(data["contact_id"])
+        up_to = int(data["up_to"])
+        if not await self.is_allowed_contact(contact_id):
+            await self.send(
+                json.dumps({"status": "error", "message": "Unknown contact"})
+            )
+            return
+
+        if settings.CHAT_WRITE_BEHIND and await ChatMessageService.queue_receipt(
+            status, self.user.id, contact_id, up_to
+        ):
+            return
+        await ReceiptService.store(status, self.user.id, contact_id, up_to)
+
+    async def chat_receipt(self, event):
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "receipt",
+                    "status": event["status"],
+                    "user_id": event["user_id"],
+                    "up_to": event["up_to"],
+                }
+            )
+        )
+
     async def chat_message(self, event):
-        event_data = {k: v for k, v in event.items() if k != "type"}
+        if event.get("origin") == self.channel_name:
+            return
+        event_data = {k: v for k, v in event.items() if k not in ("type", "origin")}
         if "status" not in event_data:
             event_data["status"] = "received"
         await self.send(text_data=json.dumps(event_data))
@@ -139,33 +282,81 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
         )
 
-    @database_sync_to_async
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return None
+    async def is_allowed_contact(self, user_id):
+        """
+        Checks the receiver against the contact ids loaded once per
+        connection. Contacts created after the socket opened are looked up
+        individually and remembered.
+        """
+        if self.contact_ids is None:
+            self.contact_ids = await self.get_allowed_contact_ids()
+        if user_id not in self.contact_ids:
+            self.contact_ids |= await self.get_allowed_contact_ids([user_id])
+        return user_id in self.contact_ids
 
     @database_sync_to_async
-    def set_user_online(self, online):
-        self.user.is_online = online
-        self.user.save()
+    def get_allowed_contact_ids(self, user_ids=None):
+        contacts = ContactService.get_allowed_contacts(self.user)
+        if user_ids is not None:
+            contacts = contacts.filter(id__in=user_ids)
+        return set(contacts.values_list("id", flat=True))
 
     @database_sync_to_async
-    def save_message(self, message_data):
-        save_data = {
-            "sender": self.user.id,
-            "receiver": int(message_data["receiver_id"]),
-            "message": message_data["message"],
-        }
-        serializer = UserChatMessageSerializer(data=save_data)
-        if serializer.is_valid():
-            message = serializer.save()
-            return {
-                "id": message.id,
-                "timestamp": message.timestamp.isoformat(),
-                "sender_name": f"{message.sender.first_name} {message.sender.last_name}",
-                "receiver_name": f"{message.receiver.first_name} {message.receiver.last_name}",
-            }
-        else:
-            raise ValidationError(serializer.errors)
+    def save_message(self, receiver_id, message):
+        return ChatMessageService.create_message(self.user.id, receiver_id, message)
+
+
+class ChatMessageWriterConsumer(AsyncConsumer):
+    """
+    Stores the messages queued by ChatConsumer in write-behind mode. Runs
+    under `python manage.py run_chat_writer` and writes a batch
+    every CHAT_WRITE_BEHIND_FLUSH_MS or CHAT_WRITE_BEHIND_BATCH_SIZE messages.
+
+    Receipts come through the same channel and are applied after the
+    messages queued before them are stored. That ordering only holds with a
+    single writer process.
+    """
+
+    async def __call__(self, scope, receive, send):
+        self.pending = []
+        self.flush_task = None
+        self.flush_lock = asyncio.Lock()
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # run_chat_writer cancels us on SIGTERM; store what is still
+            # buffered.
+            await self.flush()
+
+    async def chat_persist(self, event):
+        self.pending.append({k: v for k, v in event.items() if k != "type"})
+        if len(self.pending) >= settings.CHAT_WRITE_BEHIND_BATCH_SIZE:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def chat_store_receipt(self, event):
+        # Every message the reader has seen was queued before this receipt.
+        await self.flush()
+        await ReceiptService.store(
+            event["status"], event["reader_id"], event["contact_id"], event["up_to"]
+        )
+
+    async def flush_later(self):
+        await asyncio.sleep(settings.CHAT_WRITE_BEHIND_FLUSH_MS / 1000)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+
+        # Waits for a timer flush that is already writing its batch.
+        async with self.flush_lock:
+            rows, self.pending = self.pending, []
+            if rows:
+                written = await database_sync_to_async(
+                    ChatMessageService.write_messages
+                )(rows)
+                logger.info(f"Stored {written} queued chat messages")
@@ -0,0 +1,219 @@
+"""
+Load-test harnesses for the chat socket, run on an in-memory channel layer
+by the presence_loadtest and chat_message_benchmark management commands.
+"""
+
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from channels.layers import InMemoryChannelLayer
+
+from .consumers import ChatConsumer
+from .services import ContactService, PresenceService
+
+LEGACY_GROUP = "user_status"
+
+
+class LoadTestChannelLayer(InMemoryChannelLayer):
+    """
+    In-memory layer without the expiry sweep, which scans every channel and
+    group on each call and would otherwise dominate the numbers.
+    """
+
+    def _clean_expired(self):
+        pass
+
+
+class PresenceLoadTest:
+    """
+    Replays presence changes for simulated sockets on an in-memory channel
+    layer and counts how many messages reach a socket.
+
+    The sockets join groups the way ChatConsumer does. "global" is the old
+    setup where every socket is in one user_status group, "roster" is the
+    default section-scoped groups, and "subscribed" has every socket
+    subscribe to a few of its contacts. Students and parents belong to one
+    of ``sections`` sections and each teacher teaches two.
+    """
+
+    MODES = ("global", "roster", "subscribed")
+    SECTIONS_PER_TEACHER = 2
+
+    def __init__(self, sockets, teachers, events, subscriptions, sections=20, seed=0):
+        rng = random.Random(seed)
+        self.rng = rng
+        self.users = []
+        for user_id in range(1, sockets + 1):
+            role = (
+                "teacher"
+                if user_id <= teachers
+                else rng.choice(["student", "student", "parent"])
+            )
+            self.users.append(
+                SimpleNamespace(
+                    id=user_id,
+                    is_teacher=role == "teacher",
+                    is_student=role == "student",
+                    is_parent=role == "parent",
+                    section_ids=rng.sample(
+                        range(1, sections + 1),
+                        (
+                            min(self.SECTIONS_PER_TEACHER, sections)
+                            if role == "teacher"
+                            else 1
+                        ),
+                    ),
+                )
+            )
+        self.events = [(rng.choice(self.users), bool(i % 2)) for i in range(events)]
+        self.subscriptions = subscriptions
+
+    def _contacts(self, user):
+        if user.is_teacher:
+            return [u for u in self.users if u.is_student or u.is_parent]
+        return [u for u in self.users if u.is_teacher]
+
+    async def _join(self, layer, mode):
+        channels = []
+        for user in self.users:
+            channel = await layer.new_channel()
+            channels.append(channel)
+            if mode == "global":
+                await layer.group_add(LEGACY_GROUP, channel)
+            elif mode == "roster":
+                for group in ContactService.watch_groups(user, user.section_ids):
+                    await layer.group_add(group, channel)
+            else:
+                contacts = self._contacts(user)
+                for contact in self.rng.sample(
+                    contacts, min(self.subscriptions, len(contacts))
+                ):
+                    await layer.group_add(
+                        PresenceService.user_group(contact.id), channel
+                    )
+        return channels
+
+    async def run(self, mode):
+        layer = LoadTestChannelLayer(capacity=len(self.events) + 1)
+        channels = await self._join(layer, mode)
+        received = 0
+
+        async def drain(channel):
+            nonlocal received
+            while True:
+                await layer.receive(channel)
+                received += 1
+
+        receivers = [asyncio.create_task(drain(channel)) for channel in channels]
+        started = time.perf_counter()
+        for user, is_online in self.events:
+            event = PresenceService.status_event(user.id, is_online)
+            groups = (
+                [LEGACY_GROUP]
+                if mode == "global"
+                else PresenceService.broadcast_groups(user, user.section_ids)
+            )
+            for group in groups:
+                await layer.group_send(group, event)
+
+        # Let the receivers empty their queues.
+        last_seen = -1
+        while received != last_seen:
+            last_seen = received
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started - 0.05
+
+        for receiver in receivers:
+            receiver.cancel()
+        await asyncio.gather(*receivers, return_exceptions=True)
+        await layer.flush()
+        return {
+            "mode": mode,
+            "events": len(self.events),
+            "delivered": received,
+            "per_event": received / max(len(self.events), 1),
+            "seconds": elapsed,
+            "per_second": received / elapsed if elapsed > 0 else 0,
+            "events_per_second": len(self.events) / elapsed if elapsed > 0 else 0,
+        }
+
+
+class MessageFanoutBenchmark:
+    """
+    Measures how many chat messages per second one ChatConsumer can hand to
+    the channel layer and acknowledge.
+
+    "echo" is the old path: one group_send to the receiver and one back to
+    the sender's own group, which the socket then has to receive before it
+    can acknowledge. "direct" is ChatConsumer.deliver_message(): one
+    group_send and the acknowledgement written straight to the socket.
+    """
+
+    MODES = ("echo", "direct")
+    SENDER_ID = 1
+    RECEIVER_ID = 2
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def _consumer(self, layer):
+        consumer = ChatConsumer()
+        consumer.channel_layer = layer
+        consumer.channel_name = await layer.new_channel()
+        consumer.user = SimpleNamespace(
+            id=self.SENDER_ID, first_name="Bench", last_name="Sender"
+        )
+        consumer.room_group_name = f"chat_user_{self.SENDER_ID}"
+        await layer.group_add(consumer.room_group_name, consumer.channel_name)
+
+        consumer.acknowledged = 0
+
+        async def base_send(message):
+            consumer.acknowledged += 1
+
+        consumer.base_send = base_send
+        return consumer
+
+    def _message(self, message_id):
+        return {
+            "type": "chat_message",
+            "sender_id": self.SENDER_ID,
+            "receiver_id": self.RECEIVER_ID,
+            "sender_name": "Bench Sender",
+            "message": "Please submit the worksheet",
+            "message_id": message_id,
+            "timestamp": "2026-01-05T10:00:00+00:00",
+        }
+
+    async def run(self, mode):
+        layer = LoadTestChannelLayer(capacity=self.messages + 1)
+        consumer = await self._consumer(layer)
+        receiver = await layer.new_channel()
+        await layer.group_add(f"chat_user_{self.RECEIVER_ID}", receiver)
+
+        started = time.perf_counter()
+        for message_id in range(self.messages):
+            message_data = self._message(message_id)
+            if mode == "direct":
+                await consumer.deliver_message(message_data)
+                continue
+            await layer.group_send(f"chat_user_{self.RECEIVER_ID}", message_data)
+            await layer.group_send(
+                consumer.room_group_name, {**message_data, "status": "send"}
+            )
+            await consumer.chat_message(await layer.receive(consumer.channel_name))
+        elapsed = time.perf_counter() - started
+
+        queue = layer.channels.get(receiver)
+        delivered = queue.qsize() if queue else 0
+        await layer.flush()
+        return {
+            "mode": mode,
+            "messages": self.messages,
+            "acknowledged": consumer.acknowledged,
+            "delivered": delivered,
+            "seconds": elapsed,
+            "per_second": self.messages / elapsed if elapsed > 0 else 0,
+        }
@@ -0,0 +1,33 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from chat.loadtest import MessageFanoutBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure chat messages per second through one consumer on an "
+        "in-memory channel layer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=20000)
+        parser.add_argument(
+            "--mode",
+            choices=MessageFanoutBenchmark.MODES,
+            action="append",
+            dest="modes",
+            help="Only run the given mode (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        benchmark = MessageFanoutBenchmark(messages=options["messages"])
+        for mode in options["modes"] or MessageFanoutBenchmark.MODES:
+            result = asyncio.run(benchmark.run(mode))
+            self.stdout.write(
+                f"{result['mode']:>6}: {result['messages']} messages in "
+                f"{result['seconds']:.2f}s, {result['per_second']:.0f} messages/s "
+                f"({result['delivered']} delivered, "
+                f"{result['acknowledged']} acknowledged)"
+            )
@@ -0,0 +1,49 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from chat.loadtest import PresenceLoadTest
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure chat presence fan-out with simulated sockets on an "
+        "in-memory channel layer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=1000)
+        parser.add_argument("--teachers", type=int, default=50)
+        parser.add_argument("--events", type=int, default=1000)
+        parser.add_argument("--sections", type=int, default=20)
+        parser.add_argument(
+            "--subscriptions",
+            type=int,
+            default=10,
+            help="Contacts each socket subscribes to in the subscribed mode.",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=PresenceLoadTest.MODES,
+            action="append",
+            dest="modes",
+            help="Only run the given mode (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        load_test = PresenceLoadTest(
+            sockets=options["sockets"],
+            teachers=options["teachers"],
+            events=options["events"],
+            subscriptions=options["subscriptions"],
+            sections=options["sections"],
+        )
+        for mode in options["modes"] or PresenceLoadTest.MODES:
+            result = asyncio.run(load_test.run(mode))
+            self.stdout.write(
+                f"{result['mode']:>10}: {result['events']} events, "
+                f"{result['delivered']} messages delivered "
+                f"({result['per_event']:.1f}/event) in {result['seconds']:.2f}s, "
+                f"{result['per_second']:.0f} messages/s, "
+                f"{result['events_per_second']:.0f} presence changes/s"
+            )
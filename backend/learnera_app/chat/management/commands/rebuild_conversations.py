@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from chat.services import ConversationService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the chat Conversation summaries from the stored messages."
+
+    def handle(self, *args, **options):
+        count = ConversationService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} conversations."))
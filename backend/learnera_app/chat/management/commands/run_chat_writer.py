@@ -0,0 +1,28 @@
+from channels import DEFAULT_CHANNEL_LAYER
+from channels.management.commands.runworker import Command as RunWorkerCommand
+
+from chat.services import ChatMessageService
+from chat.worker import GracefulWorker
+
+
+class Command(RunWorkerCommand):
+    help = (
+        "Run the chat write-behind worker. Unlike runworker, it stores the "
+        "messages it still buffers when it gets SIGTERM or SIGINT."
+    )
+    worker_class = GracefulWorker
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--layer",
+            action="store",
+            dest="layer",
+            default=DEFAULT_CHANNEL_LAYER,
+            help="Channel layer alias to use, if not the default.",
+        )
+        parser.add_argument(
+            "channels",
+            nargs="*",
+            default=[ChatMessageService.WRITER_CHANNEL],
+            help="Channels to listen on.",
+        )
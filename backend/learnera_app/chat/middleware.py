@@ -0,0 +1,104 @@
+import hashlib
+import re
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+
+class UserSnapshot:
+    """
+    The few user fields the chat socket needs, cached between connections
+    instead of loading CustomUser on every connect.
+    """
+
+    FIELDS = (
+        "id",
+        "username",
+        "first_name",
+        "last_name",
+        "is_teacher",
+        "is_student",
+        "is_parent",
+    )
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, **fields):
+        for field in self.FIELDS:
+            setattr(self, field, fields[field])
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.username
+
+
+class JWTAuthMiddleware:
+    """
+    Authenticates websocket connections from the access token in the URL
+    (``ws/chat/<token>/``) or the ``?token=`` query parameter.
+
+    The token is verified once; the user snapshot is then cached under a
+    hash of the token until the token expires, so reconnects with the same
+    token touch neither the signature check nor the database. Sets
+    ``scope["user"]`` and, on failure, ``scope["auth_error"]``.
+    """
+
+    PATH_TOKEN = re.compile(r"ws/chat/(?P<token>[^/]+)/?$")
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _cache_key(token):
+        return f"ws_auth:{hashlib.sha256(token.encode()).hexdigest()}"
+
+    def get_token(self, scope):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        if query.get("token"):
+            return query["token"][0]
+        match = self.PATH_TOKEN.search(scope.get("path", ""))
+        return match.group("token") if match else None
+
+    @database_sync_to_async
+    def load_snapshot(self, user_id):
+        fields = User.objects.filter(id=user_id).values(*UserSnapshot.FIELDS).first()
+        return fields
+
+    async def authenticate(self, token):
+        key = self._cache_key(token)
+        fields = await cache.aget(key)
+        if fields is not None:
+            return UserSnapshot(**fields), None
+
+        try:
+            access_token = AccessToken(token)
+        except TokenError:
+            return AnonymousUser(), "invalid_token"
+
+        fields = await self.load_snapshot(access_token["user_id"])
+        if fields is None:
+            return AnonymousUser(), "unknown_user"
+
+        expires_in = int(access_token["exp"] - timezone.now().timestamp())
+        if expires_in > 0:
+            await cache.aset(key, fields, expires_in)
+        return UserSnapshot(**fields), None
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        token = self.get_token(scope)
+        if token:
+            scope["user"], scope["auth_error"] = await self.authenticate(token)
+        else:
+            scope["user"], scope["auth_error"] = AnonymousUser(), "invalid_token"
+        return await self.app(scope, receive, send)
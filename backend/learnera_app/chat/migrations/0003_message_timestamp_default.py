@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_rename_teacherstudentchatmessage_userchatmessage"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userchatmessage",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0003_message_timestamp_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userchatmessage",
+            index=models.Index(
+                fields=["sender", "receiver", "timestamp"],
+                name="chat_msg_sender_receiver_ts",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userchatmessage",
+            index=models.Index(
+                fields=["receiver", "sender", "timestamp"],
+                name="chat_msg_receiver_sender_ts",
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_message_conversation_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Conversation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_message", models.CharField(blank=True, max_length=255)),
+                ("last_message_at", models.DateTimeField(blank=True, null=True)),
+                ("unread_low", models.PositiveIntegerField(default=0)),
+                ("unread_high", models.PositiveIntegerField(default=0)),
+                (
+                    "last_sender",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user_high",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversations_as_high",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user_low",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversations_as_low",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user_high", "user_low"],
+                        name="chat_conversation_high_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_low", "user_high"), name="chat_conversation_pair"
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("user_low__lt", models.F("user_high"))),
+                        name="chat_conversation_ordered_pair",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_conversation"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userchatmessage",
+            index=models.Index(
+                condition=models.Q(("is_read", False)),
+                fields=["receiver", "sender", "id"],
+                name="chat_msg_unread_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+PREVIEW_LENGTH = 255
+
+
+def backfill_conversations(apps, schema_editor):
+    """
+    Builds the Conversation rows for messages stored before the table existed,
+    the same way ConversationService.rebuild() does. Kept self-contained so
+    later changes to the service cannot break this migration.
+    """
+    UserChatMessage = apps.get_model("chat", "UserChatMessage")
+    Conversation = apps.get_model("chat", "Conversation")
+
+    summaries = {}
+    messages = (
+        UserChatMessage.objects.filter(sender__isnull=False, receiver__isnull=False)
+        .order_by("timestamp", "id")
+        .only("id", "sender_id", "receiver_id", "message", "timestamp", "is_read")
+        .iterator(chunk_size=2000)
+    )
+    for chat_message in messages:
+        pair = tuple(sorted((chat_message.sender_id, chat_message.receiver_id)))
+        summary = summaries.setdefault(pair, {"unread_low": 0, "unread_high": 0})
+        summary["last"] = chat_message
+        if not chat_message.is_read:
+            side = (
+                "unread_low" if chat_message.receiver_id == pair[0] else "unread_high"
+            )
+            summary[side] += 1
+
+    Conversation.objects.all().delete()
+    Conversation.objects.bulk_create(
+        [
+            Conversation(
+                user_low_id=user_low,
+                user_high_id=user_high,
+                unread_low=summary["unread_low"],
+                unread_high=summary["unread_high"],
+                last_message=summary["last"].message[:PREVIEW_LENGTH],
+                last_message_at=summary["last"].timestamp,
+                last_sender_id=summary["last"].sender_id,
+            )
+            for (user_low, user_high), summary in summaries.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_unread_message_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from users.models import CustomUser
 
 # Create your models here.
@@ -25,12 +26,28 @@ class UserChatMessage(models.Model):
         blank=True,
     )
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: write-behind messages are stored after they were sent.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     is_received = models.BooleanField(default=False)
     is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            models.Index(
+                fields=["sender", "receiver", "timestamp"],
+                name="chat_msg_sender_receiver_ts",
+            ),
+            models.Index(
+                fields=["receiver", "sender", "timestamp"],
+                name="chat_msg_receiver_sender_ts",
+            ),
+            models.Index(
+                fields=["receiver", "sender", "id"],
+                condition=models.Q(is_read=False),
+                name="chat_msg_unread_idx",
+            ),
+        ]
         verbose_name = "Teacher-Student Chat Message"
         verbose_name_plural = "Teacher-Student Chat Messages"
 
@@ -49,11 +66,65 @@ class UserChatMessage(models.Model):
             if not self.receiver.is_teacher:
                 raise ValidationError("If sender is student, receiver must be teacher")
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
+    def save(self, *args, validate=True, **kwargs):
+        # Callers that already checked the contact rules pass validate=False
+        # to skip full_clean(), which reloads both users.
+        if validate:
+            self.full_clean()
         return super().save(*args, **kwargs)
 
     def __str__(self):
         return (
             f"{self.sender.username} to {self.receiver.username}: {self.message[:10]}"
         )
+
+
+class Conversation(models.Model):
+    """
+    One row per pair of users who have exchanged messages, updated as each
+    message is stored so the contact list never has to scan
+    UserChatMessage. ``user_low`` always holds the smaller user id.
+    """
+
+    PREVIEW_LENGTH = 255
+
+    user_low = models.ForeignKey(
+        CustomUser, related_name="conversations_as_low", on_delete=models.CASCADE
+    )
+    user_high = models.ForeignKey(
+        CustomUser, related_name="conversations_as_high", on_delete=models.CASCADE
+    )
+    last_message = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_sender = models.ForeignKey(
+        CustomUser,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    unread_low = models.PositiveIntegerField(default=0)
+    unread_high = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_low", "user_high"], name="chat_conversation_pair"
+            ),
+            models.CheckConstraint(
+                condition=models.Q(user_low__lt=models.F("user_high")),
+                name="chat_conversation_ordered_pair",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user_high", "user_low"], name="chat_conversation_high_idx"
+            ),
+        ]
+
+    @staticmethod
+    def pair(user_id, other_id):
+        return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+    def __str__(self):
+        return f"Conversation {self.user_low_id}-{self.user_high_id}"
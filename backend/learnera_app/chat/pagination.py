@@ -0,0 +1,95 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Q
+
+
+class MessageWindowPagination(BasePagination):
+    """
+    Pages backwards through a conversation: the newest ``limit`` messages,
+    then ``?before=<message id>`` for the window older than that message.
+
+    ``paginate_queryset`` takes one queryset per direction of the
+    conversation. Each is cut to the window on its own
+    ``(sender, receiver, timestamp)`` index scan before the two are merged,
+    so a window costs the same however long the conversation is.
+
+    The window is returned oldest-first as a plain list, as the chat page
+    expects, and the link to the older window is sent in the Link header.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "limit"
+    cursor_query_param = "before"
+    invalid_cursor_message = "Invalid cursor"
+    ordering = ("-timestamp", "-id")
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_cursor_filter(self, request, querysets):
+        raw_id = request.query_params.get(self.cursor_query_param)
+        if not raw_id:
+            return None
+        try:
+            message_id = int(raw_id)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        anchor = None
+        for queryset in querysets:
+            anchor = queryset.filter(id=message_id).values("timestamp").first()
+            if anchor:
+                break
+        if anchor is None:
+            raise NotFound(self.invalid_cursor_message)
+        return Q(timestamp__lt=anchor["timestamp"]) | Q(
+            timestamp=anchor["timestamp"], id__lt=message_id
+        )
+
+    def paginate_queryset(self, querysets, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor_filter = self.get_cursor_filter(request, querysets)
+        windows = []
+        for queryset in querysets:
+            if cursor_filter is not None:
+                queryset = queryset.filter(cursor_filter)
+            windows.append(queryset.order_by(*self.ordering)[: page_size + 1])
+
+        merged = windows[0].union(*windows[1:], all=True)
+        rows = list(merged.order_by(*self.ordering)[: page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = page[-1].id if len(rows) > page_size else None
+        return page[::-1]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link:
+            headers["Link"] = f'<{next_link}>; rel="next"'
+        return Response(data, headers=headers)
+
+
+class ContactPagination(LimitOffsetPagination):
+    """
+    ``?limit=``/``?offset=`` pages of the contact list. Without ``limit`` the
+    first ``default_limit`` contacts are returned, so a school's full roster is
+    never sorted and serialized in one request.
+    """
+
+    default_limit = 50
+    max_limit = 200
@@ -1,6 +1,11 @@
 from django.urls import re_path
 from . import consumers
+from .services import ChatMessageService
 
 websocket_urlpatterns = [
     re_path(r"ws/chat/(?P<token>[^/]+)/$", consumers.ChatConsumer.as_asgi()),
 ]
+
+channel_routes = {
+    ChatMessageService.WRITER_CHANNEL: consumers.ChatMessageWriterConsumer.as_asgi(),
+}
@@ -3,12 +3,16 @@ from teachers.models import Teacher
 from students.models import Student
 from users.models import CustomUser
 from .models import UserChatMessage
+from .services import PresenceService
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
     display_name = serializers.SerializerMethodField()
+    is_online = serializers.SerializerMethodField()
+    last_seen = serializers.SerializerMethodField()
     last_message = serializers.CharField(read_only=True)
     last_message_timestamp = serializers.DateTimeField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = CustomUser
@@ -22,34 +26,48 @@ class CustomUserSerializer(serializers.ModelSerializer):
             "is_student",
             "is_parent",
             "is_online",
+            "last_seen",
             "profile_image",
             "display_name",
             "last_message",
             "last_message_timestamp",
+            "unread_count",
         ]
 
+    def _presence(self, obj):
+        presence = self.context.get("presence")
+        if presence is None or obj.id not in presence:
+            presence = PresenceService.get_presence([obj.id])
+        return presence[obj.id]
+
+    def get_is_online(self, obj):
+        return self._presence(obj)["is_online"]
+
+    def get_last_seen(self, obj):
+        return self._presence(obj)["last_seen"]
+
     def get_display_name(self, obj):
         viewer = self.context.get("viewer")
 
         if not viewer:
             return f"{obj.first_name} {obj.last_name}"
 
+        # ContactListView selects these relations, so no queries run here.
         if viewer.is_teacher and obj.is_student:
             try:
-                student = Student.objects.get(user=obj)
-                return f"{obj.first_name} {obj.last_name} {student.class_assigned}"
+                student = obj.student
             except Student.DoesNotExist:
                 return f"{obj.first_name} {obj.last_name}"
+            return f"{obj.first_name} {obj.last_name} {student.class_assigned}"
 
         elif (viewer.is_student or viewer.is_parent) and obj.is_teacher:
             try:
-                teacher = Teacher.objects.get(user=obj)
-                subject_name = getattr(teacher.subject, "subject_name", "")
-                separator = f" - {subject_name}" if subject_name else ""
-                return f"{teacher.user.first_name} {teacher.user.last_name}{separator}"
-
+                teacher = obj.teacher
             except Teacher.DoesNotExist:
                 return f"{obj.first_name} {obj.last_name}"
+            subject_name = getattr(teacher.subject, "subject_name", "")
+            separator = f" - {subject_name}" if subject_name else ""
+            return f"{obj.first_name} {obj.last_name}{separator}"
 
         return f"{obj.first_name} {obj.last_name}"
 
@@ -60,8 +78,16 @@ class UserChatMessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = UserChatMessage
-        fields = ["id", "sender", "receiver", "message", "timestamp"]
-        read_only_fields = ["timestamp"]
+        fields = [
+            "id",
+            "sender",
+            "receiver",
+            "message",
+            "timestamp",
+            "is_received",
+            "is_read",
+        ]
+        read_only_fields = ["timestamp", "is_received", "is_read"]
 
     def validate(self, data):
         sender = data.get("sender")
@@ -0,0 +1,588 @@
+import uuid
+from collections import deque
+from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from loguru import logger  # type: ignore
+from students.models import Student
+from teachers.models import Section
+from users.models import CustomUser
+from .models import Conversation, UserChatMessage
+
+
+class ContactService:
+    """
+    Who may chat with whom. Teachers talk to students and parents, students
+    and parents talk to teachers; everyone else has no contacts.
+    """
+
+    # Presence audiences, one pair of groups per section: a socket joins the
+    # groups of the people it may talk to in its sections, and every status
+    # change goes to the groups of the people who may talk to the user whose
+    # status changed. Contacts outside these sections are followed with
+    # presence subscriptions.
+    TEACHER_WATCHERS_GROUP = "presence_watch_teachers_{}"
+    FAMILY_WATCHERS_GROUP = "presence_watch_students_parents_{}"
+
+    @staticmethod
+    def get_allowed_contacts(user):
+        if user.is_teacher:
+            return CustomUser.objects.filter(Q(is_student=True) | Q(is_parent=True))
+        elif user.is_parent or user.is_student:
+            return CustomUser.objects.filter(is_teacher=True)
+        return CustomUser.objects.none()
+
+    @staticmethod
+    def presence_section_ids(user):
+        """
+        Sections whose presence the user shares: the sections a teacher
+        teaches or is class teacher of, a student's own section and the
+        sections of a parent's children.
+        """
+        if user.is_teacher:
+            sections = Section.objects.filter(
+                Q(teachers__user_id=user.id) | Q(class_teacher__user_id=user.id)
+            ).values_list("id", flat=True)
+        elif user.is_student or user.is_parent:
+            students = (
+                Student.objects.filter(user_id=user.id)
+                if user.is_student
+                else Student.objects.filter(parents__user_id=user.id)
+            )
+            sections = students.filter(class_assigned__isnull=False).values_list(
+                "class_assigned_id", flat=True
+            )
+        else:
+            return []
+        return sorted(set(sections))
+
+    @staticmethod
+    def _section_groups(group, section_ids):
+        return [group.format(section_id) for section_id in section_ids]
+
+    @staticmethod
+    def watch_groups(user, section_ids):
+        """Groups whose presence updates this user's sockets should receive."""
+        if user.is_teacher:
+            group = ContactService.FAMILY_WATCHERS_GROUP
+        elif user.is_student or user.is_parent:
+            group = ContactService.TEACHER_WATCHERS_GROUP
+        else:
+            return []
+        return ContactService._section_groups(group, section_ids)
+
+    @staticmethod
+    def audience_groups(user, section_ids):
+        """Groups that should hear about this user's presence changes."""
+        if user.is_teacher:
+            group = ContactService.TEACHER_WATCHERS_GROUP
+        elif user.is_student or user.is_parent:
+            group = ContactService.FAMILY_WATCHERS_GROUP
+        else:
+            return []
+        return ContactService._section_groups(group, section_ids)
+
+
+class ChatMessageIdPool:
+    """
+    Hands out UserChatMessage ids to write-behind messages before the row is
+    inserted. Ids are taken from the table's own sequence in blocks, one
+    query per BLOCK_SIZE messages in each process, so they never collide
+    with normally inserted rows. Ids from different processes interleave, so
+    messages are ordered by timestamp and then id, never by id alone.
+    """
+
+    BLOCK_SIZE = 100
+    _ids = deque()
+
+    @staticmethod
+    def _reserve(count):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [UserChatMessage._meta.db_table, count],
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    @staticmethod
+    async def next_id():
+        if not ChatMessageIdPool._ids:
+            ids = await database_sync_to_async(ChatMessageIdPool._reserve)(
+                ChatMessageIdPool.BLOCK_SIZE
+            )
+            ChatMessageIdPool._ids.extend(ids)
+        return ChatMessageIdPool._ids.popleft()
+
+
+class ChatMessageService:
+    WRITER_CHANNEL = "chat-message-writer"
+
+    @staticmethod
+    def create_message(sender_id, receiver_id, message):
+        """
+        Stores a message with a single INSERT. Callers must already have
+        checked that the receiver is one of the sender's contacts.
+        """
+        chat_message = UserChatMessage(
+            sender_id=sender_id, receiver_id=receiver_id, message=message
+        )
+        with transaction.atomic():
+            chat_message.save(validate=False)
+            ConversationService.record_messages([chat_message])
+        return chat_message
+
+    @staticmethod
+    async def queue_message(sender_id, receiver_id, message):
+        """
+        Write-behind counterpart of create_message(). The message gets its id
+        and timestamp now and is handed to the writer worker through the
+        channel layer, which stores it with the next batch. The channel layer
+        is not a durable queue, so when it refuses the message because the
+        writer has fallen behind, the message is stored straight away.
+        """
+        chat_message = UserChatMessage(
+            id=await ChatMessageIdPool.next_id(),
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            message=message,
+            timestamp=timezone.now(),
+        )
+        try:
+            await get_channel_layer().send(
+                ChatMessageService.WRITER_CHANNEL,
+                {
+                    "type": "chat.persist",
+                    "id": chat_message.id,
+                    "sender_id": sender_id,
+                    "receiver_id": receiver_id,
+                    "message": message,
+                    "timestamp": chat_message.timestamp.isoformat(),
+                },
+            )
+        except ChannelFull:
+            logger.warning(
+                f"Chat writer channel is full, storing message {chat_message.id} directly"
+            )
+            await database_sync_to_async(ChatMessageService.store_message)(chat_message)
+        return chat_message
+
+    @staticmethod
+    def store_message(chat_message):
+        with transaction.atomic():
+            chat_message.save(validate=False, force_insert=True)
+            ConversationService.record_messages([chat_message])
+
+    @staticmethod
+    async def queue_receipt(status, reader_id, contact_id, up_to_id):
+        """
+        Hands a receipt to the writer worker, which applies it after storing
+        the messages queued before it, so it also covers messages the reader
+        has seen but the writer has not stored yet. Returns False when the
+        channel layer refuses it and the caller should apply it itself.
+        """
+        try:
+            await get_channel_layer().send(
+                ChatMessageService.WRITER_CHANNEL,
+                {
+                    "type": "chat.store_receipt",
+                    "status": status,
+                    "reader_id": reader_id,
+                    "contact_id": contact_id,
+                    "up_to": up_to_id,
+                },
+            )
+        except ChannelFull:
+            logger.warning("Chat writer channel is full, applying receipt directly")
+            return False
+        return True
+
+    @staticmethod
+    def write_messages(rows):
+        messages = [
+            UserChatMessage(
+                id=row["id"],
+                sender_id=row["sender_id"],
+                receiver_id=row["receiver_id"],
+                message=row["message"],
+                timestamp=parse_datetime(row["timestamp"]),
+            )
+            for row in rows
+        ]
+        try:
+            with transaction.atomic():
+                UserChatMessage.objects.bulk_create(messages)
+                ConversationService.record_messages(messages)
+            return len(messages)
+        except IntegrityError:
+            logger.warning("Chat message batch failed, storing messages one by one")
+
+        # A user deleted since the message was sent must not cost the batch.
+        written = 0
+        for chat_message in messages:
+            try:
+                ChatMessageService.store_message(chat_message)
+                written += 1
+            except IntegrityError as e:
+                logger.error(f"Dropping chat message {chat_message.id}: {e}")
+        return written
+
+
+class ConversationService:
+    """
+    Keeps the Conversation summary rows in step with the stored messages:
+    last message preview and time, and each side's unread count.
+    """
+
+    @staticmethod
+    def _summarize(messages):
+        summaries = {}
+        for chat_message in sorted(messages, key=lambda m: (m.timestamp, m.id)):
+            pair = Conversation.pair(chat_message.sender_id, chat_message.receiver_id)
+            summary = summaries.setdefault(pair, {"unread_low": 0, "unread_high": 0})
+            summary["last"] = chat_message
+            if chat_message.receiver_id == pair[0]:
+                summary["unread_low"] += 1
+            else:
+                summary["unread_high"] += 1
+        return summaries
+
+    @staticmethod
+    def _last_message_fields(chat_message):
+        return {
+            "last_message": chat_message.message[: Conversation.PREVIEW_LENGTH],
+            "last_message_at": chat_message.timestamp,
+            "last_sender_id": chat_message.sender_id,
+        }
+
+    @staticmethod
+    def _newer_last_message_fields(chat_message):
+        """
+        Like _last_message_fields(), but as expressions that keep the stored
+        preview when it is already newer: write-behind batches can be stored
+        after messages that were sent later.
+        """
+        newer = Q(last_message_at__isnull=True) | Q(
+            last_message_at__lte=chat_message.timestamp
+        )
+        return {
+            field: Case(
+                When(newer, then=Value(value)),
+                default=F(field),
+                output_field=Conversation._meta.get_field(field),
+            )
+            for field, value in ConversationService._last_message_fields(
+                chat_message
+            ).items()
+        }
+
+    @staticmethod
+    def record_messages(messages):
+        """
+        Folds newly stored messages into their conversations with one UPDATE
+        per user pair, creating the row the first time a pair talks.
+        """
+        summaries = ConversationService._summarize(messages)
+        for (user_low, user_high), summary in summaries.items():
+            last_fields = ConversationService._last_message_fields(summary["last"])
+            conversation = Conversation.objects.filter(
+                user_low_id=user_low, user_high_id=user_high
+            )
+            updates = {
+                **ConversationService._newer_last_message_fields(summary["last"]),
+                "unread_low": F("unread_low") + summary["unread_low"],
+                "unread_high": F("unread_high") + summary["unread_high"],
+            }
+            if conversation.update(**updates):
+                continue
+            try:
+                with transaction.atomic():
+                    Conversation.objects.create(
+                        user_low_id=user_low,
+                        user_high_id=user_high,
+                        unread_low=summary["unread_low"],
+                        unread_high=summary["unread_high"],
+                        **last_fields,
+                    )
+            except IntegrityError:
+                # Another worker created the row first.
+                conversation.update(**updates)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        """Recreates every Conversation row from UserChatMessage."""
+        Conversation.objects.all().delete()
+        summaries = {}
+        messages = (
+            UserChatMessage.objects.filter(sender__isnull=False, receiver__isnull=False)
+            .order_by("timestamp", "id")
+            .only("id", "sender_id", "receiver_id", "message", "timestamp", "is_read")
+            .iterator(chunk_size=2000)
+        )
+        for chat_message in messages:
+            pair = Conversation.pair(chat_message.sender_id, chat_message.receiver_id)
+            summary = summaries.setdefault(pair, {"unread_low": 0, "unread_high": 0})
+            summary["last"] = chat_message
+            if not chat_message.is_read:
+                side = (
+                    "unread_low"
+                    if chat_message.receiver_id == pair[0]
+                    else "unread_high"
+                )
+                summary[side] += 1
+
+        Conversation.objects.bulk_create(
+            [
+                Conversation(
+                    user_low_id=user_low,
+                    user_high_id=user_high,
+                    unread_low=summary["unread_low"],
+                    unread_high=summary["unread_high"],
+                    **ConversationService._last_message_fields(summary["last"]),
+                )
+                for (user_low, user_high), summary in summaries.items()
+            ],
+            batch_size=1000,
+        )
+        return len(summaries)
+
+
+class ReceiptService:
+    """
+    Delivery and read receipts. A receipt covers every message from one
+    contact up to and including a given message, in the (timestamp, id)
+    order the history is shown in, and is stored with a single UPDATE.
+    """
+
+    @staticmethod
+    def _incoming(receiver_id, sender_id, up_to_id):
+        messages = UserChatMessage.objects.filter(
+            sender_id=sender_id, receiver_id=receiver_id
+        )
+        up_to = Subquery(messages.filter(id=up_to_id).values("timestamp")[:1])
+        return messages.filter(
+            Q(timestamp__lt=up_to) | Q(timestamp=up_to, id__lte=up_to_id)
+        )
+
+    @staticmethod
+    def mark_delivered(receiver_id, sender_id, up_to_id):
+        return (
+            ReceiptService._incoming(receiver_id, sender_id, up_to_id)
+            .filter(is_received=False)
+            .update(is_received=True)
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def mark_read(reader_id, sender_id, up_to_id):
+        updated = (
+            ReceiptService._incoming(reader_id, sender_id, up_to_id)
+            .filter(is_read=False)
+            .update(is_read=True, is_received=True)
+        )
+        if updated:
+            pair = Conversation.pair(reader_id, sender_id)
+            side = "unread_low" if reader_id == pair[0] else "unread_high"
+            Conversation.objects.filter(
+                user_low_id=pair[0], user_high_id=pair[1]
+            ).update(**{side: Greatest(F(side) - updated, 0)})
+        return updated
+
+    @staticmethod
+    def apply(status, reader_id, contact_id, up_to_id):
+        if status == "read":
+            return ReceiptService.mark_read(reader_id, contact_id, up_to_id)
+        return ReceiptService.mark_delivered(reader_id, contact_id, up_to_id)
+
+    @staticmethod
+    async def store(status, reader_id, contact_id, up_to_id):
+        """
+        Applies a receipt and, if it changed anything, sends it to the
+        contact's sockets as a "chat_receipt" event.
+        """
+        updated = await database_sync_to_async(ReceiptService.apply)(
+            status, reader_id, contact_id, up_to_id
+        )
+        if updated:
+            await get_channel_layer().group_send(
+                f"chat_user_{contact_id}",
+                {
+                    "type": "chat_receipt",
+                    "status": status,
+                    "user_id": reader_id,
+                    "up_to": up_to_id,
+                },
+            )
+        return updated
+
+    @staticmethod
+    def unread_counts(user):
+        """Unread messages per contact, read from the Conversation rows."""
+        counts = {}
+        for contact_id, unread in Conversation.objects.filter(
+            user_low=user, unread_low__gt=0
+        ).values_list("user_high_id", "unread_low"):
+            counts[contact_id] = unread
+        for contact_id, unread in Conversation.objects.filter(
+            user_high=user, unread_high__gt=0
+        ).values_list("user_low_id", "unread_high"):
+            counts[contact_id] = unread
+        return counts
+
+
+class PresenceService:
+    """
+    Online state and last-seen times for the chat, kept in the shared cache
+    rather than on CustomUser.
+
+    Each online user has one counter key holding the number of open sockets.
+    The consumers refresh its TTL on a heartbeat, so a worker that dies
+    without running disconnect() lets its users fall offline on their own.
+
+    The counter can still expire under live sockets, for instance when the
+    cache is flushed or the event loop stalls past the TTL. Every counter
+    therefore belongs to an epoch kept in a second key, and each socket
+    remembers the epoch it was counted in. A socket whose epoch is gone counts
+    itself again in the current one, exactly once, and does not take its
+    count away from an epoch it was never part of.
+
+    Status changes go to the audience groups of the user's sections and to
+    the user's own presence group, which sockets join when they subscribe to
+    that one contact.
+    """
+
+    TTL = 90
+    HEARTBEAT_INTERVAL = 30
+
+    @staticmethod
+    def _key(user_id):
+        return f"presence:{user_id}"
+
+    @staticmethod
+    def _epoch_key(user_id):
+        return f"presence:epoch:{user_id}"
+
+    @staticmethod
+    def _last_seen_key(user_id):
+        return f"presence:last_seen:{user_id}"
+
+    @staticmethod
+    def user_group(user_id):
+        return f"presence_user_{user_id}"
+
+    @staticmethod
+    def broadcast_groups(user, section_ids):
+        return [PresenceService.user_group(user.id)] + ContactService.audience_groups(
+            user, section_ids
+        )
+
+    @staticmethod
+    def status_event(user_id, is_online):
+        return {
+            "type": "user_status_update",
+            "user_id": user_id,
+            "is_online": is_online,
+        }
+
+    @staticmethod
+    async def _count_socket(user_id):
+        """Adds one socket to the counter. Returns (connections, epoch)."""
+        key = PresenceService._key(user_id)
+        epoch_key = PresenceService._epoch_key(user_id)
+        await cache.aadd(epoch_key, uuid.uuid4().hex, PresenceService.TTL)
+        epoch = await cache.aget(epoch_key)
+        await cache.aadd(key, 0, PresenceService.TTL)
+        try:
+            connections = await cache.aincr(key)
+        except ValueError:
+            # The key expired between add() and incr().
+            await cache.aset(key, 1, PresenceService.TTL)
+            connections = 1
+        await cache.atouch(key, PresenceService.TTL)
+        await cache.atouch(epoch_key, PresenceService.TTL)
+        return connections, epoch
+
+    @staticmethod
+    async def connect(user_id):
+        """
+        Registers one open socket. Returns (came_online, epoch); the socket
+        passes the epoch back to heartbeat() and disconnect().
+        """
+        connections, epoch = await PresenceService._count_socket(user_id)
+        return connections == 1, epoch
+
+    @staticmethod
+    async def heartbeat(user_id, epoch):
+        """Keeps the socket counted. Returns the epoch it is now counted in."""
+        key = PresenceService._key(user_id)
+        epoch_key = PresenceService._epoch_key(user_id)
+        if await cache.aget(epoch_key) == epoch:
+            if await cache.atouch(key, PresenceService.TTL):
+                await cache.atouch(epoch_key, PresenceService.TTL)
+                return epoch
+            # The counter expired on its own, taking the other sockets' counts
+            # with it. Retire the epoch so each of them counts itself again.
+            await cache.adelete(epoch_key)
+        _, epoch = await PresenceService._count_socket(user_id)
+        return epoch
+
+    @staticmethod
+    async def disconnect(user_id, epoch):
+        """Drops one open socket. Returns True if the user just went offline."""
+        key = PresenceService._key(user_id)
+        if await cache.aget(PresenceService._epoch_key(user_id)) == epoch:
+            try:
+                connections = await cache.adecr(key)
+            except ValueError:
+                connections = 0
+        else:
+            # This socket is not part of the current counter.
+            connections = await cache.aget(key, 0)
+        if connections > 0:
+            return False
+        await cache.adelete(key)
+        await cache.adelete(PresenceService._epoch_key(user_id))
+        await cache.aset(
+            PresenceService._last_seen_key(user_id),
+            timezone.now().isoformat(),
+            timeout=None,
+        )
+        return True
+
+    @staticmethod
+    def _presence_keys(user_ids):
+        keys = []
+        for user_id in user_ids:
+            keys.append(PresenceService._key(user_id))
+            keys.append(PresenceService._last_seen_key(user_id))
+        return keys
+
+    @staticmethod
+    def get_presence(user_ids):
+        """Maps each user id to its online flag and last-seen time in one read."""
+        user_ids = list(user_ids)
+        values = cache.get_many(PresenceService._presence_keys(user_ids))
+        return PresenceService._build_presence(user_ids, values)
+
+    @staticmethod
+    async def aget_presence(user_ids):
+        user_ids = list(user_ids)
+        values = await cache.aget_many(PresenceService._presence_keys(user_ids))
+        return PresenceService._build_presence(user_ids, values)
+
+    @staticmethod
+    def _build_presence(user_ids, values):
+        return {
+            user_id: {
+                "is_online": bool(values.get(PresenceService._key(user_id))),
+                "last_seen": values.get(PresenceService._last_seen_key(user_id)),
+            }
+            for user_id in user_ids
+        }
@@ -1,5 +1,10 @@
 from django.urls import path
-from .views import ContactListView, CurrentUserView, UserChatMessageView
+from .views import (
+    ContactListView,
+    CurrentUserView,
+    UnreadCountView,
+    UserChatMessageView,
+)
 
 urlpatterns = [
     path(
@@ -9,4 +14,5 @@ urlpatterns = [
     ),
     path("contact-list/", ContactListView.as_view(), name="contact-list"),
     path("my-info/", CurrentUserView.as_view(), name="my-info"),
+    path("unread-counts/", UnreadCountView.as_view(), name="unread-counts"),
 ]
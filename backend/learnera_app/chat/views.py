@@ -3,10 +3,13 @@ from .models import UserChatMessage
 from users.models import CustomUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from .pagination import ContactPagination, MessageWindowPagination
 from .serializers import CustomUserSerializer
 from .serializers import UserChatMessageSerializer
+from .services import ContactService, PresenceService, ReceiptService
 from rest_framework import generics, permissions, status
-from django.db.models import Q, Max, F, OuterRef, Subquery
+from django.db.models import Q, Max, F, FilteredRelation
+from django.db.models.functions import Coalesce
 
 # Create your views here.
 
@@ -20,16 +23,30 @@ class CurrentUserView(APIView):
 
 
 class UserChatMessageView(generics.ListAPIView):
+    """
+    Conversation history, newest window first; see MessageWindowPagination
+    for the ``?before=``/``?limit=`` parameters.
+    """
+
     serializer_class = UserChatMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = None
+    pagination_class = MessageWindowPagination
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["viewer"] = self.request.user
         return context
 
-    def get_queryset(self):
+    def list(self, request, *args, **kwargs):
+        querysets = self.get_conversation_querysets()
+        if not querysets:
+            return Response([])
+        page = self.paginate_queryset(querysets)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_conversation_querysets(self):
+        """One queryset per direction, each served by the sender/receiver index."""
         user = self.request.user
         receiver_id = self.kwargs.get("receiver_id")
 
@@ -37,48 +54,96 @@ class UserChatMessageView(generics.ListAPIView):
 
         if user.is_teacher:
             if not (receiver.is_student or receiver.is_parent):
-                return UserChatMessage.objects.none()
+                return []
 
         if user.is_parent:
             if not receiver.is_teacher:
-                return UserChatMessage.objects.none()
+                return []
 
         if user.is_student:
             if not receiver.is_teacher:
-                return UserChatMessage.objects.none()
+                return []
 
-        return UserChatMessage.objects.filter(
-            Q(sender=user, receiver_id=receiver_id)
-            | Q(sender_id=receiver_id, receiver=user)
-        ).order_by("timestamp")
+        return [
+            UserChatMessage.objects.filter(sender=user, receiver_id=receiver_id),
+            UserChatMessage.objects.filter(sender_id=receiver_id, receiver=user),
+        ]
 
 
-class ContactListView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
-
-    def get(self, request, *args, **kwargs):
-        contacts = self.get_allowed_contacts(request.user)
+class ContactListView(generics.ListAPIView):
+    """
+    The user's contacts, most recent conversation first. The last message
+    and unread count are joined in from the Conversation summaries.
+    """
 
-        latest_messages = UserChatMessage.objects.filter(
-            Q(sender=OuterRef("pk"), receiver=request.user)
-            | Q(sender=request.user, receiver=OuterRef("pk"))
-        ).order_by("-timestamp")
-
-        contacts = contacts.annotate(
-            last_message=Subquery(latest_messages.values("message")[:1]),
-            last_message_timestamp=Subquery(latest_messages.values("timestamp")[:1]),
-        ).order_by("-last_message_timestamp")
+    serializer_class = CustomUserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ContactPagination
 
-        serializer = CustomUserSerializer(
-            contacts, many=True, context={"viewer": request.user}
+    def get_queryset(self):
+        user = self.request.user
+        # The contact is either the low or the high side of the pair.
+        contacts = self.get_allowed_contacts(user).annotate(
+            conversation_low=FilteredRelation(
+                "conversations_as_low",
+                condition=Q(conversations_as_low__user_high=user),
+            ),
+            conversation_high=FilteredRelation(
+                "conversations_as_high",
+                condition=Q(conversations_as_high__user_low=user),
+            ),
         )
+        return contacts.annotate(
+            last_message=Coalesce(
+                "conversation_low__last_message", "conversation_high__last_message"
+            ),
+            last_message_timestamp=Coalesce(
+                "conversation_low__last_message_at",
+                "conversation_high__last_message_at",
+            ),
+            unread_count=Coalesce(
+                "conversation_low__unread_high", "conversation_high__unread_low", 0
+            ),
+        ).order_by(F("last_message_timestamp").desc(nulls_last=True), "id")
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        contacts = list(page if page is not None else queryset)
+
+        context = self.get_serializer_context()
+        context["viewer"] = request.user
+        context["presence"] = PresenceService.get_presence(
+            contact.id for contact in contacts
+        )
+        serializer = self.get_serializer_class()(contacts, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
     def get_allowed_contacts(self, user):
+        contacts = ContactService.get_allowed_contacts(user)
+        # The relations CustomUserSerializer.get_display_name reads.
         if user.is_teacher:
-            return CustomUser.objects.filter(Q(is_student=True) | Q(is_parent=True))
-        elif user.is_parent:
-            return CustomUser.objects.filter(is_teacher=True)
-        elif user.is_student:
-            return CustomUser.objects.filter(is_teacher=True)
-        return CustomUser.objects.none()
+            return contacts.select_related("student__class_assigned__school_class")
+        if user.is_student or user.is_parent:
+            return contacts.select_related("teacher__subject")
+        return contacts
+
+
+class UnreadCountView(APIView):
+    """Unread message badges per contact, without counting messages."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        counts = ReceiptService.unread_counts(request.user)
+        return Response(
+            {
+                "total": sum(counts.values()),
+                "contacts": [
+                    {"user_id": user_id, "unread_count": unread}
+                    for user_id, unread in sorted(counts.items())
+                ],
+            }
+        )
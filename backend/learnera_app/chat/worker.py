@@ -0,0 +1,70 @@
+import asyncio
+import signal
+from channels.worker import Worker
+from loguru import logger  # type: ignore
+
+
+class GracefulWorker(Worker):
+    """
+    A channels Worker that shuts down cleanly on SIGTERM or SIGINT. The stock
+    worker is simply killed, so application instances never get to run their
+    cleanup. Here the listeners are stopped first, the messages already handed
+    to an application are given time to be dispatched, and then every
+    application instance is cancelled and awaited, which lets
+    ChatMessageWriterConsumer store the messages it still buffers.
+    """
+
+    SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+    # Keep this below the container's stop grace period.
+    DRAIN_TIMEOUT = 10
+
+    async def handle(self):
+        # Unlike Worker.handle(), cancelling this also cancels the listeners.
+        await asyncio.gather(*(self.listener(channel) for channel in self.channels))
+
+    async def arun(self):
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        for signum in self.SHUTDOWN_SIGNALS:
+            loop.add_signal_handler(signum, stopping.set)
+
+        serving = asyncio.ensure_future(super().arun())
+        stop = asyncio.ensure_future(stopping.wait())
+        try:
+            await asyncio.wait({serving, stop}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for signum in self.SHUTDOWN_SIGNALS:
+                loop.remove_signal_handler(signum)
+            stop.cancel()
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+            logger.info("Worker stopping, shutting down application instances")
+            await self.shutdown_applications()
+
+        if not serving.cancelled() and serving.exception() is not None:
+            raise serving.exception()
+
+    async def shutdown_applications(self):
+        instances = list(self.application_instances.values())
+        try:
+            await asyncio.wait_for(self.drain(instances), self.DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error("Application instances did not drain their queues in time")
+
+        for details in instances:
+            details["future"].cancel()
+        results = await asyncio.gather(
+            *(details["future"] for details in instances), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Application instance failed on shutdown: {result}")
+        self.application_instances.clear()
+
+    @staticmethod
+    async def drain(instances):
+        for details in instances:
+            while not details["input_queue"].empty() and not details["future"].done():
+                await asyncio.sleep(0.01)
+        # Let the last message taken off each queue finish dispatching.
+        await asyncio.sleep(0)
@@ -9,7 +9,7 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from channels.security.websocket import AllowedHostsOriginValidator
 from django.conf import settings
@@ -23,7 +23,8 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "learnera_app.settings")
 django.setup()
 
 # Import websocket_urlpatterns AFTER Django setup
-from chat.routing import websocket_urlpatterns
+from chat.middleware import JWTAuthMiddleware
+from chat.routing import channel_routes, websocket_urlpatterns
 
 django_asgi_app = get_asgi_application()
 
@@ -32,7 +33,8 @@ application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AllowedHostsOriginValidator(
-            AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+            AuthMiddlewareStack(JWTAuthMiddleware(URLRouter(websocket_urlpatterns)))
         ),
+        "channel": ChannelNameRouter(channel_routes),
     }
 )
@@ -0,0 +1,83 @@
+"""
+Shared-cache helpers for the read-mostly list endpoints.
+
+Every cached list response is keyed by the version numbers of the models it is
+built from. Saving or deleting a row of one of those models bumps that model's
+version, so stale responses are never served again and simply expire.
+"""
+
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+
+def model_version_key(model):
+    return f"list_cache:version:{model._meta.label_lower}"
+
+
+def get_model_versions(models):
+    keys = [model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate_model(model):
+    key = model_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def _invalidate_on_change(sender, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: invalidate_model(sender))
+
+
+def connect_list_cache_invalidation(*models):
+    """Bumps the cache version of each model whenever one of its rows changes."""
+    for model in models:
+        label = model._meta.label_lower
+        post_save.connect(
+            _invalidate_on_change,
+            sender=model,
+            dispatch_uid=f"list_cache_post_save_{label}",
+        )
+        post_delete.connect(
+            _invalidate_on_change,
+            sender=model,
+            dispatch_uid=f"list_cache_post_delete_{label}",
+        )
+
+
+class CachedListMixin:
+    """
+    Serves ``list()`` from the shared cache. ``cache_models`` must name every
+    model the serialized response reads from, and each of them has to be
+    registered with ``connect_list_cache_invalidation``.
+    """
+
+    cache_models = ()
+    cache_timeout = 60 * 60
+
+    def get_list_cache_key(self, request):
+        versions = ".".join(str(v) for v in get_model_versions(self.cache_models))
+        view = f"{type(self).__module__}.{type(self).__name__}"
+        return f"list_cache:{view}:{versions}:{request.get_full_path()}"
+
+    def list(self, request, *args, **kwargs):
+        cache_key = self.get_list_cache_key(request)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(cache_key, response.data, self.cache_timeout)
+        return response
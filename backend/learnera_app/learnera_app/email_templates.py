@@ -0,0 +1,89 @@
+"""
+Cached rendering for the transactional email templates.
+
+Onboarding a class sends the same welcome email to hundreds of people with
+only the username and link changed. An EmailTemplate keeps the compiled
+template for one kind of email, and works out its plain-text alternative once
+by rendering the template with placeholders and running strip_tags on the
+result. Each send then renders the HTML and fills the placeholders in the
+cached text, instead of stripping the whole HTML page again.
+"""
+
+import re
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+PLACEHOLDER = "EMAILFIELD{}END"
+PLACEHOLDER_PATTERN = re.compile(r"EMAILFIELD(\d+)END")
+
+
+class EmailTemplate:
+    """
+    One email template with the context shared by every recipient bound in.
+
+    ``fields`` are the per-recipient variables. They must only be printed
+    with ``{{ field }}``, not used in tags or filters, because the plain text
+    is built from a single placeholder render.
+    """
+
+    def __init__(self, template_name, fields, shared_context):
+        self.template_name = template_name
+        self.fields = tuple(fields)
+        self.shared_context = dict(shared_context)
+        self.template = get_template(template_name)
+
+        placeholders = {
+            field: PLACEHOLDER.format(index) for index, field in enumerate(self.fields)
+        }
+        plain = strip_tags(
+            self.template.render({**self.shared_context, **placeholders})
+        )
+        # Even positions are literal text, odd positions are field indexes.
+        parts = PLACEHOLDER_PATTERN.split(plain)
+        self.plain_parts = [
+            self.fields[int(part)] if position % 2 else part
+            for position, part in enumerate(parts)
+        ]
+
+    def render_plain(self, context):
+        return "".join(
+            str(context[part]) if position % 2 else part
+            for position, part in enumerate(self.plain_parts)
+        )
+
+    def render(self, context):
+        """Returns ``(html, plain_text)`` for one recipient's fields."""
+        missing = set(self.fields) - context.keys()
+        if missing:
+            raise KeyError(f"{self.template_name} needs {', '.join(sorted(missing))}")
+        html = self.template.render({**self.shared_context, **context})
+        return html, self.render_plain(context)
+
+    def render_many(self, contexts):
+        return [self.render(context) for context in contexts]
+
+
+_templates = {}
+
+
+def get_email_template(template_name, fields, **shared_context):
+    """
+    Returns the cached EmailTemplate for this template and shared context,
+    building it on first use. A missing template is remembered as well, and
+    raises TemplateDoesNotExist without searching the loaders again.
+    """
+    key = (template_name, tuple(fields), tuple(sorted(shared_context.items())))
+    if key not in _templates:
+        try:
+            _templates[key] = EmailTemplate(template_name, fields, shared_context)
+        except TemplateDoesNotExist:
+            _templates[key] = None
+    email_template = _templates[key]
+    if email_template is None:
+        raise TemplateDoesNotExist(template_name)
+    return email_template
+
+
+def clear_email_templates():
+    _templates.clear()
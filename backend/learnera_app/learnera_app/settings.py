@@ -12,9 +12,12 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 import os
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from datetime import timedelta
 from dotenv import load_dotenv
 import environ  # type: ignore
+from django.core.exceptions import ImproperlyConfigured
+from loguru import logger  # type: ignore
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -111,17 +114,68 @@ DJANGO_ALLOW_ASYNC_UNSAFE = True
 
 
 ASGI_APPLICATION = "learnera_app.asgi.application"
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": "redis://redis:6379/1",
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#         },
-#         "KEY_PREFIX": "learnera_cache",
-#         "TIMEOUT": 300,  
-#     }
-# }
+# Cache
+# CACHE_BACKEND picks the shared cache: "redis" (default whenever REDIS_URL is
+# set), "file" for a single host without Redis, or "locmem" for tests and
+# local runs. OTPs, rate limits and cached list responses must be visible to
+# every worker, so production deployments should use Redis.
+REDIS_URL = os.getenv("REDIS_URL")
+
+
+def redis_db_url(url, db):
+    """
+    Returns ``url`` pointing at database ``db``. Any database index already in
+    the path or the ``db`` query option is replaced; other options are kept.
+    """
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "db"]
+    return urlunsplit(parts._replace(path=f"/{db}", query=urlencode(query)))
+
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis" if REDIS_URL else "locmem")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or (
+    REDIS_URL and redis_db_url(REDIS_URL, 1)
+)
+
+if CACHE_BACKEND == "redis" and not CACHE_REDIS_URL:
+    raise ImproperlyConfigured("CACHE_BACKEND=redis needs REDIS_URL or CACHE_REDIS_URL.")
+if CACHE_BACKEND == "locmem" and not DEBUG:
+    # Each worker process would get its own cache: OTPs, rate limits, presence,
+    # exam papers and cached lists would differ between requests.
+    logger.warning(
+        "DEBUG is off but the cache is per-process memory. Set REDIS_URL "
+        "(or CACHE_BACKEND=file on a single host) for any real deployment."
+    )
+
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+            "KEY_PREFIX": "learnera_cache",
+            "TIMEOUT": 300,
+        }
+    }
+elif CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+            "KEY_PREFIX": "learnera_cache",
+            "TIMEOUT": 300,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "learnera_cache",
+            "TIMEOUT": 300,
+        }
+    }
 
 # CHANNEL_LAYERS = {
 #     "default": {
@@ -137,11 +191,22 @@ CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)], 
+            "hosts": [REDIS_URL or ("127.0.0.1", 6379)],
         },
     },
 }
 
+# Chat write-behind: when enabled, socket messages are broadcast first and
+# stored in batches by `python manage.py run_chat_writer`. Run
+# exactly one writer: receipts rely on it seeing the channel in order. A
+# message the channel layer refuses (channel full) is stored synchronously.
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "False") == "True"
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BEHIND_BATCH_SIZE", 200))
+CHAT_WRITE_BEHIND_FLUSH_MS = int(os.getenv("CHAT_WRITE_BEHIND_FLUSH_MS", 250))
+# Copy each sent message to the sender's other open sockets (other tabs or
+# devices). The sending socket is always acknowledged directly.
+CHAT_ECHO_TO_OTHER_DEVICES = os.getenv("CHAT_ECHO_TO_OTHER_DEVICES", "False") == "True"
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -223,6 +288,8 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = False
+# The chat history endpoint links to older messages in the Link header.
+CORS_EXPOSE_HEADERS = ["Link"]
 CORS_ALLOWED_CREDENTIALS = True
 
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND")
@@ -0,0 +1,6 @@
+def to_int(value):
+    """Returns ``value`` as an int, or None when it is not a whole number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
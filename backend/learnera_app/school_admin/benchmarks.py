@@ -0,0 +1,373 @@
+"""
+Benchmarks run by the roll_number_benchmark and dashboard_benchmark
+management commands.
+
+Each one builds throwaway data inside a transaction that is rolled back at
+the end. The roll number benchmark adds one student whose name sorts first
+(so every roll number moves) and times the renumbering. The dashboard
+benchmark times building the admin dashboard payload.
+"""
+
+import random
+import statistics
+import string
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from parents.models import (
+    FeeCategory,
+    FeeStructure,
+    Parent,
+    PaymentTransaction,
+    StudentFeePayment,
+)
+from students.models import Student
+from teachers.models import (
+    AcademicYear,
+    Attendance,
+    AttendanceDailySummary,
+    Exam,
+    SchoolClass,
+    Section,
+    Subject,
+    Teacher,
+)
+from teachers.services import AttendanceSummaryService
+
+from .services import DashboardStatsService, RollNumberService
+
+User = get_user_model()
+
+
+class RollNumberBenchmark:
+    """
+    "legacy" replays what CreateStudentView did before: assign_roll_number
+    and then reorder_by_name, each loading the section row by row, touching
+    every student's user and section, clearing the roll numbers and writing
+    them back with bulk_update. "window" is RollNumberService.reorder().
+    """
+
+    MODES = ("legacy", "window")
+
+    def __init__(self, students, repeat=3, seed=0):
+        self.students = students
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+
+    def _name(self):
+        return self.rng.choice(string.ascii_uppercase[1:]) + "".join(
+            self.rng.choices(string.ascii_lowercase, k=7)
+        )
+
+    def _setup(self):
+        self.academic_year = AcademicYear.objects.create(
+            name="bench",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 3, 30),
+        )
+        self.section = Section.objects.create(
+            school_class=SchoolClass.objects.create(class_name="bench"),
+            academic_year=self.academic_year,
+            section_name="B",
+            student_count=None,
+        )
+        self.password = make_password(None)
+        self.added = 0
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench_student_{index}",
+                    first_name=self._name(),
+                    last_name=self._name(),
+                    password=self.password,
+                    is_student=True,
+                )
+                for index in range(self.students)
+            ]
+        )
+        Student.objects.bulk_create(
+            [
+                Student(
+                    user=user,
+                    class_assigned=self.section,
+                    academic_year=self.academic_year,
+                )
+                for user in users
+            ]
+        )
+        RollNumberService.reorder([self.section.id], self.academic_year.id)
+
+    def _add_first_student(self):
+        # "A0999", "A0998", ... each sorts before every earlier student.
+        self.added += 1
+        user = User.objects.create(
+            username=f"bench_new_{self.added}",
+            first_name=f"A{1000 - self.added:04d}",
+            password=self.password,
+            is_student=True,
+        )
+        return Student.objects.create(
+            user=user, class_assigned=self.section, academic_year=self.academic_year
+        )
+
+    def _legacy_pass(self, null_first):
+        section_students = Student.objects.select_for_update().filter(
+            class_assigned_id=self.section.id,
+            academic_year_id=self.academic_year.id,
+        )
+        students = list(
+            section_students.order_by("user__first_name", "user__last_name")
+        )
+        # The old code logged each student's name and section id.
+        [(student.user.first_name, student.class_assigned.id) for student in students]
+        section_students.update(roll_number=None)
+        if null_first:
+            students = list(
+                section_students.order_by("user__first_name", "user__last_name")
+            )
+        for index, student in enumerate(students, start=1):
+            student.roll_number = index
+            student.user.first_name
+        Student.objects.bulk_update(students, ["roll_number"])
+
+    def _legacy(self):
+        with transaction.atomic():
+            self._legacy_pass(null_first=True)
+        with transaction.atomic():
+            self._legacy_pass(null_first=False)
+
+    def _window(self):
+        RollNumberService.reorder([self.section.id], self.academic_year.id)
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def run(self, modes=MODES):
+        results = []
+        with transaction.atomic():
+            self._setup()
+            for mode in modes:
+                timings = []
+                for _ in range(self.repeat):
+                    self._add_first_student()
+                    self.queries = 0
+                    with connection.execute_wrapper(self._count_query):
+                        started = time.perf_counter()
+                        getattr(self, f"_{mode}")()
+                        timings.append(time.perf_counter() - started)
+                results.append(
+                    {
+                        "mode": mode,
+                        "students": self.students,
+                        "seconds": statistics.median(timings),
+                        "queries": self.queries,
+                    }
+                )
+            transaction.set_rollback(True)
+        return results
+
+
+class DashboardBenchmark:
+    """
+    Times one load of the admin dashboard, that is the stats, fee stats and
+    attendance overview. "legacy" replays the queries the three views ran
+    before DashboardStatsService, one count or sum per number. "cold" builds
+    the payload after the cache version is bumped and "warm" reads it back
+    from the cache. The JWT user lookups of the HTTP requests are not
+    included.
+    """
+
+    MODES = ("legacy", "cold", "warm")
+    ATTENDANCE_DAYS = 20
+
+    def __init__(self, students, repeat=5, seed=0):
+        self.students = students
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+
+    def _setup(self):
+        today = timezone.localdate()
+        academic_year = AcademicYear.objects.create(
+            name="bench",
+            start_date=today - timedelta(days=180),
+            end_date=today + timedelta(days=180),
+        )
+        password = make_password(None)
+        teacher = Teacher.objects.create(
+            user=User.objects.create(
+                username="bench_teacher", password=password, is_teacher=True
+            )
+        )
+        section = Section.objects.create(
+            school_class=SchoolClass.objects.create(class_name="bench"),
+            academic_year=academic_year,
+            section_name="B",
+            student_count=None,
+        )
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench_student_{index}",
+                    password=password,
+                    is_student=True,
+                )
+                for index in range(self.students)
+            ]
+        )
+        students = Student.objects.bulk_create(
+            [
+                Student(user=user, class_assigned=section, academic_year=academic_year)
+                for user in users
+            ]
+        )
+
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    student=student,
+                    section=section,
+                    marked_by=teacher,
+                    academic_year=academic_year,
+                    date=today - timedelta(days=offset),
+                    status=self.rng.choice(["present", "absent", "late"]),
+                )
+                for offset in range(self.ATTENDANCE_DAYS)
+                for student in students
+            ],
+            batch_size=2000,
+        )
+        AttendanceSummaryService.rebuild([section.id])
+
+        fee_structure = FeeStructure.objects.create(
+            academic_year=academic_year,
+            fee_category=FeeCategory.objects.create(name="bench"),
+            amount=1000,
+            due_date=today + timedelta(days=30),
+        )
+        StudentFeePayment.objects.bulk_create(
+            [
+                StudentFeePayment(
+                    student=student,
+                    fee_structure=fee_structure,
+                    total_amount=1000,
+                    status=self.rng.choice(["PAID", "PENDING", "OVERDUE"]),
+                    due_date=today + timedelta(days=self.rng.randrange(-30, 30)),
+                )
+                for student in students
+            ],
+            batch_size=2000,
+        )
+
+        subject = Subject.objects.create(subject_name="bench")
+        now = timezone.now()
+        Exam.objects.bulk_create(
+            [
+                Exam(
+                    title=f"bench {days}",
+                    subject=subject,
+                    teacher=teacher,
+                    class_section=section,
+                    total_mark=50,
+                    duration=60,
+                    start_time=now + timedelta(days=days),
+                    end_time=now + timedelta(days=days, hours=1),
+                    meet_link="https://meet.example.com/bench",
+                )
+                for days in range(-5, 5)
+            ]
+        )
+
+    def _legacy(self):
+        now = timezone.now()
+        last_month = now - timedelta(days=30)
+        today = now.date()
+
+        stats = {
+            "total_students": Student.objects.count(),
+            "total_teachers": Teacher.objects.count(),
+            "total_parents": Parent.objects.count(),
+            "pending_fees": StudentFeePayment.objects.filter(status="PENDING").count(),
+            "attendance": {
+                status: Attendance.objects.filter(
+                    date__gte=last_month, status=status
+                ).count()
+                for status in ("present", "absent", "late")
+            },
+            "fee_collection": {
+                status.lower(): StudentFeePayment.objects.filter(status=status).count()
+                for status in ("PAID", "PENDING", "OVERDUE")
+            },
+            "upcoming_exams": Exam.objects.filter(start_time__gte=now).count(),
+        }
+
+        fee_stats = {
+            "total_expected": FeeStructure.objects.aggregate(total=Sum("amount"))[
+                "total"
+            ],
+            "total_collected": PaymentTransaction.objects.filter(
+                student_fee_payment__status="PAID", status="SUCCESS"
+            ).aggregate(total=Sum("amount_paid"))["total"],
+            "total_pending_amount": StudentFeePayment.objects.filter(
+                status="PENDING"
+            ).aggregate(total=Sum("total_amount"))["total"],
+            "upcoming_payments": list(
+                StudentFeePayment.objects.filter(status="PENDING", due_date__gte=now)
+                .values("fee_structure__fee_category__name", "total_amount", "due_date")
+                .order_by("due_date")[:3]
+            ),
+        }
+
+        attendance_overview = list(
+            AttendanceDailySummary.objects.filter(date=today)
+            .order_by()
+            .values("section__school_class__class_name")
+            .annotate(
+                present=Sum("present_count"),
+                absent=Sum("absent_count"),
+                late=Sum("late_count"),
+            )
+        )
+        return stats, fee_stats, attendance_overview
+
+    def _cold(self):
+        DashboardStatsService.invalidate()
+        return DashboardStatsService.get_dashboard()
+
+    def _warm(self):
+        return DashboardStatsService.get_dashboard()
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def run(self, modes=MODES):
+        results = []
+        with transaction.atomic():
+            self._setup()
+            for mode in modes:
+                # One untimed load, so "warm" starts from a filled cache.
+                getattr(self, f"_{mode}")()
+                timings = []
+                for _ in range(self.repeat):
+                    self.queries = 0
+                    with connection.execute_wrapper(self._count_query):
+                        started = time.perf_counter()
+                        getattr(self, f"_{mode}")()
+                        timings.append(time.perf_counter() - started)
+                results.append(
+                    {
+                        "mode": mode,
+                        "students": self.students,
+                        "seconds": statistics.median(timings),
+                        "queries": self.queries,
+                    }
+                )
+            transaction.set_rollback(True)
+        DashboardStatsService.invalidate()
+        return results
@@ -1,59 +1,226 @@
-from django.core.mail import EmailMultiAlternatives
+from datetime import timedelta
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.utils import timezone
+from learnera_app.email_templates import get_email_template
 from loguru import logger
-from django.utils.html import strip_tags
+
+from .models import EmailOutbox
 
 
 class EmailService:
+    BATCH_SIZE = 50
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = timedelta(minutes=1)
+    # How long a claimed email may take before another worker may claim it.
+    LEASE = timedelta(minutes=10)
+    WELCOME_SUBJECTS = {
+        "Student": "Welcome to Learnera - Your Student Account Details",
+        "Teacher": "Welcome to Learnera - Your Teacher Account Details",
+        "Parent": "Welcome to Learnera - Your Parent Account Details",
+    }
+
     @staticmethod
-    def send_email_sync(subject, html_message, recipient_list, reply_to=None):
-        plain_message = strip_tags(html_message)
+    def build_message(subject, body, recipient_list, html_message=None, reply_to=()):
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=list(recipient_list),
+            reply_to=list(reply_to),
+        )
+        if html_message:
+            email.attach_alternative(html_message, "text/html")
+        return email
 
-        try:
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=recipient_list,
-                reply_to=[reply_to] if reply_to else [],
+    @staticmethod
+    def queue_messages(messages):
+        """Queues already built messages, all in one insert on commit."""
+        rows = [
+            EmailOutbox(
+                subject=message.subject,
+                body=message.body,
+                html_body=next(
+                    (
+                        content
+                        for content, mimetype in message.alternatives
+                        if mimetype == "text/html"
+                    ),
+                    "",
+                ),
+                to=list(message.to),
+                reply_to=list(message.reply_to),
             )
+            for message in messages
+        ]
 
-            email.attach_alternative(html_message, "text/html")
-            email.send(False)
-            logger.debug(f"Email sent successfully to {', '.join(recipient_list)}")
-            return True
-        except Exception as e:
-            logger.debug(
-                f"Failed to send email to {', '.join(recipient_list)}: {str(e)}"
+        def enqueue():
+            EmailOutbox.objects.bulk_create(rows)
+            logger.debug(f"Queued {len(rows)} emails")
+
+        if rows:
+            transaction.on_commit(enqueue)
+
+    @staticmethod
+    def _claim(batch_size, now):
+        """
+        Marks up to ``batch_size`` due rows as "sending" in one short
+        transaction and returns them. SKIP LOCKED lets several workers claim
+        side by side, and the lease hands a row to another worker if this one
+        dies before recording the result.
+        """
+        with transaction.atomic():
+            EmailOutbox.objects.filter(
+                status=EmailOutbox.STATUS_SENDING,
+                next_attempt_at__lte=now,
+                attempts__gte=EmailService.MAX_ATTEMPTS,
+            ).update(
+                status=EmailOutbox.STATUS_FAILED,
+                last_error="The worker sending this email stopped",
+            )
+            rows = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING],
+                    next_attempt_at__lte=now,
+                )
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            for row in rows:
+                row.status = EmailOutbox.STATUS_SENDING
+                row.attempts += 1
+                row.next_attempt_at = now + EmailService.LEASE
+            EmailOutbox.objects.bulk_update(
+                rows, ["status", "attempts", "next_attempt_at"]
             )
-            return False
+        return rows
 
     @staticmethod
-    def send_welcome_email(user_type, email, username, set_password_link):
-        subject_mapping = {
-            "Student": "Welcome to Learnera - Your Student Account Details",
-            "Teacher": "Welcome to Learnera - Your Teacher Account Details",
-            "Parent": "Welcome to Learnera - Your Parent Account Details",
-        }
+    def _record(row, **fields):
+        EmailOutbox.objects.filter(id=row.id, status=EmailOutbox.STATUS_SENDING).update(
+            **fields
+        )
+        for field, value in fields.items():
+            setattr(row, field, value)
 
-        if user_type not in subject_mapping:
-            raise ValueError(f"Invalid user type: {user_type}")
+    @staticmethod
+    def _record_failure(row, error, now):
+        if row.attempts >= EmailService.MAX_ATTEMPTS:
+            logger.error(f"Giving up on email {row.id} to {', '.join(row.to)}: {error}")
+            EmailService._record(
+                row, status=EmailOutbox.STATUS_FAILED, last_error=str(error)
+            )
+            return
+        next_attempt_at = now + EmailService.RETRY_DELAY * (2 ** (row.attempts - 1))
+        logger.warning(
+            f"Email {row.id} failed (attempt {row.attempts}), retrying at {next_attempt_at}: {error}"
+        )
+        EmailService._record(
+            row,
+            status=EmailOutbox.STATUS_PENDING,
+            next_attempt_at=next_attempt_at,
+            last_error=str(error),
+        )
 
-        context = {
-            "username": username,
-            "user_type": user_type,
-            "app_name": "Learnera",
-            "set_password_link": set_password_link,
-        }
+    @staticmethod
+    def deliver_pending(batch_size=None):
+        """
+        Sends one batch of due outbox emails over a single connection and
+        returns the number sent. The rows are claimed first, the emails are
+        sent outside any transaction, and each result is saved as soon as
+        it is known, so a later failure never sends an earlier email again.
+        A failed email is retried with exponential backoff and given up
+        after MAX_ATTEMPTS.
+        """
+        batch_size = batch_size or EmailService.BATCH_SIZE
+        now = timezone.now()
+        rows = EmailService._claim(batch_size, now)
+        if not rows:
+            return 0
 
+        sent = 0
         try:
-            html_message = render_to_string("emails/welcome_email.html", context)
-            return EmailService.send_email_sync(
-                subject=subject_mapping[user_type],
-                html_message=html_message,
-                recipient_list=[email],
-            )
+            with get_connection(fail_silently=False) as connection:
+                for row in rows:
+                    message = EmailService.build_message(
+                        subject=row.subject,
+                        body=row.body,
+                        recipient_list=row.to,
+                        html_message=row.html_body,
+                        reply_to=row.reply_to,
+                    )
+                    try:
+                        # One message per call, so a rejected recipient does
+                        # not make us resend the ones before it.
+                        connection.send_messages([message])
+                    except Exception as e:
+                        EmailService._record_failure(row, e, now)
+                    else:
+                        EmailService._record(
+                            row,
+                            status=EmailOutbox.STATUS_SENT,
+                            sent_at=timezone.now(),
+                            last_error="",
+                        )
+                        sent += 1
         except Exception as e:
-            logger.debug(f"Failed to prepare welcome email for {email}: {str(e)}")
+            # The connection could not be opened or closed.
+            for row in rows:
+                if row.status == EmailOutbox.STATUS_SENDING:
+                    EmailService._record_failure(row, e, now)
             raise
+
+        logger.info(f"Sent {sent} of {len(rows)} queued emails")
+        return sent
+
+    @staticmethod
+    def build_welcome_emails(user_type, recipients):
+        """
+        Renders the welcome email for many new accounts of one type at once.
+        ``recipients`` is a list of dicts with ``email``, ``username`` and
+        ``set_password_link``; the result is a list of messages ready for
+        queue_messages or a connection's send_messages.
+        """
+        if user_type not in EmailService.WELCOME_SUBJECTS:
+            raise ValueError(f"Invalid user type: {user_type}")
+
+        template = get_email_template(
+            "emails/welcome_email.html",
+            fields=("username", "set_password_link"),
+            app_name="Learnera",
+            user_type=user_type,
+        )
+        messages = []
+        for recipient in recipients:
+            html_message, plain_message = template.render(
+                {
+                    "username": recipient["username"],
+                    "set_password_link": recipient["set_password_link"],
+                }
+            )
+            messages.append(
+                EmailService.build_message(
+                    subject=EmailService.WELCOME_SUBJECTS[user_type],
+                    body=plain_message,
+                    recipient_list=[recipient["email"]],
+                    html_message=html_message,
+                )
+            )
+        return messages
+
+    @staticmethod
+    def send_welcome_email(user_type, email, username, set_password_link):
+        EmailService.queue_messages(
+            EmailService.build_welcome_emails(
+                user_type,
+                [
+                    {
+                        "email": email,
+                        "username": username,
+                        "set_password_link": set_password_link,
+                    }
+                ],
+            )
+        )
+        return True
@@ -0,0 +1,339 @@
+"""
+Bulk student import from a CSV or XLSX upload.
+
+The file is read row by row and every row is checked before anything is
+written: field formats per row, then usernames, emails, phone numbers,
+sections, parents and section capacity for the whole file in a handful of
+queries. Only a file without errors is imported, with one bulk insert per
+table, one block of admission numbers and one roll number pass for all of
+the affected sections.
+"""
+
+import codecs
+import csv
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from learnera_app.cache import invalidate_model
+from parents.models import Parent, StudentParentRelationship
+from students.models import Student
+from teachers.models import AcademicYear, Section
+from loguru import logger  # type: ignore
+
+from .serializers import StudentImportRowSerializer
+from .services import AdmissionNumberService, DashboardStatsService, RollNumberService
+
+User = get_user_model()
+
+USER_FIELDS = (
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "emergency_contact_number",
+    "date_of_birth",
+    "gender",
+    "address",
+    "city",
+    "state",
+    "district",
+    "country",
+)
+
+
+def _column(name):
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store phone numbers and ids as floats.
+        value = int(value)
+    return str(value).strip()
+
+
+def _csv_rows(upload):
+    return csv.reader(codecs.iterdecode(upload, "utf-8-sig"))
+
+
+def _xlsx_rows(upload):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValidationError("XLSX imports need the openpyxl package.")
+
+    workbook = load_workbook(upload, read_only=True, data_only=True)
+    return workbook.active.iter_rows(values_only=True)
+
+
+def read_rows(upload):
+    """
+    Yields ``(row_number, row)`` for each non-empty line of the upload, with
+    the header row as keys and blank cells left out. Row numbers match the
+    spreadsheet, so the first data row is 2.
+    """
+    name = upload.name.lower()
+    if name.endswith(".csv"):
+        rows = _csv_rows(upload)
+    elif name.endswith(".xlsx"):
+        rows = _xlsx_rows(upload)
+    else:
+        raise ValidationError("Upload a .csv or .xlsx file.")
+
+    header = [_column(name) for name in next(iter(rows), [])]
+    if "username" not in header:
+        raise ValidationError("The first row must name the columns.")
+
+    for row_number, values in enumerate(rows, start=2):
+        row = {
+            column: value
+            for column, value in zip(header, map(_cell, values))
+            if column and value
+        }
+        if row:
+            yield row_number, row
+
+
+class StudentImportService:
+    MAX_ROWS = 5000
+
+    @staticmethod
+    def _flag_taken(rows, errors, field, lookup):
+        """
+        Adds an error to every row whose ``field`` repeats an earlier row or
+        matches an existing user.
+        """
+        values = [row[field] for _, row in rows if row.get(field)]
+        taken = set(
+            User.objects.filter(**{f"{field}__in": values}).values_list(
+                field, flat=True
+            )
+        )
+        seen = set()
+        for row_number, row in rows:
+            value = row.get(field)
+            if not value:
+                continue
+            if value in taken:
+                errors[row_number][field] = [f"A user with this {lookup} exists."]
+            elif value in seen:
+                errors[row_number][field] = [f"This {lookup} is repeated in the file."]
+            seen.add(value)
+
+    @staticmethod
+    def validate(upload):
+        """
+        Reads and checks the whole upload. Returns the valid rows with their
+        section and parent ids filled in, and ``{row_number: errors}``.
+        """
+        rows = []
+        errors = defaultdict(dict)
+        for row_number, data in read_rows(upload):
+            if len(rows) >= StudentImportService.MAX_ROWS:
+                raise ValidationError(
+                    f"Import at most {StudentImportService.MAX_ROWS} students at a time."
+                )
+            serializer = StudentImportRowSerializer(data=data)
+            if serializer.is_valid():
+                rows.append((row_number, dict(serializer.validated_data)))
+            else:
+                rows.append((row_number, {}))
+                errors[row_number].update(serializer.errors)
+
+        StudentImportService._flag_taken(rows, errors, "username", "username")
+        StudentImportService._flag_taken(rows, errors, "email", "email")
+        StudentImportService._flag_taken(rows, errors, "phone_number", "phone number")
+
+        section_ids = {
+            row["class_assigned"] for _, row in rows if "class_assigned" in row
+        }
+        class_names = {row["class_name"] for _, row in rows if "class_name" in row}
+        sections = Section.objects.filter(id__in=section_ids)
+        if class_names:
+            sections = sections | Section.objects.filter(
+                school_class__class_name__in=class_names
+            )
+        sections = list(sections.select_related("school_class"))
+        sections_by_id = {section.id: section for section in sections}
+        sections_by_name = {
+            (section.school_class.class_name, section.section_name): section
+            for section in sections
+        }
+
+        parent_columns = StudentImportRowSerializer.PARENT_COLUMNS
+        parent_usernames = {
+            row[column] for _, row in rows for column in parent_columns if column in row
+        }
+        parents = dict(
+            Parent.objects.filter(user__username__in=parent_usernames).values_list(
+                "user__username", "id"
+            )
+        )
+
+        added = Counter()
+        for row_number, row in rows:
+            if not row:
+                continue
+            if "class_assigned" in row:
+                section = sections_by_id.get(row["class_assigned"])
+            else:
+                section = sections_by_name.get((row["class_name"], row["section_name"]))
+            if section is None:
+                errors[row_number]["class_assigned"] = ["Section not found."]
+            else:
+                row["section"] = section
+                added[section.id] += 1
+                limit = section.student_count
+                if (
+                    limit is not None
+                    and (section.available_students or 0) + added[section.id] > limit
+                ):
+                    errors[row_number]["class_assigned"] = [
+                        f"Section {section} has reached its maximum student limit."
+                    ]
+
+            row["parents"] = []
+            for column, relationship_type in parent_columns.items():
+                if column not in row:
+                    continue
+                if row[column] not in parents:
+                    errors[row_number][column] = ["Parent not found."]
+                else:
+                    row["parents"].append((parents[row[column]], relationship_type))
+
+        return [(number, row) for number, row in rows if number not in errors], dict(
+            errors
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def create_students(rows):
+        """
+        Creates the students for rows returned by validate() and returns them
+        in row order, with their users loaded and roll numbers assigned.
+        """
+        academic_year = AcademicYear.objects.filter(is_active=True).first()
+        if academic_year is None:
+            raise ValidationError("There is no active academic year.")
+
+        per_section = Counter(row["section"].id for _, row in rows)
+        locked = Section.objects.select_for_update().in_bulk(per_section)
+        for section_id, count in per_section.items():
+            section = locked[section_id]
+            if (
+                section.student_count is not None
+                and (section.available_students or 0) + count > section.student_count
+            ):
+                raise ValidationError(
+                    f"Section {section_id} has reached its maximum student limit."
+                )
+
+        admission_numbers = AdmissionNumberService.reserve(len(rows))
+
+        # Students set their own password from the welcome email, so skip
+        # hashing a throwaway one for each of them.
+        unusable_password = make_password(None)
+        users = User.objects.bulk_create(
+            [
+                User(
+                    **{field: row[field] for field in USER_FIELDS if field in row},
+                    password=unusable_password,
+                    is_student=True,
+                )
+                for _, row in rows
+            ]
+        )
+        students = Student.objects.bulk_create(
+            [
+                Student(
+                    user=user,
+                    admission_number=admission_number,
+                    class_assigned_id=row["section"].id,
+                    academic_year=academic_year,
+                )
+                for user, admission_number, (_, row) in zip(
+                    users, admission_numbers, rows
+                )
+            ]
+        )
+        StudentParentRelationship.objects.bulk_create(
+            [
+                StudentParentRelationship(
+                    student=student,
+                    parent_id=parent_id,
+                    relationship_type=relationship_type,
+                )
+                for student, (_, row) in zip(students, rows)
+                for parent_id, relationship_type in row["parents"]
+            ]
+        )
+
+        for section_id, count in per_section.items():
+            Section.objects.filter(id=section_id).update(
+                available_students=Coalesce(F("available_students"), 0) + count
+            )
+        RollNumberService.reorder(per_section, academic_year.id)
+
+        roll_numbers = dict(
+            Student.objects.filter(
+                id__in=[student.id for student in students]
+            ).values_list("id", "roll_number")
+        )
+        for student in students:
+            student.roll_number = roll_numbers[student.id]
+
+        # Bulk writes skip the signals that keep these caches fresh.
+        transaction.on_commit(DashboardStatsService.invalidate)
+        transaction.on_commit(lambda: invalidate_model(User))
+        transaction.on_commit(lambda: invalidate_model(Section))
+
+        logger.info(
+            f"Imported {len(students)} students into {len(per_section)} sections"
+        )
+        return students
+
+    @staticmethod
+    def import_file(upload):
+        """
+        Validates the upload and, if every row is valid, imports it. Returns
+        ``(students, report)`` where ``students`` is empty when nothing was
+        imported and the report lists the errors per row.
+        """
+        rows, errors = StudentImportService.validate(upload)
+        report = {
+            "rows": len(rows) + len(errors),
+            "created": 0,
+            "errors": [
+                {"row": row_number, "errors": row_errors}
+                for row_number, row_errors in sorted(errors.items())
+            ],
+            "students": [],
+        }
+        if errors or not rows:
+            return [], report
+
+        students = StudentImportService.create_students(rows)
+        report["created"] = len(students)
+        report["students"] = [
+            {
+                "row": row_number,
+                "username": student.user.username,
+                "admission_number": student.admission_number,
+                "roll_number": student.roll_number,
+                "class_assigned": student.class_assigned_id,
+            }
+            for student, (row_number, _) in zip(students, rows)
+        ]
+        return students, report
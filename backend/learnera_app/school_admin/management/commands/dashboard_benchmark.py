@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from school_admin.benchmarks import DashboardBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Time building the admin dashboard for a few school sizes, the old "
+        "per-number queries against the cached payload. All data is rolled "
+        "back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            action="append",
+            dest="sizes",
+            help="Students in the school (can be repeated, default 20, 500, 5000).",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--mode",
+            choices=DashboardBenchmark.MODES,
+            action="append",
+            dest="modes",
+            help="Only run the given mode (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        for size in options["sizes"] or [20, 500, 5000]:
+            benchmark = DashboardBenchmark(size, repeat=options["repeat"])
+            for result in benchmark.run(options["modes"] or DashboardBenchmark.MODES):
+                self.stdout.write(
+                    f"{result['students']:>5} students, {result['mode']:>6}: "
+                    f"{result['seconds'] * 1000:.1f}ms, {result['queries']} queries"
+                )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from school_admin.benchmarks import RollNumberBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Time renumbering a section after one student is added, for a few "
+        "section sizes. All data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            action="append",
+            dest="sizes",
+            help="Students in the section (can be repeated, default 30, 300, 3000).",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--mode",
+            choices=RollNumberBenchmark.MODES,
+            action="append",
+            dest="modes",
+            help="Only run the given mode (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        for size in options["sizes"] or [30, 300, 3000]:
+            benchmark = RollNumberBenchmark(size, repeat=options["repeat"])
+            for result in benchmark.run(options["modes"] or RollNumberBenchmark.MODES):
+                self.stdout.write(
+                    f"{result['students']:>5} students, {result['mode']:>6}: "
+                    f"{result['seconds'] * 1000:.1f}ms, {result['queries']} queries"
+                )
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from loguru import logger  # type: ignore
+
+from school_admin.email import EmailService
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox, in batches over one connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=EmailService.BATCH_SIZE,
+            help="Emails sent per connection.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is drained.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            try:
+                sent = EmailService.deliver_pending(options["batch_size"])
+            except Exception as e:
+                # The mail server is unreachable; leave the batch for later.
+                if not options["loop"]:
+                    raise
+                logger.error(f"Email delivery failed: {str(e)}")
+                sent = 0
+            total += sent
+
+            if sent:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {total} queued emails."))
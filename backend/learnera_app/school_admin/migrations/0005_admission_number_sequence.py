@@ -0,0 +1,39 @@
+from django.db import migrations
+
+SEQUENCE = "school_admin_admission_number_seq"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school_admin", "0004_email_outbox"),
+        ("students", "0010_deferrable_roll_number_constraint"),
+    ]
+
+    operations = [
+        # Continue from the old AdmissionNumber counter, or from the highest
+        # number already handed out if that is larger.
+        migrations.RunSQL(
+            sql=f"""
+                CREATE SEQUENCE {SEQUENCE} MINVALUE 1;
+                SELECT setval(
+                    '{SEQUENCE}',
+                    GREATEST(
+                        200000,
+                        (
+                            SELECT max(value::bigint)
+                            FROM school_admin_admissionnumber
+                            WHERE key = 'admission_number'
+                        ),
+                        (SELECT max(admission_number) FROM students_student)
+                    )
+                );
+            """,
+            reverse_sql=f"""
+                UPDATE school_admin_admissionnumber
+                SET value = (SELECT last_value FROM {SEQUENCE})::text
+                WHERE key = 'admission_number';
+                DROP SEQUENCE {SEQUENCE};
+            """,
+        ),
+    ]
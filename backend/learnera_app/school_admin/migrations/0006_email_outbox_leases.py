@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school_admin", "0005_admission_number_sequence"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="emailoutbox",
+            name="email_outbox_pending_idx",
+        ),
+        migrations.AlterField(
+            model_name="emailoutbox",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="emailoutbox",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "sending"])),
+                fields=["next_attempt_at", "id"],
+                name="email_outbox_due_idx",
+            ),
+        ),
+    ]
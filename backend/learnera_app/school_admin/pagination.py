@@ -0,0 +1,69 @@
+import base64
+from datetime import date
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateIdKeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``(date DESC, id ASC)``. Each page continues from
+    the last row of the previous one instead of counting an OFFSET, so deep
+    pages cost the same as the first.
+    """
+
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        raw = f"{row.date.isoformat()}|{row.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw_date, raw_id = base64.urlsafe_b64decode(encoded).decode().split("|")
+            return date.fromisoformat(raw_date), int(raw_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            cursor_date, cursor_id = cursor
+            queryset = queryset.filter(
+                Q(date__lt=cursor_date) | Q(date=cursor_date, id__gt=cursor_id)
+            )
+
+        rows = list(queryset.order_by("-date", "id")[: page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = (
+            self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        )
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -18,6 +18,7 @@ from django.contrib.auth import authenticate
 from teachers.models import (
     AcademicYear,
     Attendance,
+    CalendarDay,
     SchoolClass,
     Section,
     Subject,
@@ -26,6 +27,7 @@ from teachers.models import (
     TeacherLeaveRequest,
 )
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 User = get_user_model()
 
@@ -182,6 +184,61 @@ class SchoolAdminStudentSerializers(serializers.ModelSerializer):
         return super().to_internal_value(data)
 
 
+class StudentImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk student import. Only checks the row itself; uniqueness,
+    sections and parents are checked for the whole file at once by
+    StudentImportService.
+    """
+
+    PARENT_COLUMNS = {
+        "father_username": "Father",
+        "mother_username": "Mother",
+        "guardian_username": "Guardian",
+    }
+
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    phone_number = serializers.CharField(
+        required=False,
+        validators=[RegexValidator(r"^\+?\d{10,15}$", "Enter a valid phone number.")],
+    )
+    emergency_contact_number = serializers.CharField(required=False, max_length=15)
+    date_of_birth = serializers.DateField(required=False)
+    gender = serializers.ChoiceField(choices=CustomUser.GENDER_CHOICES, required=False)
+    address = serializers.CharField(required=False)
+    city = serializers.CharField(required=False, max_length=100)
+    state = serializers.CharField(required=False, max_length=100)
+    district = serializers.CharField(required=False, max_length=100)
+    country = serializers.CharField(required=False, max_length=100)
+    class_assigned = serializers.IntegerField(required=False)
+    class_name = serializers.CharField(required=False)
+    section_name = serializers.CharField(required=False)
+    father_username = serializers.CharField(required=False)
+    mother_username = serializers.CharField(required=False)
+    guardian_username = serializers.CharField(required=False)
+
+    def validate_username(self, value):
+        if value.startswith("__") or value.startswith("  "):
+            raise serializers.ValidationError(
+                "Username cannot start with spaces or underscores."
+            )
+        return value
+
+    def validate(self, data):
+        if "class_assigned" not in data and not (
+            data.get("class_name") and data.get("section_name")
+        ):
+            raise serializers.ValidationError(
+                {
+                    "class_assigned": "Give a section id or both class_name and section_name."
+                }
+            )
+        return data
+
+
 class SectionSerializer(serializers.ModelSerializer):
     class_teacher_info = serializers.SerializerMethodField()
 
@@ -236,10 +293,13 @@ class StudentListSerializer(serializers.ModelSerializer):
         }
 
     def get_parents(self, obj):
-
-        relationships = StudentParentRelationship.objects.filter(
-            student=obj
-        ).select_related("parent__user")
+        # ShowStudentsView prefetches the relationships into
+        # ``parent_relationships``; other callers fall back to a query per row.
+        relationships = getattr(obj, "parent_relationships", None)
+        if relationships is None:
+            relationships = StudentParentRelationship.objects.filter(
+                student=obj
+            ).select_related("parent__user")
         return [
             {
                 "parent_name": f"{rel.parent.user.first_name} {rel.parent.user.last_name}",
@@ -757,6 +817,37 @@ class MonthlyStatisticsSerializer(serializers.Serializer):
     attendance_percentage = serializers.FloatField()
 
 
+class CalendarDaySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CalendarDay
+        fields = ["id", "date", "day_type", "description"]
+
+    def validate(self, data):
+        school_calendar = (
+            self.instance.calendar if self.instance else self.context["calendar"]
+        )
+        calendar_day = CalendarDay(
+            calendar=school_calendar,
+            date=data.get("date", getattr(self.instance, "date", None)),
+            day_type=data.get("day_type", getattr(self.instance, "day_type", None)),
+        )
+        try:
+            calendar_day.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+        duplicate = CalendarDay.objects.filter(
+            calendar=school_calendar, date=calendar_day.date
+        )
+        if self.instance:
+            duplicate = duplicate.exclude(pk=self.instance.pk)
+        if duplicate.exists():
+            raise serializers.ValidationError(
+                {"date": "This date is already on the calendar."}
+            )
+        return data
+
+
 # ----------------------------------------------------------------------------------
 
 
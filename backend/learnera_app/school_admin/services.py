@@ -1,143 +1,251 @@
-from django.db import transaction
+import time
+from datetime import timedelta
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from students.models import Student
+from parents.models import FeeStructure, PaymentTransaction, StudentFeePayment
+from teachers.models import AttendanceDailySummary, Exam, Section
 from loguru import logger  # type: ignore
 
+User = get_user_model()
+
 
 class RollNumberService:
+    # Ties on the name are broken by id so the order never flips between runs.
+    # The ranking is materialized once and the outer UPDATE is limited to the
+    # same sections, so even with stale planner statistics a nested loop join
+    # only compares the section's rows with the ranked rows and never runs
+    # the window again for each student.
+    REORDER_SQL = """
+        WITH ranked AS MATERIALIZED (
+            SELECT
+                s.id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY s.class_assigned_id
+                    ORDER BY u.first_name, u.last_name, s.id
+                ) AS position
+            FROM {student} AS s
+            JOIN {user} AS u ON u.id = s.user_id
+            WHERE s.class_assigned_id = ANY(%(sections)s)
+                AND s.academic_year_id = %(academic_year)s
+        )
+        UPDATE {student} AS student
+        SET roll_number = ranked.position
+        FROM ranked
+        WHERE student.id = ranked.id
+            AND student.class_assigned_id = ANY(%(sections)s)
+            AND student.academic_year_id = %(academic_year)s
+            AND student.roll_number IS DISTINCT FROM ranked.position
+    """
+
     @staticmethod
     @transaction.atomic
-    def assign_roll_number(student, section, academic_year):
+    def reorder(section_ids, academic_year_id):
         """
-        Assigns a roll number to a new student and reorders all students in the same section
-        and academic year based on their first and last names.
+        Numbers the students of each section 1..n by first and last name with
+        one UPDATE, and returns how many roll numbers changed. The section
+        rows are locked first so concurrent reorders of a section queue up
+        instead of numbering different snapshots.
         """
+        section_ids = sorted(set(section_ids))
+        if not section_ids:
+            return 0
         try:
-            logger.info(
-                f"Starting roll number assignment for student: {student.user.first_name} {student.user.last_name}"
+            list(
+                Section.objects.select_for_update()
+                .filter(id__in=section_ids)
+                .values_list("id", flat=True)
             )
-            logger.info(
-                f"Section ID: {section.id}, Academic Year ID: {academic_year.id}"
-            )
-
-            # Save the student if not already saved
-            if not student.pk:
-                logger.info(
-                    f"New student detected, saving first: {student.user.first_name}"
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    RollNumberService.REORDER_SQL.format(
+                        student=Student._meta.db_table, user=User._meta.db_table
+                    ),
+                    {"sections": section_ids, "academic_year": academic_year_id},
                 )
-                student.save()
+                updated = cursor.rowcount
+        except DatabaseError as e:
+            logger.error(f"Roll number reorder failed for {section_ids}: {str(e)}")
+            raise ValidationError(f"Failed to reorder roll numbers: {str(e)}")
 
-            # Get all students in the EXACT same section and academic year
-            students = list(
-                Student.objects.select_for_update()
-                .filter(class_assigned_id=section.id, academic_year_id=academic_year.id)
-                .order_by("user__first_name", "user__last_name")
-            )
+        logger.info(
+            f"Reordered roll numbers for sections {section_ids}, "
+            f"academic year {academic_year_id}: {updated} changed"
+        )
+        return updated
 
-            logger.info(
-                f"Found {len(students)} students in section {section.id} for academic year {academic_year.id}"
-            )
-
-            # logger.info current students for debugging
-            for s in students:
-                logger.info(
-                    f"Student ID: {s.id}, Name: {s.user.first_name} {s.user.last_name}, "
-                    + f"Section: {s.class_assigned.id}, Current Roll: {s.roll_number}"
-                )
+    @staticmethod
+    def assign_roll_number(student, section, academic_year):
+        """
+        Saves a new student if needed, renumbers its section by name and
+        returns the student's roll number.
+        """
+        if not student.pk:
+            student.save()
+        RollNumberService.reorder([section.id], academic_year.id)
+        student.refresh_from_db(fields=["roll_number"])
+        return student.roll_number
 
-            # Temporarily set all roll numbers in THIS section and THIS academic year to NULL to avoid conflicts
-            logger.info(
-                f"Temporarily setting roll numbers to NULL for section {section.id}, academic year {academic_year.id}"
-            )
-            Student.objects.filter(
-                class_assigned_id=section.id, academic_year_id=academic_year.id
-            ).update(roll_number=None)
-
-            # Re-query to get the students with NULL roll numbers
-            students = list(
-                Student.objects.select_for_update()
-                .filter(class_assigned_id=section.id, academic_year_id=academic_year.id)
-                .order_by("user__first_name", "user__last_name")
-            )
+    @staticmethod
+    def reorder_by_name(section, academic_year):
+        return RollNumberService.reorder([section.id], academic_year.id)
 
-            # Assign roll numbers based on alphabetical order
-            for index, s in enumerate(students, start=1):
-                s.roll_number = index
-                logger.info(
-                    f"Student: {s.user.first_name} {s.user.last_name} - New roll: {index}"
-                )
 
-            # Use bulk_update for better performance
-            logger.info("Performing bulk update of roll numbers")
-            Student.objects.bulk_update(students, ["roll_number"])
+class AdmissionNumberService:
+    """
+    Hands out admission numbers from a database sequence in consecutive
+    blocks. A reservation advances the sequence by the block size while
+    holding a session-level advisory lock keyed on the sequence, and releases
+    it straight after, so concurrent reservations never interleave and never
+    wait for each other's transaction to end. The sequence itself is not
+    transactional: a transaction that rolls back leaves its numbers unused.
+    """
 
-            # Refresh the student to get the updated roll number
-            student.refresh_from_db()
-            logger.info(
-                f"Final roll number assigned to {student.user.first_name}: {student.roll_number}"
-            )
+    SEQUENCE = "school_admin_admission_number_seq"
+    LOCK_SQL = "SELECT pg_advisory_lock(%s::regclass::oid::bigint)"
+    UNLOCK_SQL = "SELECT pg_advisory_unlock(%s::regclass::oid::bigint)"
+    ADVANCE_SQL = "SELECT setval(%(sequence)s, nextval(%(sequence)s) + %(count)s - 1)"
 
-            return student.roll_number
-
-        except Exception as e:
-            logger.info(f"ERROR in assign_roll_number: {str(e)}")
-            transaction.set_rollback(True)
-            raise ValidationError(f"Failed to assign roll number: {str(e)}")
+    @staticmethod
+    def reserve(count):
+        """Returns ``count`` new consecutive admission numbers."""
+        if count < 1:
+            return []
+        sequence = AdmissionNumberService.SEQUENCE
+        with connection.cursor() as cursor:
+            cursor.execute(AdmissionNumberService.LOCK_SQL, [sequence])
+            try:
+                # A savepoint inside a transaction, so that the unlock below
+                # can still run if advancing the sequence fails.
+                with transaction.atomic():
+                    cursor.execute(
+                        AdmissionNumberService.ADVANCE_SQL,
+                        {"sequence": sequence, "count": count},
+                    )
+                    last = cursor.fetchone()[0]
+            finally:
+                cursor.execute(AdmissionNumberService.UNLOCK_SQL, [sequence])
+        return list(range(last - count + 1, last + 1))
 
     @staticmethod
-    @transaction.atomic
-    def reorder_by_name(section, academic_year):
-        """
-        Reorders roll numbers for all students in the given section and academic year
-        based on the alphabetical order of their first and last names.
-        """
-        try:
-            logger.info(
-                f"Starting roll number reordering for section {section.id}, year {academic_year.id}"
-            )
+    def allocate():
+        return AdmissionNumberService.reserve(1)[0]
 
-            # Temporarily set all roll numbers in THIS section and THIS academic year to NULL
-            logger.info(
-                f"Temporarily setting roll numbers to NULL for section {section.id}, academic year {academic_year.id}"
-            )
-            Student.objects.filter(
-                class_assigned_id=section.id, academic_year_id=academic_year.id
-            ).update(roll_number=None)
-
-            # Get all students in the specific section and academic year
-            students = list(
-                Student.objects.select_for_update()
-                .filter(class_assigned_id=section.id, academic_year_id=academic_year.id)
-                .order_by("user__first_name", "user__last_name")
-            )
 
-            logger.info(f"Found {len(students)} students to reorder")
+class DashboardStatsService:
+    """
+    Builds the admin dashboard payload with one conditional-aggregate query per
+    table and keeps it in a versioned cache. Bumping the version (done by the
+    model signals in school_admin.signals) makes every cached payload stale at
+    once without having to know its key.
+    """
 
-            if not students:
-                logger.info("No students found for reordering")
-                return
+    CACHE_TIMEOUT = 60 * 5
+    VERSION_KEY = "dashboard:version"
 
-            # Debug logger.info all students
-            for s in students:
-                logger.info(
-                    f"Student ID: {s.id}, Name: {s.user.first_name} {s.user.last_name}, "
-                    + f"Section: {s.class_assigned.id}, Current Roll: {s.roll_number}"
-                )
+    @staticmethod
+    def _cache_key():
+        version = cache.get_or_set(
+            DashboardStatsService.VERSION_KEY, time.time_ns, timeout=None
+        )
+        return f"dashboard:v{version}:{timezone.localdate().isoformat()}"
 
-            # Reset and reassign roll numbers
-            for index, student in enumerate(students, start=1):
-                student.roll_number = index
-                logger.info(
-                    f"Student: {student.user.first_name} {student.user.last_name} - New roll: {index}"
-                )
+    @staticmethod
+    def invalidate():
+        try:
+            cache.incr(DashboardStatsService.VERSION_KEY)
+        except ValueError:
+            cache.set(DashboardStatsService.VERSION_KEY, time.time_ns(), timeout=None)
 
-            # Use bulk_update for better performance
-            logger.info("Performing bulk update of roll numbers")
-            Student.objects.bulk_update(students, ["roll_number"])
+    @staticmethod
+    def get_dashboard():
+        cache_key = DashboardStatsService._cache_key()
+        dashboard = cache.get(cache_key)
+        if dashboard is None:
+            dashboard = DashboardStatsService.build_dashboard()
+            cache.set(cache_key, dashboard, DashboardStatsService.CACHE_TIMEOUT)
+        return dashboard
 
-            logger.info(f"Successfully reordered {len(students)} students")
+    @staticmethod
+    def build_dashboard():
+        now = timezone.now()
+        # The same local day the cache key is built from.
+        today = timezone.localdate(now)
+
+        users = User.objects.aggregate(
+            total_students=Count("id", filter=Q(student__isnull=False)),
+            total_teachers=Count("id", filter=Q(teacher__isnull=False)),
+            total_parents=Count("id", filter=Q(parent__isnull=False)),
+        )
+        fees = StudentFeePayment.objects.aggregate(
+            paid=Count("id", filter=Q(status="PAID")),
+            pending=Count("id", filter=Q(status="PENDING")),
+            overdue=Count("id", filter=Q(status="OVERDUE")),
+            pending_amount=Sum("total_amount", filter=Q(status="PENDING")),
+        )
+        attendance = AttendanceDailySummary.objects.filter(
+            date__gte=today - timedelta(days=30)
+        ).aggregate(
+            present=Coalesce(Sum("present_count"), 0),
+            absent=Coalesce(Sum("absent_count"), 0),
+            late=Coalesce(Sum("late_count"), 0),
+        )
+
+        stats = {
+            **users,
+            "pending_fees": fees["pending"],
+            "attendance": attendance,
+            "fee_collection": {
+                "paid": fees["paid"],
+                "pending": fees["pending"],
+                "overdue": fees["overdue"],
+            },
+            "upcoming_exams": Exam.objects.filter(start_time__gte=now).count(),
+        }
+
+        upcoming_payments = (
+            StudentFeePayment.objects.filter(status="PENDING", due_date__gte=today)
+            .values("fee_structure__fee_category__name", "total_amount", "due_date")
+            .order_by("due_date")[:3]
+        )
+        fee_stats = {
+            "total_expected": FeeStructure.objects.aggregate(total=Sum("amount"))[
+                "total"
+            ]
+            or 0,
+            "total_collected": PaymentTransaction.objects.filter(
+                student_fee_payment__status="PAID", status="SUCCESS"
+            ).aggregate(total=Sum("amount_paid"))["total"]
+            or 0,
+            "total_pending_amount": fees["pending_amount"] or 0,
+            "upcoming_payments": [
+                {
+                    "category": payment["fee_structure__fee_category__name"],
+                    "amount": payment["total_amount"],
+                    "due_date": payment["due_date"],
+                }
+                for payment in upcoming_payments
+            ],
+        }
+
+        attendance_overview = list(
+            AttendanceDailySummary.objects.filter(date=today)
+            .order_by()
+            .values("section__school_class__class_name")
+            .annotate(
+                present=Sum("present_count"),
+                absent=Sum("absent_count"),
+                late=Sum("late_count"),
+            )
+        )
 
-        except Exception as e:
-            logger.info(f"ERROR in reorder_by_name: {str(e)}")
-            transaction.set_rollback(True)
-            raise ValidationError(f"Failed to reorder roll numbers: {str(e)}")
+        return {
+            "stats": stats,
+            "fee_stats": fee_stats,
+            "attendance_overview": attendance_overview,
+        }
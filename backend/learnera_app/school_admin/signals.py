@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from learnera_app.cache import connect_list_cache_invalidation, invalidate_model
+from parents.models import (
+    FeeCategory,
+    FeeStructure,
+    Parent,
+    PaymentTransaction,
+    StudentFeePayment,
+)
+from students.models import Student
+from teachers.models import (
+    Attendance,
+    AttendanceDailySummary,
+    Exam,
+    SchoolClass,
+    Section,
+    Subject,
+    Teacher,
+)
+
+from .services import DashboardStatsService
+
+# Every model whose rows feed a number on the admin dashboard. Attendance marked
+# in bulk skips Attendance signals, so its daily rollup is watched as well.
+DASHBOARD_MODELS = (
+    Student,
+    Teacher,
+    Parent,
+    Attendance,
+    AttendanceDailySummary,
+    StudentFeePayment,
+    FeeStructure,
+    PaymentTransaction,
+    Exam,
+)
+
+
+def invalidate_dashboard(sender, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(DashboardStatsService.invalidate)
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(
+        invalidate_dashboard,
+        sender=model,
+        dispatch_uid=f"dashboard_post_save_{model._meta.label_lower}",
+    )
+    post_delete.connect(
+        invalidate_dashboard,
+        sender=model,
+        dispatch_uid=f"dashboard_post_delete_{model._meta.label_lower}",
+    )
+
+
+# Models read by the CachedListMixin list views (subjects, classes with their
+# sections and class teachers, fee categories).
+connect_list_cache_invalidation(Subject, SchoolClass, Section, Teacher, FeeCategory)
+
+User = get_user_model()
+
+# The class list only shows a class teacher's name, so other user saves (the
+# last_login update on every sign-in, student and parent profiles) leave the
+# cached lists alone. Deleting a user deletes its Teacher row, which already
+# invalidates them.
+TEACHER_LIST_FIELDS = {"first_name", "last_name"}
+
+
+def invalidate_teacher_names(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.is_teacher:
+        return
+    if update_fields is not None and not TEACHER_LIST_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(lambda: invalidate_model(User))
+
+
+post_save.connect(
+    invalidate_teacher_names,
+    sender=User,
+    dispatch_uid="list_cache_post_save_teacher_names",
+)
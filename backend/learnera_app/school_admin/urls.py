@@ -29,6 +29,7 @@ router.register("get-student-parent", GetStudentParentViewSet)
 urlpatterns = [
     path("login/", SchoolAdminLoginView.as_view(), name="school_admin-login"),
     path("add_students/", CreateStudentView.as_view(), name="add-students"),
+    path("students/import/", BulkStudentImportView.as_view(), name="import-students"),
     path("list_class/", ClassListView.as_view(), name="list-class"),
     path("students/", ShowStudentsView.as_view(), name="show-students"),
     path("student_info/<int:pk>/", StudentDetailView.as_view(), name="student-info"),
@@ -88,6 +89,16 @@ urlpatterns = [
         AdminMonthlyStatisticsView.as_view(),
         name="admin-monthly-statistics",
     ),
+    path(
+        "school-calendar/days/",
+        SchoolCalendarDayListCreateView.as_view(),
+        name="school-calendar-days",
+    ),
+    path(
+        "school-calendar/days/<int:pk>/",
+        SchoolCalendarDayDetailView.as_view(),
+        name="school-calendar-day-detail",
+    ),
     path("school-classes/", AdminClassListView.as_view(), name="admin-classes"),
     path(
         "school-classes/<int:class_id>/sections/",
@@ -111,6 +122,11 @@ urlpatterns = [
         StudentFeePaymentListView.as_view(),
         name="student-fee-payment-list",
     ),
+    path(
+        "dashboard/summary/",
+        DashboardSummaryAPIView.as_view(),
+        name="dashboard-summary",
+    ),
     path("dashboard/stats/", DashboardStatsAPIView.as_view(), name="dashboard-stats"),
     path(
         "dashboard/recent-students/",
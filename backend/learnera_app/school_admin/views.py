@@ -1,5 +1,5 @@
+import csv
 import json
-import calendar
 from .serializers import *
 from decimal import Decimal
 from parents.models import *
@@ -7,20 +7,25 @@ from datetime import datetime
 from teachers.models import *
 from datetime import timedelta
 from .email import EmailService
-from django.http import Http404
-from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from django.core.cache import cache
 from students.models import Student
-from .models import AdmissionNumber
 from rest_framework import serializers
-from .services import RollNumberService
+from .imports import StudentImportService
+from .pagination import DateIdKeysetPagination
+from .services import (
+    AdmissionNumberService,
+    DashboardStatsService,
+    RollNumberService,
+)
+from learnera_app.cache import CachedListMixin
+from teachers.services import AttendanceSummaryService, SchoolCalendarService
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.utils.encoding import force_bytes
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from django.db.models.functions import TruncMonth
 from django.core.exceptions import ValidationError
 from django.utils.http import urlsafe_base64_encode
 from rest_framework.exceptions import PermissionDenied
@@ -31,7 +36,8 @@ from django.contrib.auth.tokens import default_token_generator
 from parents.serializers import ExamSerializer, StudentSerializer
 from rest_framework import permissions, status, viewsets, generics
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import Sum, Count, Case, When, F, DecimalField, Count, Q, Sum
+from django.db.models import Sum, Count, Case, When, F, DecimalField, Count, Sum
+from django.db.models import Prefetch
 from loguru import logger
 
 
@@ -97,12 +103,7 @@ class CreateStudentView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            admission_number_obj, _ = AdmissionNumber.objects.get_or_create(
-                key="admission_number", defaults={"value": "200000"}
-            )
-            admission_number = int(admission_number_obj.value) + 1
-            admission_number_obj.value = str(admission_number)
-            admission_number_obj.save()
+            admission_number = AdmissionNumberService.allocate()
 
             user_data = json.loads(request.data.get("user", "{}"))
             profile_image = request.FILES.get("profile_image")
@@ -163,9 +164,6 @@ class CreateStudentView(APIView):
                 RollNumberService.assign_roll_number(
                     student, student.class_assigned, student.academic_year
                 )
-                RollNumberService.reorder_by_name(
-                    student.class_assigned, student.academic_year
-                )
                 logger.info("Roll number assigned for student %s", student.id)
             except Exception as e:
                 logger.error("Roll number assignment failed: %s", str(e))
@@ -209,6 +207,56 @@ class CreateStudentView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BulkStudentImportView(APIView):
+    """
+    Creates many students from one CSV or XLSX upload. Nothing is imported
+    unless every row is valid; the response lists the errors per row.
+    """
+
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [permissions.IsAdminUser]
+
+    @transaction.atomic
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response(
+                {"error": "Upload a CSV or XLSX file as 'file'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            students, report = StudentImportService.import_file(upload)
+        except ValidationError as e:
+            return Response(
+                {"error": " ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        except IntegrityError as e:
+            logger.warning("Student import conflicted with another change: %s", e)
+            return Response(
+                {"error": "Some users were created meanwhile, upload the file again."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if not students:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+
+        EmailService.queue_messages(
+            EmailService.build_welcome_emails(
+                "Student",
+                [
+                    {
+                        "email": student.user.email,
+                        "username": student.user.username,
+                        "set_password_link": set_password_link(student.user),
+                    }
+                    for student in students
+                ],
+            )
+        )
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
 class ClassListView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
@@ -245,7 +293,15 @@ class ShowStudentsView(generics.ListAPIView):
     permission_classes = [permissions.IsAdminUser]
     queryset = Student.objects.select_related(
         "user", "class_assigned", "class_assigned__school_class"
-    ).all()
+    ).prefetch_related(
+        Prefetch(
+            "studentparentrelationship_set",
+            queryset=StudentParentRelationship.objects.select_related(
+                "parent__user"
+            ).order_by("id"),
+            to_attr="parent_relationships",
+        )
+    )
     serializer_class = StudentListSerializer
 
 
@@ -475,7 +531,8 @@ class CreateSchoolClassViewSet(viewsets.ModelViewSet):
         )
 
 
-class SchoolClassListView(generics.ListAPIView):
+class SchoolClassListView(CachedListMixin, generics.ListAPIView):
+    cache_models = (SchoolClass, Section, Teacher, User)
     queryset = SchoolClass.objects.all().prefetch_related(
         "sections", "sections__class_teacher", "sections__class_teacher__user"
     )
@@ -812,7 +869,8 @@ class GetStudentParentViewSet(viewsets.ModelViewSet):
 # Teacher management
 
 
-class SubjectListView(generics.ListCreateAPIView):
+class SubjectListView(CachedListMixin, generics.ListCreateAPIView):
+    cache_models = (Subject,)
     queryset = Subject.objects.all()
     permission_classes = [permissions.IsAdminUser]
     serializer_class = SubjectSerializer
@@ -1005,9 +1063,76 @@ class TeacherBlockUnblockView(APIView):
 
 
 class AdminAttendanceView(generics.ListAPIView):
+    """
+    Attendance history as keyset pages (``?cursor=``, ``?page_size=``).
+    ``?export=ndjson`` or ``?export=csv`` streams every matching row instead.
+
+    Rows are ordered by date, newest first, and then by id, which is the
+    order attendance was marked in. Before keyset pagination the rows of one
+    day were ordered by roll number.
+    """
+
     serializer_class = AttendanceHistorySerializer
     permission_classes = [permissions.IsAdminUser]
-    pagination_class = None
+    pagination_class = DateIdKeysetPagination
+    export_chunk_size = 2000
+    csv_header = [
+        "id",
+        "date",
+        "student_name",
+        "roll_number",
+        "class_name",
+        "section_name",
+        "status",
+    ]
+
+    def list(self, request, *args, **kwargs):
+        export = request.query_params.get("export")
+        if export == "ndjson":
+            return self.stream_ndjson()
+        if export == "csv":
+            return self.stream_csv()
+        if export:
+            return Response(
+                {"error": "export must be 'ndjson' or 'csv'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return super().list(request, *args, **kwargs)
+
+    def export_rows(self):
+        # The same serializer as the pages, applied one row at a time.
+        serializer = self.get_serializer()
+        rows = self.filter_queryset(self.get_queryset()).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        for row in rows:
+            yield serializer.to_representation(row)
+
+    def stream_ndjson(self):
+        lines = (json.dumps(row) + "\n" for row in self.export_rows())
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+    def stream_csv(self):
+        writer = csv.writer(EchoBuffer())
+
+        def lines():
+            yield writer.writerow(self.csv_header)
+            for row in self.export_rows():
+                yield writer.writerow(
+                    [
+                        row["id"],
+                        row["date"],
+                        row["student_name"],
+                        row["roll_number"],
+                        row["section"]["school_class"]["class_name"],
+                        row["section"]["section_name"],
+                        row["status"],
+                    ]
+                )
+
+        response = StreamingHttpResponse(lines(), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="attendance.csv"'
+        return response
 
     def get_queryset(self):
         class_id = self.request.query_params.get("class_id")
@@ -1023,7 +1148,7 @@ class AdminAttendanceView(generics.ListAPIView):
                 "student__user",
                 "section__school_class",
             )
-            .order_by("-date", "student__roll_number")
+            .order_by("-date", "id")
         )
 
         if class_id:
@@ -1048,6 +1173,13 @@ class AdminAttendanceView(generics.ListAPIView):
         return queryset
 
 
+class EchoBuffer:
+    """File-like object handing each line written by csv.writer straight back."""
+
+    def write(self, value):
+        return value
+
+
 class AdminMonthlyStatisticsView(generics.ListAPIView):
     serializer_class = MonthlyStatisticsSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -1060,48 +1192,43 @@ class AdminMonthlyStatisticsView(generics.ListAPIView):
         month = self.request.query_params.get("month")
         weekday = self.request.query_params.get("weekday")
 
-        query = Attendance.objects.all()
+        weekday = weekday if weekday != "all" else None
+        academic_year = None
+        section_filters = {}
 
         if class_id:
-            query = query.filter(section__school_class_id=class_id)
+            section_filters["section__school_class_id"] = class_id
             total_students = Student.objects.filter(
                 class_assigned__school_class_id=class_id
             ).count()
 
         if section_id:
-            query = query.filter(section_id=section_id)
+            section_filters["section_id"] = section_id
+            academic_year = (
+                Section.objects.filter(id=section_id)
+                .values_list("academic_year_id", flat=True)
+                .first()
+            )
             total_students = Student.objects.filter(
                 class_assigned_id=section_id
             ).count()
         else:
             total_students = Student.objects.all().count()
 
-        if year and year != "all":
-            query = query.filter(date__year=int(year))
-
-        if month and month != "all":
-            query = query.filter(date__month=int(month))
-
-        if weekday and weekday != "all":
-            weekday_map = {"1": 2, "2": 3, "3": 4, "4": 5, "5": 6, "6": 7, "7": 1}
-            query = query.filter(date__week_day=weekday_map[weekday])
-
-        monthly_stats = (
-            query.annotate(month=TruncMonth("date"))
-            .values("month")
-            .annotate(
-                present_count=Count("id", filter=Q(status="present")),
-                absent_count=Count("id", filter=Q(status="absent")),
-                late_count=Count("id", filter=Q(status="late")),
-            )
-            .order_by("month")
+        monthly_stats = AttendanceSummaryService.monthly_statistics(
+            year=year if year != "all" else None,
+            month=month if month != "all" else None,
+            weekday=weekday,
+            **section_filters,
         )
 
         for stat in monthly_stats:
             stat["total_students"] = total_students
             month = stat["month"].month
             year = stat["month"].year
-            working_days = self.get_working_days(year, month, weekday)
+            working_days = SchoolCalendarService.working_days(
+                year, month, weekday, academic_year=academic_year
+            )
 
             if working_days > 0:
                 expected_attendance = working_days * total_students
@@ -1114,34 +1241,47 @@ class AdminMonthlyStatisticsView(generics.ListAPIView):
 
         return monthly_stats
 
-    def get_working_days(self, year, month, weekday=None):
-        total_days = calendar.monthrange(year, month)[1]
-        working_days = 0
 
-        for day in range(1, total_days + 1):
-            date = datetime(year, month, day)
-            if weekday:
-                if str(date.isoweekday()) == weekday:
-                    working_days += 1
-            elif date.weekday() < 5:  # Monday to Friday
-                working_days += 1
+class SchoolCalendarDayListCreateView(generics.ListCreateAPIView):
+    serializer_class = CalendarDaySerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = None
+
+    def get_calendar(self):
+        academic_year = AcademicYear.objects.filter(is_active=True).first()
+        if not academic_year:
+            raise serializers.ValidationError("No active academic year found.")
+        school_calendar, _ = SchoolCalendar.objects.get_or_create(
+            academic_year=academic_year
+        )
+        return school_calendar
+
+    def get_queryset(self):
+        return CalendarDay.objects.filter(calendar__academic_year__is_active=True)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method == "POST":
+            context["calendar"] = self.get_calendar()
+        return context
+
+    def perform_create(self, serializer):
+        serializer.save(calendar=serializer.context["calendar"])
+
 
-        return working_days
+class SchoolCalendarDayDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = CalendarDaySerializer
+    permission_classes = [permissions.IsAdminUser]
+    queryset = CalendarDay.objects.select_related("calendar__academic_year")
 
 
-class AdminClassListView(generics.ListAPIView):
+class AdminClassListView(CachedListMixin, generics.ListAPIView):
+    cache_models = (SchoolClass,)
+    queryset = SchoolClass.objects.all()
     permission_classes = [permissions.IsAdminUser]
     pagination_class = None
     serializer_class = AttendanceSchoolClassSerializer
 
-    def get_queryset(self):
-        cache_key = "school_classes"
-        queryset = cache.get(cache_key)
-        if queryset is None:
-            queryset = SchoolClass.objects.all()
-            cache.set(cache_key, queryset, timeout=3600)
-        return queryset
-
 
 class AdminSectionListView(generics.ListAPIView):
     serializer_class = AttendanceSectionSerializer
@@ -1158,7 +1298,8 @@ class AdminSectionListView(generics.ListAPIView):
 # Payment integration
 
 
-class FeeCategoryListCreateView(generics.ListCreateAPIView):
+class FeeCategoryListCreateView(CachedListMixin, generics.ListCreateAPIView):
+    cache_models = (FeeCategory,)
     queryset = FeeCategory.objects.all()
     serializer_class = FeeCategorySerializer
     permission_classes = [permissions.IsAdminUser]
@@ -1289,43 +1430,18 @@ class StudentFeePaymentListView(generics.ListAPIView):
 
 
 # Admin Dashboard
-class DashboardStatsAPIView(APIView):
+class DashboardSummaryAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        # Get current date and last month
-        today = timezone.now()
-        last_month = today - timedelta(days=30)
-
-        # Basic statistics
-        stats = {
-            "total_students": Student.objects.count(),
-            "total_teachers": Teacher.objects.count(),
-            "total_parents": Parent.objects.count(),
-            "pending_fees": StudentFeePayment.objects.filter(status="PENDING").count(),
-            # Attendance overview for last month
-            "attendance": {
-                "present": Attendance.objects.filter(
-                    date__gte=last_month, status="present"
-                ).count(),
-                "absent": Attendance.objects.filter(
-                    date__gte=last_month, status="absent"
-                ).count(),
-                "late": Attendance.objects.filter(
-                    date__gte=last_month, status="late"
-                ).count(),
-            },
-            # Fee collection stats
-            "fee_collection": {
-                "paid": StudentFeePayment.objects.filter(status="PAID").count(),
-                "pending": StudentFeePayment.objects.filter(status="PENDING").count(),
-                "overdue": StudentFeePayment.objects.filter(status="OVERDUE").count(),
-            },
-            # Upcoming exams
-            "upcoming_exams": Exam.objects.filter(start_time__gte=today).count(),
-        }
+        return Response(DashboardStatsService.get_dashboard())
+
+
+class DashboardStatsAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
 
-        return Response(stats)
+    def get(self, request):
+        return Response(DashboardStatsService.get_dashboard()["stats"])
 
 
 class RecentStudentsAPIView(generics.ListAPIView):
@@ -1341,53 +1457,7 @@ class FeeStatsAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        # Total expected fee from FeeStructure
-        total_expected = (
-            FeeStructure.objects.aggregate(total=Sum("amount"))["total"] or 0
-        )
-
-        # Total collected fee: sum the amount_paid from PaymentTransaction where the linked fee payment is PAID and transaction is SUCCESS
-        total_collected = (
-            PaymentTransaction.objects.filter(
-                student_fee_payment__status="PAID", status="SUCCESS"
-            ).aggregate(total=Sum("amount_paid"))["total"]
-            or 0
-        )
-
-        # Total pending fee: sum the total_amount from StudentFeePayment where status is PENDING
-        total_pending_amount = (
-            StudentFeePayment.objects.filter(status="PENDING").aggregate(
-                total=Sum("total_amount")
-            )["total"]
-            or 0
-        )
-
-        upcoming_payments_qs = (
-            StudentFeePayment.objects.filter(
-                status="PENDING", due_date__gte=timezone.now()
-            )
-            .select_related("fee_structure__fee_category")
-            .values("fee_structure__fee_category__name", "total_amount", "due_date")
-            .order_by("due_date")[:3]
-        )
-
-        upcoming_payments = [
-            {
-                "category": payment["fee_structure__fee_category__name"],
-                "amount": payment["total_amount"],
-                "due_date": payment["due_date"],
-            }
-            for payment in upcoming_payments_qs
-        ]
-
-        fee_stats = {
-            "total_expected": total_expected,
-            "total_collected": total_collected,
-            "total_pending_amount": total_pending_amount,
-            "upcoming_payments": upcoming_payments,
-        }
-
-        return Response(fee_stats)
+        return Response(DashboardStatsService.get_dashboard()["fee_stats"])
 
 
 class RecentTeachersAPIView(generics.ListAPIView):
@@ -1426,20 +1496,7 @@ class AttendanceOverviewAPIView(APIView):
     pagination_class = None
 
     def get(self, request):
-        today = timezone.now().date()
-
-        # Get attendance by class
-        class_attendance = (
-            Attendance.objects.filter(date=today)
-            .values("section__school_class__class_name")
-            .annotate(
-                present=Count("id", filter=Q(status="present")),
-                absent=Count("id", filter=Q(status="absent")),
-                late=Count("id", filter=Q(status="late")),
-            )
-        )
-
-        return Response(class_attendance)
+        return Response(DashboardStatsService.get_dashboard()["attendance_overview"])
 
 
 # =-----------------------------------------------------
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:05
+
+import django.db.models.constraints
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0009_studentleaverequest"),
+        ("teachers", "0029_attendance_date_id_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="student",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="student",
+            constraint=models.UniqueConstraint(
+                deferrable=django.db.models.constraints.Deferrable["IMMEDIATE"],
+                fields=("roll_number", "class_assigned", "academic_year"),
+                name="student_unique_roll_number",
+            ),
+        ),
+    ]
@@ -16,7 +16,22 @@ class Student(models.Model):
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, default=1)
 
     class Meta:
-        unique_together = ("roll_number", "class_assigned", "academic_year")
+        constraints = [
+            # Deferrable so RollNumberService can renumber a section in one
+            # UPDATE: the check then runs once at the end of the statement
+            # instead of after every row. This relies on Postgres, where a
+            # DEFERRABLE INITIALLY IMMEDIATE constraint is checked per
+            # statement; other backends either ignore `deferrable` or check
+            # each row, and the renumbering UPDATE would then fail. Postgres
+            # also cannot use a deferrable constraint as an ON CONFLICT
+            # arbiter, so never upsert students on these columns (for
+            # example bulk_create(update_conflicts=True)).
+            models.UniqueConstraint(
+                fields=["roll_number", "class_assigned", "academic_year"],
+                name="student_unique_roll_number",
+                deferrable=models.Deferrable.IMMEDIATE,
+            ),
+        ]
         ordering = ["roll_number"]
 
     def __str__(self):
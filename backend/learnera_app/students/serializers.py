@@ -27,22 +27,29 @@ class StudentAssignmentListSerializer(serializers.ModelSerializer):
             "grade",
         ]
 
+    def _student_submissions(self, obj):
+        # StudentAssignmentListView prefetches the requesting student's
+        # submissions into ``student_submission_list``.
+        submissions = getattr(obj, "student_submission_list", None)
+        if submissions is None:
+            student = self.context["request"].user.student
+            submissions = list(
+                obj.assignment_submissions.filter(student=student).order_by("id")
+            )
+        return submissions
+
     def get_is_submitted(self, obj):
-        student = self.context["request"].user.student
-        return obj.assignment_submissions.filter(
-            student=student, is_submitted=True
-        ).exists()
+        return any(
+            submission.is_submitted for submission in self._student_submissions(obj)
+        )
 
     def get_submission_id(self, obj):
-        student = self.context["request"].user.student
-        submission = obj.assignment_submissions.filter(student=student).first()
-
-        return submission.id if submission else None
+        submissions = self._student_submissions(obj)
+        return submissions[0].id if submissions else None
 
     def get_grade(self, obj):
-        student = self.context["request"].user.student
-        submission = obj.assignment_submissions.filter(student=student).first()
-        return submission.grade if submission else None
+        submissions = self._student_submissions(obj)
+        return submissions[0].grade if submissions else None
 
 
 class AssignmentSubmissionSerializer(serializers.ModelSerializer):
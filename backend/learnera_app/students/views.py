@@ -1,9 +1,12 @@
 from datetime import timedelta
-from django.http import Http404
+from django.http import Http404, HttpResponse
+from django.db import transaction
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import PermissionDenied
 from .models import Student, StudentLeaveRequest
+from teachers.services import ExamPaperService
+from learnera_app.utils import to_int
 from teachers.serializers import (
     ExamSerializer,
     StudentAnswerSerializer,
@@ -32,7 +35,7 @@ from .serializers import (
     StudentLeaveRequestSerializer,
 )
 from django.db.models import Avg
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Prefetch, Q
 
 from django.db.models.functions import ExtractMonth
 from loguru import logger
@@ -52,7 +55,15 @@ class StudentAssignmentListView(generics.ListAPIView):
                 class_section=student.class_assigned, is_active=True, status="published"
             )
             .select_related("subject", "class_section", "class_section__school_class")
-            .prefetch_related("assignment_submissions")
+            .prefetch_related(
+                Prefetch(
+                    "assignment_submissions",
+                    queryset=AssignmentSubmission.objects.filter(
+                        student=student
+                    ).order_by("id"),
+                    to_attr="student_submission_list",
+                )
+            )
             .order_by("-created_date")
         )
 
@@ -122,21 +133,20 @@ class StudentExamListView(generics.ListAPIView):
             ).order_by("-created_at")
 
 
-class StudentExamPreparationView(generics.RetrieveAPIView):
-    serializer_class = ExamSerializer
+class StudentExamPreparationView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = None
 
-    def get_object(self):
-        if hasattr(self.request.user, "student"):
-            student = self.request.user.student
-            exam_id = self.kwargs["exam_id"]
-            try:
-                return Exam.objects.get(
-                    class_section=student.class_assigned, id=exam_id
-                )
-            except Exam.DoesNotExist:
-                raise Http404("Exam not found")
+    def get(self, request, exam_id):
+        if not hasattr(request.user, "student"):
+            raise Http404("Exam not found")
+        try:
+            paper = ExamPaperService.get_paper(exam_id)
+        except Exam.DoesNotExist:
+            raise Http404("Exam not found")
+        if paper["class_section_id"] != request.user.student.class_assigned_id:
+            raise Http404("Exam not found")
+        # The paper is cached already rendered, so it is sent as is.
+        return HttpResponse(paper["content"], content_type="application/json")
 
 
 class StartExamView(APIView):
@@ -149,10 +159,28 @@ class StartExamView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        exam = get_object_or_404(Exam, id=exam_id)
         student = request.user.student
+        now = timezone.now()
 
-        if student.class_assigned != exam.class_section:
+        # Fast path: the row was created when the exam was published, so
+        # starting it is a single conditional UPDATE.
+        started = StudentExam.objects.filter(
+            student=student,
+            exam_id=exam_id,
+            status="NOT_STARTED",
+            exam__class_section_id=student.class_assigned_id,
+            exam__start_time__lte=now,
+            exam__end_time__gte=now,
+        ).update(status="IN_PROGRESS", start_time=now)
+        if started:
+            student_exam = StudentExam.objects.select_related("exam").get(
+                student=student, exam_id=exam_id
+            )
+            return Response(StudentExamSerializer(student_exam).data)
+
+        exam = get_object_or_404(Exam, id=exam_id)
+
+        if student.class_assigned_id != exam.class_section_id:
             return Response(
                 {"error": "You are not authorized to take this exam."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -197,12 +225,13 @@ class SubmitExamView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        student = request.user.student
-        exam = get_object_or_404(Exam, id=exam_id)
-
-        try:
-            student_exam = StudentExam.objects.get(exam=exam, student=student)
-        except StudentExam.DoesNotExist:
+        student_exam = (
+            StudentExam.objects.select_related("exam")
+            .filter(exam_id=exam_id, student=request.user.student)
+            .first()
+        )
+        if student_exam is None:
+            get_object_or_404(Exam, id=exam_id)
             return Response(
                 {"error": "You haven't started this exam yet."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -226,32 +255,81 @@ class SubmitExamView(APIView):
                 status=status.HTTP_200_OK,
             )
 
-        # Delete existing answers before creating new ones
-        student_exam.student_answers.all().delete()
+        answers, errors = self.build_answers(
+            student_exam, request.data.get("answers", [])
+        )
+        if errors:
+            return Response(
+                {"error": "Some answers are invalid.", "details": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            # Replace any answers saved earlier with the submitted set
+            student_exam.student_answers.all().delete()
+            StudentAnswer.objects.bulk_create(answers)
+
+            student_exam.status = "SUBMITTED"
+            student_exam.submit_time = timezone.now()
+            student_exam.save(update_fields=["status", "submit_time"])
+
+        serializer = StudentExamSerializer(student_exam)
+        return Response(serializer.data)
 
-        # Process new answers
-        answer_data = request.data.get("answers", [])
+    def build_answers(self, student_exam, answer_data):
+        """
+        Validates the submitted answers against the exam's questions and choices,
+        loaded in one query each, and returns unsaved StudentAnswer rows. MCQ
+        answers are scored here so teachers only have essays left to evaluate.
+        """
+        questions = {
+            question.id: question
+            for question in Question.objects.filter(exam_id=student_exam.exam_id)
+        }
+        choices = {
+            choice.id: choice
+            for choice in MCQChoice.objects.filter(
+                question__exam_id=student_exam.exam_id
+            )
+        }
+
+        answers = {}
+        errors = []
         for answer in answer_data:
-            question = get_object_or_404(Question, id=answer["question"])
-            answer_data = {"question": question, "student_exam": student_exam}
+            question = questions.get(to_int(answer.get("question")))
+            if question is None:
+                errors.append(
+                    {"question": answer.get("question"), "error": "Invalid question."}
+                )
+                continue
 
+            student_answer = StudentAnswer(student_exam=student_exam, question=question)
             if question.question_type == "MCQ":
                 selected_choice_id = answer.get("selected_choice")
                 if selected_choice_id:
-                    answer_data["selected_choice"] = get_object_or_404(
-                        MCQChoice, id=selected_choice_id, question=question
-                    )
+                    choice = choices.get(to_int(selected_choice_id))
+                    if choice is None or choice.question_id != question.id:
+                        errors.append(
+                            {
+                                "question": question.id,
+                                "error": "Selected choice does not belong to this question.",
+                            }
+                        )
+                        continue
+                    student_answer.selected_choice = choice
+                student_answer.marks_obtained = (
+                    question.marks
+                    if student_answer.selected_choice
+                    and student_answer.selected_choice.is_correct
+                    else 0
+                )
             else:
-                answer_data["answer_text"] = answer.get("answer_text", "")
-
-            StudentAnswer.objects.create(**answer_data)
+                student_answer.answer_text = answer.get("answer_text", "")
 
-        student_exam.status = "SUBMITTED"
-        student_exam.submit_time = timezone.now()
-        student_exam.save()
+            # A question answered twice keeps its last answer
+            answers[question.id] = student_answer
 
-        serializer = StudentExamSerializer(student_exam)
-        return Response(serializer.data)
+        return list(answers.values()), errors
 
 
 class StudentAnswerCreateView(generics.CreateAPIView):
@@ -2,10 +2,12 @@ from django.contrib import admin
 from .models import (
     AcademicYear,
     Attendance,
+    CalendarDay,
     Exam,
     StudentAnswer,
     StudentExam,
     Subject,
+    SchoolCalendar,
     SchoolClass,
     Teacher,
     Section,
@@ -21,3 +23,5 @@ admin.site.register(AcademicYear)
 admin.site.register(Attendance)
 admin.site.register(StudentExam)
 admin.site.register(StudentAnswer)
+admin.site.register(SchoolCalendar)
+admin.site.register(CalendarDay)
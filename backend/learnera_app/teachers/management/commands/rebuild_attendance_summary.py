@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from teachers.services import AttendanceSummaryService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and monthly attendance summaries from Attendance rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--section",
+            type=int,
+            action="append",
+            dest="sections",
+            help="Only rebuild the given section id (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        daily, monthly = AttendanceSummaryService.rebuild(options["sections"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {daily} daily and {monthly} monthly attendance summaries."
+            )
+        )
@@ -0,0 +1,120 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0009_studentleaverequest"),
+        ("teachers", "0026_teacherleaverequest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("present_count", models.PositiveIntegerField(default=0)),
+                ("absent_count", models.PositiveIntegerField(default=0)),
+                ("late_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AttendanceMonthlySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "month",
+                    models.DateField(help_text="First day of the summarised month"),
+                ),
+                ("present_count", models.PositiveIntegerField(default=0)),
+                ("absent_count", models.PositiveIntegerField(default=0)),
+                ("late_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["month"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["section", "date"], name="teachers_at_section_d09169_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="attendancedailysummary",
+            name="academic_year",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attendance_daily_summaries",
+                to="teachers.academicyear",
+            ),
+        ),
+        migrations.AddField(
+            model_name="attendancedailysummary",
+            name="section",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attendance_daily_summaries",
+                to="teachers.section",
+            ),
+        ),
+        migrations.AddField(
+            model_name="attendancemonthlysummary",
+            name="academic_year",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attendance_monthly_summaries",
+                to="teachers.academicyear",
+            ),
+        ),
+        migrations.AddField(
+            model_name="attendancemonthlysummary",
+            name="section",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attendance_monthly_summaries",
+                to="teachers.section",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendancedailysummary",
+            index=models.Index(fields=["date"], name="teachers_at_date_a2a832_idx"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="attendancedailysummary",
+            unique_together={("section", "academic_year", "date")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="attendancemonthlysummary",
+            unique_together={("section", "month")},
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teachers", "0027_attendance_summaries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SchoolCalendar",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="calendar",
+                        to="teachers.academicyear",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CalendarDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "day_type",
+                    models.CharField(
+                        choices=[
+                            ("HOLIDAY", "Holiday"),
+                            ("WORKING_SATURDAY", "Working Saturday"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("description", models.CharField(blank=True, max_length=200)),
+                (
+                    "calendar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="days",
+                        to="teachers.schoolcalendar",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "unique_together": {("calendar", "date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="WorkingDayIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(help_text="First day of the indexed month")),
+                ("working_days", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "weekday_counts",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Working days per ISO weekday, keyed '1'..'7'",
+                    ),
+                ),
+                (
+                    "calendar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="working_day_index",
+                        to="teachers.schoolcalendar",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["month"],
+                "unique_together": {("calendar", "month")},
+            },
+        ),
+    ]
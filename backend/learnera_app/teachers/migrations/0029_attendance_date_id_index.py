@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0009_studentleaverequest"),
+        ("teachers", "0028_school_calendar"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(fields=["-date", "id"], name="attendance_date_id_idx"),
+        ),
+    ]
@@ -26,6 +26,62 @@ class AcademicYear(models.Model):
         return self.name
 
 
+class SchoolCalendar(models.Model):
+    academic_year = models.OneToOneField(
+        AcademicYear, on_delete=models.CASCADE, related_name="calendar"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Calendar {self.academic_year}"
+
+
+class CalendarDay(models.Model):
+    DAY_TYPE_CHOICES = [
+        ("HOLIDAY", "Holiday"),
+        ("WORKING_SATURDAY", "Working Saturday"),
+    ]
+
+    calendar = models.ForeignKey(
+        SchoolCalendar, on_delete=models.CASCADE, related_name="days"
+    )
+    date = models.DateField()
+    day_type = models.CharField(max_length=20, choices=DAY_TYPE_CHOICES)
+    description = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        unique_together = ["calendar", "date"]
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} - {self.get_day_type_display()}"
+
+    def clean(self):
+        academic_year = self.calendar.academic_year
+        if not academic_year.start_date <= self.date <= academic_year.end_date:
+            raise ValidationError("Date must fall within the academic year")
+        if self.day_type == "WORKING_SATURDAY" and self.date.isoweekday() != 6:
+            raise ValidationError("Working Saturday must be a Saturday")
+
+
+class WorkingDayIndex(models.Model):
+    calendar = models.ForeignKey(
+        SchoolCalendar, on_delete=models.CASCADE, related_name="working_day_index"
+    )
+    month = models.DateField(help_text="First day of the indexed month")
+    working_days = models.PositiveSmallIntegerField(default=0)
+    weekday_counts = models.JSONField(
+        default=dict, help_text="Working days per ISO weekday, keyed '1'..'7'"
+    )
+
+    class Meta:
+        unique_together = ["calendar", "month"]
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"{self.calendar} - {self.month:%Y-%m}: {self.working_days}"
+
+
 class SchoolClass(models.Model):
     class_name = models.CharField(max_length=50, null=True, blank=True)
 
@@ -124,11 +180,67 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ["student", "date", "section"]
         ordering = ["-date", "student__roll_number"]
+        indexes = [
+            models.Index(fields=["section", "date"]),
+            # Matches the (date DESC, id) keyset used by the attendance history.
+            models.Index(fields=["-date", "id"], name="attendance_date_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student.user.first_name} - {self.date} - {self.status}"
 
 
+class AttendanceDailySummary(models.Model):
+    section = models.ForeignKey(
+        Section, on_delete=models.CASCADE, related_name="attendance_daily_summaries"
+    )
+    academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        related_name="attendance_daily_summaries",
+        null=True,
+        blank=True,
+    )
+    date = models.DateField()
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["section", "academic_year", "date"]
+        ordering = ["-date"]
+        indexes = [models.Index(fields=["date"])]
+
+    def __str__(self):
+        return f"{self.section} - {self.date}"
+
+
+class AttendanceMonthlySummary(models.Model):
+    section = models.ForeignKey(
+        Section, on_delete=models.CASCADE, related_name="attendance_monthly_summaries"
+    )
+    academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        related_name="attendance_monthly_summaries",
+        null=True,
+        blank=True,
+    )
+    month = models.DateField(help_text="First day of the summarised month")
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["section", "month"]
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"{self.section} - {self.month:%Y-%m}"
+
+
 class Assignment(models.Model):
     STATUS_CHOICES = [("published", "Published"), ("closed", "Closed")]
     title = models.CharField(max_length=250)
@@ -384,6 +384,33 @@ class ExamSerializer(serializers.ModelSerializer):  # This is taken
         return data
 
 
+class ExamPaperChoiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MCQChoice
+        fields = ["id", "choice_text"]
+
+
+class ExamPaperQuestionSerializer(serializers.ModelSerializer):
+    choices = ExamPaperChoiceSerializer(
+        many=True, source="choice_questions", read_only=True
+    )
+
+    class Meta:
+        model = Question
+        fields = ["id", "question_text", "question_type", "marks", "order", "choices"]
+
+
+class ExamPaperSerializer(ExamSerializer):
+    """The exam as students see it: ExamSerializer without the correct answers."""
+
+    question = ExamPaperQuestionSerializer(
+        many=True, source="exam_questions", read_only=True
+    )
+
+    def get_total_questions(self, obj):
+        return len(obj.exam_questions.all())
+
+
 class StudentAnswerSerializer(serializers.ModelSerializer):  # This is taken
     class Meta:
         model = StudentAnswer
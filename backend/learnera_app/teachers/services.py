@@ -0,0 +1,561 @@
+import calendar
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from learnera_app.utils import to_int
+from loguru import logger  # type: ignore
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DecimalField
+from rest_framework.renderers import JSONRenderer
+
+from .models import (
+    Attendance,
+    AttendanceDailySummary,
+    AttendanceMonthlySummary,
+    Exam,
+    StudentAnswer,
+    StudentExam,
+    WorkingDayIndex,
+)
+from .serializers import ExamPaperSerializer
+
+
+class AttendanceSummaryService:
+    """
+    Keeps the per-day and per-month attendance rollups in step with the raw
+    Attendance rows so the statistics views never have to scan Attendance.
+    """
+
+    STATUS_FIELDS = {
+        "present": "present_count",
+        "absent": "absent_count",
+        "late": "late_count",
+    }
+
+    @staticmethod
+    def _status_counts(queryset):
+        return queryset.annotate(
+            present_count=Count("id", filter=Q(status="present")),
+            absent_count=Count("id", filter=Q(status="absent")),
+            late_count=Count("id", filter=Q(status="late")),
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def record_day(section, date, statuses):
+        """
+        Stores the summary for a freshly marked day from the statuses that were
+        just inserted, without reading the Attendance rows back.
+        """
+        counts = Counter(statuses)
+        defaults = {
+            field: counts.get(status, 0)
+            for status, field in AttendanceSummaryService.STATUS_FIELDS.items()
+        }
+        AttendanceDailySummary.objects.update_or_create(
+            section_id=section.id,
+            academic_year_id=section.academic_year_id,
+            date=date,
+            defaults=defaults,
+        )
+        AttendanceSummaryService.refresh_month(section.id, date)
+
+    @staticmethod
+    @transaction.atomic
+    def refresh_day(section_id, date):
+        """
+        Recomputes the daily summary of one section from its Attendance rows.
+        Used when individual attendance records are edited or deleted.
+        """
+        day_rows = AttendanceSummaryService._status_counts(
+            Attendance.objects.filter(section_id=section_id, date=date)
+            .order_by()
+            .values("academic_year_id")
+        )
+
+        academic_year_ids = []
+        for row in day_rows:
+            academic_year_ids.append(row["academic_year_id"])
+            AttendanceDailySummary.objects.update_or_create(
+                section_id=section_id,
+                academic_year_id=row["academic_year_id"],
+                date=date,
+                defaults={
+                    "present_count": row["present_count"],
+                    "absent_count": row["absent_count"],
+                    "late_count": row["late_count"],
+                },
+            )
+
+        stale = AttendanceDailySummary.objects.filter(section_id=section_id, date=date)
+        for academic_year_id in academic_year_ids:
+            stale = stale.exclude(academic_year_id=academic_year_id)
+        stale.delete()
+
+        AttendanceSummaryService.refresh_month(section_id, date)
+
+    @staticmethod
+    @transaction.atomic
+    def refresh_month(section_id, date):
+        month = date.replace(day=1)
+        totals = AttendanceDailySummary.objects.filter(
+            section_id=section_id, date__year=month.year, date__month=month.month
+        ).aggregate(
+            days=Count("id"),
+            latest_academic_year=Max("academic_year_id"),
+            total_present=Sum("present_count"),
+            total_absent=Sum("absent_count"),
+            total_late=Sum("late_count"),
+        )
+
+        if not totals["days"]:
+            AttendanceMonthlySummary.objects.filter(
+                section_id=section_id, month=month
+            ).delete()
+            return
+
+        AttendanceMonthlySummary.objects.update_or_create(
+            section_id=section_id,
+            month=month,
+            defaults={
+                "academic_year_id": totals["latest_academic_year"],
+                "present_count": totals["total_present"],
+                "absent_count": totals["total_absent"],
+                "late_count": totals["total_late"],
+            },
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(section_ids=None):
+        """
+        Drops and recreates both rollup tables from the raw Attendance rows.
+        Returns the number of daily and monthly summaries written.
+        """
+        attendance = Attendance.objects.all()
+        daily = AttendanceDailySummary.objects.all()
+        monthly = AttendanceMonthlySummary.objects.all()
+        if section_ids:
+            attendance = attendance.filter(section_id__in=section_ids)
+            daily = daily.filter(section_id__in=section_ids)
+            monthly = monthly.filter(section_id__in=section_ids)
+
+        daily.delete()
+        monthly.delete()
+
+        day_rows = AttendanceSummaryService._status_counts(
+            attendance.order_by().values("section_id", "academic_year_id", "date")
+        )
+        daily_summaries = AttendanceDailySummary.objects.bulk_create(
+            [AttendanceDailySummary(**row) for row in day_rows.iterator()],
+            batch_size=1000,
+        )
+
+        month_rows = (
+            daily.annotate(month=TruncMonth("date"))
+            .order_by()
+            .values("section_id", "month")
+            .annotate(
+                latest_academic_year=Max("academic_year_id"),
+                total_present=Sum("present_count"),
+                total_absent=Sum("absent_count"),
+                total_late=Sum("late_count"),
+            )
+        )
+        monthly_summaries = AttendanceMonthlySummary.objects.bulk_create(
+            [
+                AttendanceMonthlySummary(
+                    section_id=row["section_id"],
+                    academic_year_id=row["latest_academic_year"],
+                    month=row["month"],
+                    present_count=row["total_present"],
+                    absent_count=row["total_absent"],
+                    late_count=row["total_late"],
+                )
+                for row in month_rows.iterator()
+            ],
+            batch_size=1000,
+        )
+
+        logger.info(
+            f"Rebuilt {len(daily_summaries)} daily and "
+            f"{len(monthly_summaries)} monthly attendance summaries"
+        )
+        return len(daily_summaries), len(monthly_summaries)
+
+    @staticmethod
+    def monthly_statistics(year=None, month=None, weekday=None, **section_filters):
+        """
+        Per-month present/absent/late totals read from the rollup tables.
+        ``weekday`` is an ISO weekday string ("1" = Monday ... "7" = Sunday); when
+        it is given the daily rollup is used, otherwise the monthly one.
+        """
+        if weekday:
+            queryset = AttendanceDailySummary.objects.filter(
+                date__week_day=int(weekday) % 7 + 1, **section_filters
+            )
+            if year:
+                queryset = queryset.filter(date__year=int(year))
+            if month:
+                queryset = queryset.filter(date__month=int(month))
+            queryset = queryset.annotate(period=TruncMonth("date"))
+        else:
+            queryset = AttendanceMonthlySummary.objects.filter(**section_filters)
+            if year:
+                queryset = queryset.filter(month__year=int(year))
+            if month:
+                queryset = queryset.filter(month__month=int(month))
+            queryset = queryset.annotate(period=F("month"))
+
+        rows = (
+            queryset.order_by()
+            .values("period")
+            .annotate(
+                total_present=Sum("present_count"),
+                total_absent=Sum("absent_count"),
+                total_late=Sum("late_count"),
+            )
+            .order_by("period")
+        )
+        return [
+            {
+                "month": row["period"],
+                "present_count": row["total_present"],
+                "absent_count": row["total_absent"],
+                "late_count": row["total_late"],
+            }
+            for row in rows
+        ]
+
+
+class SchoolCalendarService:
+    """
+    Single source of working-day counts for attendance percentages. Counts come
+    from the precomputed WorkingDayIndex of the academic year's SchoolCalendar
+    and fall back to a plain Monday-Friday week for months no calendar covers.
+    """
+
+    CACHE_TIMEOUT = 60 * 60 * 24
+    WEEKDAYS = [str(weekday) for weekday in range(1, 8)]
+
+    @staticmethod
+    def _cache_key(academic_year_id, year, month):
+        return f"working_days:{academic_year_id or 'any'}:{year}-{month:02d}"
+
+    @staticmethod
+    def default_month(year, month):
+        """Monday-Friday counts for a month, computed without walking its days."""
+        first_weekday, total_days = calendar.monthrange(year, month)
+        weekday_counts = {}
+        for weekday in range(1, 8):
+            offset = (weekday - 1 - first_weekday) % 7
+            count = (total_days - 1 - offset) // 7 + 1 if offset < total_days else 0
+            weekday_counts[str(weekday)] = count if weekday <= 5 else 0
+        return {
+            "working_days": sum(weekday_counts.values()),
+            "weekday_counts": weekday_counts,
+        }
+
+    @staticmethod
+    def month_entry(year, month, academic_year=None):
+        year, month = int(year), int(month)
+        academic_year_id = getattr(academic_year, "id", academic_year)
+        cache_key = SchoolCalendarService._cache_key(academic_year_id, year, month)
+
+        entry = cache.get(cache_key)
+        if entry is None:
+            index = WorkingDayIndex.objects.filter(month=date(year, month, 1))
+            if academic_year_id:
+                index = index.filter(calendar__academic_year_id=academic_year_id)
+            else:
+                index = index.order_by(
+                    "-calendar__academic_year__is_active",
+                    "-calendar__academic_year__start_date",
+                )
+            entry = index.values(
+                "working_days", "weekday_counts"
+            ).first() or SchoolCalendarService.default_month(year, month)
+            cache.set(cache_key, entry, SchoolCalendarService.CACHE_TIMEOUT)
+        return entry
+
+    @staticmethod
+    def working_days(year, month, weekday=None, academic_year=None):
+        """
+        Working days in the month, or only those falling on the ISO ``weekday``
+        ("1" = Monday ... "7" = Sunday) when one is given.
+        """
+        entry = SchoolCalendarService.month_entry(year, month, academic_year)
+        if weekday:
+            return entry["weekday_counts"].get(str(weekday), 0)
+        return entry["working_days"]
+
+    @staticmethod
+    def invalidate(academic_year):
+        keys = []
+        month = academic_year.start_date.replace(day=1)
+        while month <= academic_year.end_date:
+            keys.append(
+                SchoolCalendarService._cache_key(
+                    academic_year.id, month.year, month.month
+                )
+            )
+            keys.append(SchoolCalendarService._cache_key(None, month.year, month.month))
+            month = (month + timedelta(days=32)).replace(day=1)
+        cache.delete_many(keys)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild_index(school_calendar):
+        """
+        Recomputes the per-month working-day index of one academic year. Runs
+        whenever the calendar or one of its holidays changes.
+        """
+        academic_year = school_calendar.academic_year
+        overrides = dict(school_calendar.days.values_list("date", "day_type"))
+
+        months = {}
+        day = academic_year.start_date
+        while day <= academic_year.end_date:
+            weekday = day.isoweekday()
+            day_type = overrides.get(day)
+            if day_type == "HOLIDAY":
+                is_working = False
+            elif day_type == "WORKING_SATURDAY":
+                is_working = True
+            else:
+                is_working = weekday <= 5
+
+            counts = months.setdefault(
+                day.replace(day=1),
+                {key: 0 for key in SchoolCalendarService.WEEKDAYS},
+            )
+            if is_working:
+                counts[str(weekday)] += 1
+            day += timedelta(days=1)
+
+        WorkingDayIndex.objects.filter(calendar=school_calendar).delete()
+        WorkingDayIndex.objects.bulk_create(
+            [
+                WorkingDayIndex(
+                    calendar=school_calendar,
+                    month=month,
+                    working_days=sum(counts.values()),
+                    weekday_counts=counts,
+                )
+                for month, counts in months.items()
+            ]
+        )
+        transaction.on_commit(lambda: SchoolCalendarService.invalidate(academic_year))
+        logger.info(
+            f"Rebuilt working-day index for {academic_year} ({len(months)} months)"
+        )
+
+
+class ExamPaperService:
+    """
+    Prepares an exam for the rush of students opening it at the same moment:
+    every student of the section gets a StudentExam row up front, and the exam
+    paper is rendered once into a cached JSON document without the answers.
+    """
+
+    ACTIVE_STATUSES = ("PUBLISHED", "ONGOING")
+    MIN_CACHE_TIMEOUT = 60 * 5
+
+    @staticmethod
+    def _cache_key(exam_id):
+        return f"exam_paper:{exam_id}"
+
+    @staticmethod
+    def ensure_student_exams(exam):
+        if not exam.class_section_id:
+            return 0
+        student_ids = list(exam.class_section.students.values_list("id", flat=True))
+        StudentExam.objects.bulk_create(
+            [
+                StudentExam(student_id=student_id, exam=exam, status="NOT_STARTED")
+                for student_id in student_ids
+            ],
+            ignore_conflicts=True,
+        )
+        return len(student_ids)
+
+    @staticmethod
+    def render_paper(exam_id):
+        exam = (
+            Exam.objects.select_related("subject", "class_section__school_class")
+            .prefetch_related("exam_questions__choice_questions")
+            .get(id=exam_id)
+        )
+        paper = {
+            "class_section_id": exam.class_section_id,
+            "content": JSONRenderer().render(ExamPaperSerializer(exam).data),
+        }
+        timeout = max(
+            (exam.end_time - timezone.now()).total_seconds(),
+            ExamPaperService.MIN_CACHE_TIMEOUT,
+        )
+        cache.set(ExamPaperService._cache_key(exam_id), paper, int(timeout))
+        return paper
+
+    @staticmethod
+    def get_paper(exam_id):
+        """
+        Returns ``{"class_section_id", "content"}`` where ``content`` is the
+        rendered JSON of the paper, rendering it on a cache miss. Raises
+        Exam.DoesNotExist for unknown exams.
+        """
+        paper = cache.get(ExamPaperService._cache_key(exam_id))
+        if paper is None:
+            paper = ExamPaperService.render_paper(exam_id)
+        return paper
+
+    @staticmethod
+    def invalidate_paper(exam_id):
+        cache.delete(ExamPaperService._cache_key(exam_id))
+
+    @staticmethod
+    def prewarm(exam):
+        students = ExamPaperService.ensure_student_exams(exam)
+        ExamPaperService.render_paper(exam.id)
+        logger.info(f"Pre-warmed exam {exam.id} for {students} students")
+
+
+class ExamEvaluationService:
+    """
+    Grades any number of submitted StudentExams with a fixed number of queries:
+    answers are validated in memory against Question.marks, written with one
+    bulk_update, and every exam total comes from a single aggregate.
+    """
+
+    EVALUABLE_STATUSES = ("SUBMITTED", "EVALUATED")
+    NOT_EVALUABLE = "No submitted answers found for evaluation"
+
+    @staticmethod
+    def _parse_marks(marks):
+        """
+        Validates marks like the old EvaluationSerializer did, with the
+        max_digits and decimal_places of StudentAnswer.marks_obtained. Raises
+        ValidationError for text that is not a number, for NaN and infinity,
+        and for too many digits. Blank marks count as zero, as the evaluation
+        screen sends empty inputs for answers the teacher has not touched.
+        """
+        if marks is None or marks == "":
+            return Decimal("0")
+        model_field = StudentAnswer._meta.get_field("marks_obtained")
+        return DecimalField(
+            max_digits=model_field.max_digits,
+            decimal_places=model_field.decimal_places,
+        ).to_internal_value(marks)
+
+    @staticmethod
+    @transaction.atomic
+    def evaluate(teacher, evaluations):
+        """
+        ``evaluations`` maps StudentExam ids to lists of
+        ``{"id", "marks_obtained", "evaluation_comment"}`` answer dicts.
+        Returns ``(student_exams, answers, errors)``; nothing is written when
+        ``errors`` is not empty.
+        """
+        student_exams = {
+            student_exam.id: student_exam
+            for student_exam in StudentExam.objects.select_for_update().filter(
+                id__in=evaluations.keys(),
+                exam__teacher=teacher,
+                status__in=ExamEvaluationService.EVALUABLE_STATUSES,
+            )
+        }
+        stored_answers = {
+            answer.id: answer
+            for answer in StudentAnswer.objects.filter(
+                student_exam_id__in=student_exams.keys()
+            ).select_related("question")
+        }
+
+        errors = []
+        updated_answers = []
+        for student_exam_id, answers_data in evaluations.items():
+            if student_exam_id not in student_exams:
+                errors.append(
+                    {
+                        "student_exam": student_exam_id,
+                        "detail": ExamEvaluationService.NOT_EVALUABLE,
+                    }
+                )
+                continue
+
+            for answer_data in answers_data:
+                answer = stored_answers.get(to_int(answer_data.get("id")))
+                if answer is None or answer.student_exam_id != student_exam_id:
+                    errors.append(
+                        {
+                            "student_exam": student_exam_id,
+                            "detail": f"Invalid answer ID: {answer_data.get('id')}",
+                        }
+                    )
+                    continue
+
+                try:
+                    marks = ExamEvaluationService._parse_marks(
+                        answer_data.get("marks_obtained")
+                    )
+                except ValidationError as e:
+                    errors.append(
+                        {
+                            "student_exam": student_exam_id,
+                            "answer": answer.id,
+                            "detail": f"Invalid marks: {e.detail[0]}",
+                        }
+                    )
+                    continue
+                if marks < 0:
+                    errors.append(
+                        {
+                            "student_exam": student_exam_id,
+                            "answer": answer.id,
+                            "detail": "Marks cannot be negative",
+                        }
+                    )
+                    continue
+                if marks > answer.question.marks:
+                    errors.append(
+                        {
+                            "student_exam": student_exam_id,
+                            "answer": answer.id,
+                            "detail": f"Marks cannot exceed maximum marks: {answer.question.marks}",
+                        }
+                    )
+                    continue
+
+                answer.marks_obtained = marks
+                if "evaluation_comment" in answer_data:
+                    answer.evaluation_comment = answer_data["evaluation_comment"]
+                answer.evaluated_by = teacher
+                updated_answers.append(answer)
+
+        if errors:
+            return [], [], errors
+
+        StudentAnswer.objects.bulk_update(
+            updated_answers, ["marks_obtained", "evaluation_comment", "evaluated_by"]
+        )
+
+        totals = dict(
+            StudentAnswer.objects.filter(student_exam_id__in=student_exams.keys())
+            .order_by()
+            .values("student_exam_id")
+            .annotate(total=Sum("marks_obtained"))
+            .values_list("student_exam_id", "total")
+        )
+        for student_exam in student_exams.values():
+            student_exam.status = "EVALUATED"
+            student_exam.total_score = totals.get(student_exam.id) or Decimal("0")
+        StudentExam.objects.bulk_update(
+            student_exams.values(), ["status", "total_score"]
+        )
+
+        return list(student_exams.values()), updated_answers, []
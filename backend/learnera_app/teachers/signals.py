@@ -0,0 +1,134 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    AcademicYear,
+    Attendance,
+    CalendarDay,
+    Exam,
+    MCQChoice,
+    Question,
+    SchoolCalendar,
+)
+from .services import (
+    AttendanceSummaryService,
+    ExamPaperService,
+    SchoolCalendarService,
+)
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_day(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._previous_day = (
+        Attendance.objects.filter(pk=instance.pk)
+        .values_list("section_id", "date")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def refresh_summary_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    AttendanceSummaryService.refresh_day(instance.section_id, instance.date)
+
+    previous_day = getattr(instance, "_previous_day", None)
+    if previous_day and previous_day != (instance.section_id, instance.date):
+        AttendanceSummaryService.refresh_day(*previous_day)
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_summary_on_delete(sender, instance, **kwargs):
+    AttendanceSummaryService.refresh_day(instance.section_id, instance.date)
+
+
+@receiver(post_save, sender=SchoolCalendar)
+def index_calendar_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    SchoolCalendarService.rebuild_index(instance)
+
+
+@receiver(post_delete, sender=SchoolCalendar)
+def invalidate_calendar_on_delete(sender, instance, **kwargs):
+    SchoolCalendarService.invalidate(instance.academic_year)
+
+
+@receiver(post_save, sender=CalendarDay)
+def index_calendar_on_day_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    SchoolCalendarService.rebuild_index(instance.calendar)
+
+
+@receiver(post_delete, sender=CalendarDay)
+def index_calendar_on_day_delete(sender, instance, origin=None, **kwargs):
+    # Skip cascades from the calendar itself; its index goes with it.
+    if getattr(origin, "model", type(origin)) is not CalendarDay:
+        return
+    SchoolCalendarService.rebuild_index(instance.calendar)
+
+
+@receiver(post_save, sender=AcademicYear)
+def index_calendar_on_year_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    school_calendar = SchoolCalendar.objects.filter(academic_year=instance).first()
+    if school_calendar:
+        SchoolCalendarService.rebuild_index(school_calendar)
+
+
+@receiver(pre_save, sender=Exam)
+def remember_exam_status(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._previous_status = (
+        Exam.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Exam)
+def prewarm_exam_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: ExamPaperService.invalidate_paper(instance.id))
+
+    # New exams have no questions yet and other edits leave the students'
+    # rows alone, so only a status change that opens the exam prewarms it.
+    previous_status = getattr(instance, "_previous_status", None)
+    if (
+        not created
+        and previous_status != instance.status
+        and instance.status in ExamPaperService.ACTIVE_STATUSES
+    ):
+        transaction.on_commit(lambda: ExamPaperService.prewarm(instance))
+
+
+@receiver(post_delete, sender=Exam)
+def drop_exam_paper_on_delete(sender, instance, **kwargs):
+    ExamPaperService.invalidate_paper(instance.id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def drop_exam_paper_on_question_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: ExamPaperService.invalidate_paper(instance.exam_id))
+
+
+@receiver(post_save, sender=MCQChoice)
+@receiver(post_delete, sender=MCQChoice)
+def drop_exam_paper_on_choice_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    exam_id = (
+        Question.objects.filter(id=instance.question_id)
+        .values_list("exam_id", flat=True)
+        .first()
+    )
+    if exam_id:
+        transaction.on_commit(lambda: ExamPaperService.invalidate_paper(exam_id))
@@ -7,6 +7,7 @@ from .views import (
     AssignmentRetrieveUpdateDestroyView,
     AssignmentSubmissionListView,
     ClassListView,
+    BatchEvaluateExamView,
     EvaluateExamView,
     MarkAttendance,
     QuestionDetailView,
@@ -79,6 +80,11 @@ urlpatterns = [
     ),
     path("questions/<int:pk>/", QuestionDetailView.as_view(), name="question-details"),
     path("evaluate/<int:pk>/", EvaluateExamView.as_view(), name="evaluate-answer"),
+    path(
+        "evaluate/batch/",
+        BatchEvaluateExamView.as_view(),
+        name="evaluate-answers-batch",
+    ),
     path(
         "exams/<int:exam_id>/student-submissions/",
         TeacherExamSubmissionsView.as_view(),
@@ -1,7 +1,5 @@
-import calendar
-from django.db.models import Count, Avg, Sum
-from datetime import datetime, timedelta
-from decimal import Decimal
+from django.db.models import Avg, Sum
+from datetime import timedelta
 from django.utils import timezone
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
@@ -38,7 +36,6 @@ from teachers.models import (
     Question,
     SchoolClass,
     Section,
-    StudentAnswer,
     StudentExam,
     Subject,
     Teacher,
@@ -46,10 +43,14 @@ from teachers.models import (
     TeacherLeaveRequest,
 )
 from students.models import Student, StudentLeaveRequest
+from .services import (
+    AttendanceSummaryService,
+    ExamEvaluationService,
+    SchoolCalendarService,
+)
+from learnera_app.cache import CachedListMixin
 from rest_framework.pagination import PageNumberPagination
 from django.db import transaction
-from django.db.models.functions import TruncMonth
-from django.db.models import Count, Q
 from loguru import logger
 
 
@@ -186,6 +187,9 @@ class MarkAttendance(generics.CreateAPIView):
                     )
                 )
             Attendance.objects.bulk_create(attendance_record)
+            AttendanceSummaryService.record_day(
+                section, date, [record.status for record in attendance_record]
+            )
 
             return Response(
                 {"detail": "Attendance marked successfully"},
@@ -258,36 +262,24 @@ class MonthlyStatisticsView(generics.ListAPIView):
         month = self.request.query_params.get("month")
         weekday = self.request.query_params.get("weekday")
 
-        total_students = Student.objects.filter(class_assigned=section).count()
-
-        query = Attendance.objects.filter(section=section)
-
-        if year and year != "all":
-            query = query.filter(date__year=int(year))
+        weekday = weekday if weekday != "all" else None
 
-        if month and month != "all":
-            query = query.filter(date__month=int(month))
+        total_students = Student.objects.filter(class_assigned=section).count()
 
-        if weekday and weekday != "all":
-            weekday_map = {"1": 2, "2": 3, "3": 4, "4": 5, "5": 6, "6": 7, "7": 1}
-            query = query.filter(date__week_day=weekday_map[weekday])
-
-        monthly_stats = (
-            query.annotate(month=TruncMonth("date"))
-            .values("month")
-            .annotate(
-                present_count=Count("id", filter=Q(status="present")),
-                absent_count=Count("id", filter=Q(status="absent")),
-                late_count=Count("id", filter=Q(status="late")),
-            )
-            .order_by("month")
+        monthly_stats = AttendanceSummaryService.monthly_statistics(
+            year=year if year != "all" else None,
+            month=month if month != "all" else None,
+            weekday=weekday,
+            section=section,
         )
 
         for stat in monthly_stats:
             stat["total_students"] = total_students
             month = stat["month"].month
             year = stat["month"].year
-            working_days = self.get_working_days(year, month, weekday)
+            working_days = SchoolCalendarService.working_days(
+                year, month, weekday, academic_year=section.academic_year_id
+            )
 
             if working_days > 0:
                 expected_attendance = working_days * total_students
@@ -300,21 +292,6 @@ class MonthlyStatisticsView(generics.ListAPIView):
 
         return monthly_stats
 
-    def get_working_days(self, year, month, weekday=None):
-        total_days = calendar.monthrange(year, month)[1]
-        working_days = 0
-
-        for day in range(1, total_days + 1):
-            date = datetime(year, month, day)
-            if weekday:
-                # If specific weekday is selected, only count those days
-                if str(date.isoweekday()) == weekday:
-                    working_days += 1
-            elif date.weekday() < 5:  # Monday to Friday
-                working_days += 1
-
-        return working_days
-
 
 # --------------------------------------------
 
@@ -331,7 +308,8 @@ class ClassListView(generics.ListAPIView):
     pagination_class = None
 
 
-class SubjectListView(generics.ListAPIView):
+class SubjectListView(CachedListMixin, generics.ListAPIView):
+    cache_models = (Subject,)
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
     pagination_class = None
@@ -442,15 +420,10 @@ class TeacherExamListCreateView(generics.ListCreateAPIView):
         return Exam.objects.none()
 
     def perform_create(self, serializer):
-        exam = serializer.save(teacher=self.request.user.teacher)
-
-        if exam.status == "PUBLISHED":
-            students = exam.class_section.students.all()
-            student_exams = [
-                StudentExam(student=student, exam=exam, status="NOT_STARTED")
-                for student in students
-            ]
-            StudentExam.objects.bulk_create(student_exams)
+        # StudentExam rows for the section are created by the Exam post_save
+        # signal (ExamPaperService.prewarm) when the exam's status changes to
+        # PUBLISHED or ONGOING, or by StartExamView when a student starts it.
+        serializer.save(teacher=self.request.user.teacher)
 
 
 class TeacherExamDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -492,95 +465,101 @@ class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Question.objects.none()
 
 
-class EvaluateExamView(generics.UpdateAPIView):
-    permission_classes = [permissions.IsAuthenticated]
-    serializer_class = EvaluationSerializer
-
-    def get_queryset(self):
-        if not hasattr(self.request.user, "teacher"):
-            return StudentAnswer.objects.none()
-
-        return StudentAnswer.objects.filter(
-            student_exam__id=self.kwargs.get("pk"),
-            student_exam__exam__teacher=self.request.user.teacher,
-            student_exam__status__in=["SUBMITTED", "EVALUATED"],
-        ).select_related("student_exam", "question")
-
-    @transaction.atomic
-    def update(self, request, pk=None, *args, **kwargs):
-        answers_data = request.data.get("answers", [])
+class ExamEvaluationMixin:
+    def evaluate(self, request, evaluations):
+        """
+        Grades ``{student_exam_id: answers}`` in one pass and returns
+        ``(results, error_response)``.
+        """
+        if not hasattr(request.user, "teacher"):
+            raise PermissionDenied("Only teachers can evaluate exams.")
 
-        if not answers_data or not isinstance(answers_data, list):
-            return Response(
+        if not evaluations or not all(
+            answers and isinstance(answers, list) for answers in evaluations.values()
+        ):
+            return None, Response(
                 {"detail": "No answers provided for evaluation"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        student_exam = get_object_or_404(
-            StudentExam.objects.select_related("exam__teacher"),
-            id=pk,
-            exam__teacher=request.user.teacher,
-            status__in=["SUBMITTED", "EVALUATED"],
+        student_exams, answers, errors = ExamEvaluationService.evaluate(
+            request.user.teacher, evaluations
         )
-
-        student_answers = self.get_queryset()
-        if not student_answers:
-            return Response(
-                {"detail": "No submitted answers found for evaluation"},
-                status=status.HTTP_404_NOT_FOUND,
+        if errors:
+            # A StudentExam that is missing, not the teacher's or not submitted
+            # is a 404, as with the per-exam endpoint before batching.
+            not_found = any(
+                error["detail"] == ExamEvaluationService.NOT_EVALUABLE
+                for error in errors
+            )
+            return None, Response(
+                {"detail": errors[0]["detail"], "errors": errors},
+                status=(
+                    status.HTTP_404_NOT_FOUND
+                    if not_found
+                    else status.HTTP_400_BAD_REQUEST
+                ),
             )
 
-        answer_dict = {str(answer.id): answer for answer in student_answers}
-        updated_answers = []
-        total_score = Decimal("0.0")
+        answers_by_exam = {}
+        for answer in answers:
+            answers_by_exam.setdefault(answer.student_exam_id, []).append(answer)
+        results = [
+            {
+                "detail": "Evaluation submitted successfully",
+                "student_exam_id": student_exam.id,
+                "total_score": float(student_exam.total_score),
+                "answers": EvaluationSerializer(
+                    answers_by_exam.get(student_exam.id, []), many=True
+                ).data,
+            }
+            for student_exam in student_exams
+        ]
+        return results, None
 
-        try:
-            for answer_data in answers_data:
-                answer_id = str(answer_data.get("id"))
-                if answer_id not in answer_dict:
-                    raise ValueError(f"Invalid answer ID: {answer_id}")
-
-                # Ensure marks_obtained is a valid number or 0
-                marks = answer_data.get("marks_obtained")
-                if marks is None or marks == "":
-                    answer_data["marks_obtained"] = 0
-                else:
-                    try:
-                        answer_data["marks_obtained"] = float(marks)
-                    except (TypeError, ValueError):
-                        answer_data["marks_obtained"] = 0
-
-                answer = answer_dict[answer_id]
-                serializer = self.get_serializer(answer, data=answer_data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                updated_answer = serializer.save(evaluated_by=request.user.teacher)
-
-                updated_answers.append(serializer.data)
-                # Ensure we're converting a valid number to Decimal
-                marks_obtained = updated_answer.marks_obtained or 0
-                total_score += Decimal(str(marks_obtained))
-
-            student_exam.status = "EVALUATED"
-            student_exam.total_score = total_score
-            student_exam.save()
 
-            return Response(
-                {
-                    "detail": "Evaluation submitted successfully",
-                    "student_exam_id": student_exam.id,
-                    "total_score": float(total_score),
-                    "answers": updated_answers,
-                },
-                status=status.HTTP_200_OK,
-            )
+class EvaluateExamView(ExamEvaluationMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
 
-        except ValueError as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response(
-                {"detail": f"An error occurred: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    def put(self, request, pk):
+        results, error = self.evaluate(request, {pk: request.data.get("answers", [])})
+        if error:
+            return error
+        return Response(results[0], status=status.HTTP_200_OK)
+
+    def patch(self, request, pk):
+        return self.put(request, pk)
+
+
+class BatchEvaluateExamView(ExamEvaluationMixin, APIView):
+    """
+    Evaluates several StudentExams in one request:
+    ``{"evaluations": [{"student_exam": id, "answers": [...]}, ...]}``.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        evaluations = {}
+        for evaluation in request.data.get("evaluations", []):
+            try:
+                student_exam_id = int(evaluation.get("student_exam"))
+            except (AttributeError, TypeError, ValueError):
+                return Response(
+                    {"detail": "Each evaluation needs a student_exam id"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if student_exam_id in evaluations:
+                return Response(
+                    {"detail": f"Duplicate student_exam id: {student_exam_id}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            evaluations[student_exam_id] = evaluation.get("answers", [])
+
+        results, error = self.evaluate(request, evaluations)
+        if error:
+            return error
+        return Response({"results": results}, status=status.HTTP_200_OK)
 
 
 class TeacherExamSubmissionsView(generics.ListAPIView):
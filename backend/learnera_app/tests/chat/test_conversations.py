@@ -0,0 +1,193 @@
+import pytest
+from importlib import import_module
+from django.apps import apps
+from django.core.management import call_command
+from django.urls import reverse
+from chat.models import Conversation, UserChatMessage
+from chat.pagination import ContactPagination
+from chat.services import ChatMessageService
+from teachers.models import Subject, Teacher
+
+
+@pytest.mark.django_db
+def test_messages_update_the_conversation_summary(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+
+    ChatMessageService.create_message(teacher.id, student.id, "Hello")
+    ChatMessageService.create_message(teacher.id, student.id, "Homework?")
+    ChatMessageService.create_message(student.id, teacher.id, "Done")
+
+    conversation = Conversation.objects.get()
+    assert (conversation.user_low_id, conversation.user_high_id) == (
+        teacher.id,
+        student.id,
+    )
+    assert conversation.last_message == "Done"
+    assert conversation.last_sender_id == student.id
+    # Unread counts are kept for the receiving side.
+    assert conversation.unread_high == 2
+    assert conversation.unread_low == 1
+
+
+@pytest.mark.django_db
+def test_write_behind_batches_update_the_summary_once_per_pair(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    students = [make_chat_user(name, is_student=True) for name in ("sam", "sid")]
+    rows = [
+        {
+            "id": 100 + i,
+            "sender_id": teacher.id,
+            "receiver_id": students[i % 2].id,
+            "message": f"Message {i}",
+            "timestamp": f"2026-01-05T10:00:0{i}+00:00",
+        }
+        for i in range(5)
+    ]
+
+    ChatMessageService.write_messages(rows)
+
+    summaries = {
+        c.user_high_id: (c.last_message, c.unread_high)
+        for c in Conversation.objects.all()
+    }
+    assert summaries == {
+        students[0].id: ("Message 4", 3),
+        students[1].id: ("Message 3", 2),
+    }
+
+
+@pytest.mark.django_db
+def test_older_messages_stored_late_keep_the_newer_preview(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    # A message stored directly (channel full) while older ones are queued.
+    ChatMessageService.create_message(student.id, teacher.id, "Newest")
+
+    ChatMessageService.write_messages(
+        [
+            {
+                "id": 900,
+                "sender_id": teacher.id,
+                "receiver_id": student.id,
+                "message": "Queued earlier",
+                "timestamp": "2026-01-05T10:00:00+00:00",
+            }
+        ]
+    )
+
+    conversation = Conversation.objects.get()
+    assert conversation.last_message == "Newest"
+    assert conversation.last_sender_id == student.id
+    assert (conversation.unread_low, conversation.unread_high) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_contact_list_reads_the_summaries(client, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    quiet, older, newer = (
+        make_chat_user(name, is_student=True) for name in ("amy", "ben", "cat")
+    )
+    ChatMessageService.create_message(older.id, teacher.id, "First")
+    ChatMessageService.create_message(newer.id, teacher.id, "Second")
+    ChatMessageService.create_message(teacher.id, newer.id, "Reply")
+    client.force_authenticate(teacher)
+
+    response = client.get(reverse("contact-list"))
+
+    assert response.status_code == 200
+    assert [
+        (row["id"], row["last_message"], row["unread_count"])
+        for row in response.data["results"]
+    ] == [
+        (newer.id, "Reply", 1),
+        (older.id, "First", 1),
+        (quiet.id, None, 0),
+    ]
+
+    page = client.get(reverse("contact-list"), {"limit": 2}).data
+    assert page["count"] == 3
+    assert [row["id"] for row in page["results"]] == [newer.id, older.id]
+
+
+@pytest.mark.django_db
+def test_contact_list_is_paged_by_default(client, make_chat_user, monkeypatch):
+    teacher = make_chat_user("tina", is_teacher=True)
+    for index in range(ContactPagination.default_limit + 1):
+        make_chat_user(f"student{index}", is_student=True)
+    client.force_authenticate(teacher)
+
+    response = client.get(reverse("contact-list"))
+
+    assert response.data["count"] == ContactPagination.default_limit + 1
+    assert len(response.data["results"]) == ContactPagination.default_limit
+    assert response.data["next"] is not None
+
+    monkeypatch.setattr(ContactPagination, "max_limit", 5)
+    capped = client.get(reverse("contact-list"), {"limit": 10_000}).data
+    assert len(capped["results"]) == 5
+
+
+@pytest.mark.django_db
+def test_rebuild_conversations(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    UserChatMessage.objects.create(sender=teacher, receiver=student, message="Hi")
+    UserChatMessage.objects.create(
+        sender=student, receiver=teacher, message="Hello", is_read=True
+    )
+
+    call_command("rebuild_conversations")
+
+    conversation = Conversation.objects.get()
+    assert conversation.last_message == "Hello"
+    assert (conversation.unread_low, conversation.unread_high) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_messages(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    UserChatMessage.objects.create(sender=teacher, receiver=student, message="Hi")
+    UserChatMessage.objects.create(
+        sender=student, receiver=teacher, message="Hello", is_read=True
+    )
+    migration = import_module("chat.migrations.0007_backfill_conversations")
+
+    migration.backfill_conversations(apps, None)
+
+    conversation = Conversation.objects.get()
+    assert (conversation.user_low_id, conversation.user_high_id) == (
+        teacher.id,
+        student.id,
+    )
+    assert conversation.last_message == "Hello"
+    assert conversation.last_sender_id == student.id
+    assert (conversation.unread_low, conversation.unread_high) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_contact_list_builds_display_names_in_one_query(
+    client, django_assert_num_queries, teacher, make_student, make_chat_user
+):
+    maths = Subject.objects.create(subject_name="Maths")
+    teacher.subject = maths
+    teacher.save()
+    Teacher.objects.create(user=make_chat_user("tom", is_teacher=True))  # no subject
+    students = [make_student(name) for name in ("Amy", "Ben", "Cat")]
+    make_chat_user("sid", is_student=True)  # no Student row
+    ChatMessageService.create_message(teacher.user.id, students[0].user.id, "Hi")
+
+    client.force_authenticate(teacher.user)
+    # The page itself and the pagination count.
+    with django_assert_num_queries(2):
+        response = client.get(reverse("contact-list"))
+    names = {row["username"]: row["display_name"] for row in response.data["results"]}
+    assert names["amy_student"] == "Amy Student 10 - A"
+    assert names["sid"] == "Sid User"
+
+    client.force_authenticate(students[1].user)
+    with django_assert_num_queries(2):
+        response = client.get(reverse("contact-list"))
+    names = {row["username"]: row["display_name"] for row in response.data["results"]}
+    assert names == {"test_teacher": "Tara Teacher - Maths", "tom": "Tom User"}
@@ -0,0 +1,81 @@
+from datetime import timedelta
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from chat.models import UserChatMessage
+
+
+def make_conversation(teacher, student, count):
+    start = timezone.now() - timedelta(days=1)
+    UserChatMessage.objects.bulk_create(
+        UserChatMessage(
+            sender=teacher if i % 2 else student,
+            receiver=student if i % 2 else teacher,
+            message=f"Message {i}",
+            # Pairs of messages share a timestamp to exercise the id tiebreak.
+            timestamp=start + timedelta(seconds=i // 2),
+        )
+        for i in range(count)
+    )
+
+
+@pytest.mark.django_db
+def test_history_pages_back_in_windows(client, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    other = make_chat_user("sid", is_student=True)
+    make_conversation(teacher, student, 120)
+    make_conversation(teacher, other, 5)
+    client.force_authenticate(teacher)
+
+    url = reverse("chat-messages", args=[student.id])
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert [m["message"] for m in response.data] == [
+        f"Message {i}" for i in range(70, 120)
+    ]
+    seen = [m["message"] for m in response.data]
+
+    while "Link" in response.headers:
+        next_url = response.headers["Link"].split(">")[0].lstrip("<")
+        response = client.get(next_url)
+        assert response.status_code == 200
+        seen = [m["message"] for m in response.data] + seen
+
+    assert seen == [f"Message {i}" for i in range(120)]
+    assert len(response.data) == 20
+
+
+@pytest.mark.django_db
+def test_history_window_cost_does_not_grow_with_the_conversation(
+    client, make_chat_user
+):
+    teacher = make_chat_user("tina", is_teacher=True)
+    chatty = make_chat_user("sam", is_student=True)
+    quiet = make_chat_user("sid", is_student=True)
+    make_conversation(teacher, chatty, 500)
+    client.force_authenticate(teacher)
+
+    query_counts = []
+    for student in (chatty, quiet):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("chat-messages", args=[student.id]))
+        assert response.status_code == 200
+        query_counts.append(len(queries))
+
+    assert query_counts[0] == query_counts[1]
+    assert len(response.data) == 0
+
+
+@pytest.mark.django_db
+def test_history_rejects_unknown_cursor(client, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    client.force_authenticate(teacher)
+
+    url = reverse("chat-messages", args=[student.id])
+    assert client.get(url, {"before": 999999}).status_code == 404
+    assert client.get(url, {"before": "abc"}).status_code == 404
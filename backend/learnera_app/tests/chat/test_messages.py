@@ -0,0 +1,351 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+import pytest
+from collections import deque
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from chat.consumers import ChatMessageWriterConsumer
+from chat.loadtest import MessageFanoutBenchmark
+from chat.models import Conversation, UserChatMessage
+from chat.services import ChatMessageIdPool, ChatMessageService
+from .test_presence import has_event, next_event, open_socket
+
+
+@pytest.mark.django_db(transaction=True)
+def test_messages_are_stored_without_reloading_users(
+    in_memory_channel_layer, make_chat_user
+):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+
+    @async_to_sync
+    async def scenario():
+        student_socket = await open_socket(student)
+        teacher_socket = await open_socket(teacher)
+
+        events = []
+        for text in ["Hi", "Homework is due", "Friday"]:
+            await teacher_socket.send_json_to(
+                {"receiver_id": student.id, "message": text}
+            )
+            events.append(
+                (await next_event(student_socket), await next_event(teacher_socket))
+            )
+
+        await student_socket.disconnect()
+        await teacher_socket.disconnect()
+        return events
+
+    with CaptureQueriesContext(connection) as queries:
+        events = scenario()
+
+    sql = [query["sql"] for query in queries]
+    # A user and a presence section lookup per socket and one contact-set
+    # load for the sender; after that each message is one INSERT plus its
+    # conversation upsert.
+    assert sum(s.startswith("SELECT") for s in sql) == 2 * 2 + 1, sql
+    assert sum(s.startswith('INSERT INTO "chat_userchatmessage"') for s in sql) == 3
+    assert sum(s.startswith('UPDATE "chat_conversation"') for s in sql) == 3
+
+    received, sent = events[1]
+    assert received["status"] == "received"
+    assert received["sender_name"] == "Tina User"
+    assert received["message"] == "Homework is due"
+    assert sent["status"] == "send"
+    assert sent["message_id"] == received["message_id"]
+    message = UserChatMessage.objects.get(id=received["message_id"])
+    assert (message.sender_id, message.receiver_id) == (teacher.id, student.id)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_message_to_a_non_contact_is_rejected(in_memory_channel_layer, make_chat_user):
+    student = make_chat_user("sam", is_student=True)
+    other_student = make_chat_user("sid", is_student=True)
+
+    @async_to_sync
+    async def scenario():
+        socket = await open_socket(student)
+        await socket.send_json_to({"receiver_id": other_student.id, "message": "Hi"})
+        reply = await next_event(socket)
+        await socket.disconnect()
+        return reply
+
+    assert scenario()["status"] == "error"
+    assert not UserChatMessage.objects.exists()
+
+
+@pytest.fixture
+def write_behind(settings, in_memory_channel_layer):
+    settings.CHAT_WRITE_BEHIND = True
+    settings.CHAT_WRITE_BEHIND_BATCH_SIZE = 2
+    settings.CHAT_WRITE_BEHIND_FLUSH_MS = 50
+
+
+async def run_writer(rows):
+    writer = ApplicationCommunicator(
+        ChatMessageWriterConsumer.as_asgi(),
+        {"type": "channel", "channel": ChatMessageService.WRITER_CHANNEL},
+    )
+    for row in rows:
+        await writer.send_input(row)
+    return writer
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_ids_are_reserved_in_blocks(monkeypatch, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    monkeypatch.setattr(ChatMessageIdPool, "_ids", deque())
+    reserve = ChatMessageIdPool._reserve
+    reserved = []
+
+    def counting_reserve(count):
+        reserved.append(count)
+        return reserve(count)
+
+    monkeypatch.setattr(ChatMessageIdPool, "_reserve", counting_reserve)
+
+    @async_to_sync
+    async def take(count):
+        return [await ChatMessageIdPool.next_id() for _ in range(count)]
+
+    ids = take(ChatMessageIdPool.BLOCK_SIZE + 1)
+
+    assert reserved == [ChatMessageIdPool.BLOCK_SIZE] * 2
+    assert ids == sorted(set(ids))
+    # Rows inserted the normal way never reuse a reserved id.
+    stored = ChatMessageService.create_message(teacher.id, student.id, "Hi")
+    assert stored.id not in ids
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_broadcasts_before_storing(write_behind, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+
+    @async_to_sync
+    async def scenario():
+        teacher_socket = await open_socket(teacher)
+        sent = []
+        for text in ["One", "Two", "Three"]:
+            await teacher_socket.send_json_to(
+                {"receiver_id": student.id, "message": text}
+            )
+            sent.append(await next_event(teacher_socket))
+        await teacher_socket.disconnect()
+
+        stored_before = await UserChatMessage.objects.acount()
+        layer = get_channel_layer()
+        queued = [await layer.receive(ChatMessageService.WRITER_CHANNEL) for _ in sent]
+        return sent, stored_before, queued
+
+    sent, stored_before, queued = scenario()
+
+    assert stored_before == 0
+    assert [row["id"] for row in queued] == [event["message_id"] for event in sent]
+    assert len({event["message_id"] for event in sent}) == 3
+
+    @async_to_sync
+    async def write():
+        writer = await run_writer(queued)
+        await asyncio.sleep(0.01)
+        # The first two messages fill a batch; the third waits for the timer.
+        stored_after_batch = await UserChatMessage.objects.acount()
+        await asyncio.sleep(0.2)
+        writer.stop()
+        return stored_after_batch
+
+    assert write() == 2
+    messages = list(UserChatMessage.objects.order_by("id"))
+    assert [m.message for m in messages] == ["One", "Two", "Three"]
+    assert messages[0].timestamp.isoformat() == sent[0]["timestamp"]
+
+
+def send_sigterm_once_listening(layer):
+    """Sends SIGTERM once the worker has its handler and has taken the row."""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        listening = signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL
+        queue = layer.channels.get(ChatMessageService.WRITER_CHANNEL)
+        if listening and (queue is None or queue.empty()):
+            break
+        time.sleep(0.01)
+    time.sleep(0.1)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writer_command_flushes_pending_messages_on_sigterm(
+    write_behind, settings, make_chat_user
+):
+    settings.CHAT_WRITE_BEHIND_FLUSH_MS = 60_000
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    layer = get_channel_layer()
+    async_to_sync(layer.send)(
+        ChatMessageService.WRITER_CHANNEL,
+        {
+            "type": "chat.persist",
+            "id": 4242,
+            "sender_id": teacher.id,
+            "receiver_id": student.id,
+            "message": "Bye",
+            "timestamp": "2026-01-05T10:00:00+00:00",
+        },
+    )
+    killer = threading.Thread(target=send_sigterm_once_listening, args=(layer,))
+    killer.start()
+
+    # Returns once the worker has handled SIGTERM.
+    call_command("run_chat_writer")
+    killer.join()
+
+    assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+    assert UserChatMessage.objects.get(id=4242).message == "Bye"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_stores_directly_when_the_channel_is_full(
+    write_behind, settings, make_chat_user
+):
+    settings.CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "CONFIG": {"capacity": 1},
+        }
+    }
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+
+    @async_to_sync
+    async def scenario():
+        teacher_socket = await open_socket(teacher)
+        sent = []
+        for text in ["Queued", "Stored"]:
+            await teacher_socket.send_json_to(
+                {"receiver_id": student.id, "message": text}
+            )
+            sent.append(await next_event(teacher_socket))
+        await teacher_socket.disconnect()
+        return sent
+
+    queued, stored = scenario()
+
+    assert queued["message_id"] < stored["message_id"]
+    assert list(UserChatMessage.objects.values_list("id", "message")) == [
+        (stored["message_id"], "Stored")
+    ]
+    assert Conversation.objects.get().last_message == "Stored"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_receipt_covers_messages_stored_after_it(
+    write_behind, settings, make_chat_user
+):
+    settings.CHAT_WRITE_BEHIND_BATCH_SIZE = 100
+    settings.CHAT_WRITE_BEHIND_FLUSH_MS = 60_000
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+
+    @async_to_sync
+    async def scenario():
+        student_socket = await open_socket(student)
+        teacher_socket = await open_socket(teacher)
+
+        for text in ["One", "Two"]:
+            await teacher_socket.send_json_to(
+                {"receiver_id": student.id, "message": text}
+            )
+            await next_event(teacher_socket)
+            last = await next_event(student_socket)
+        await student_socket.send_json_to(
+            {
+                "type": "messages.read",
+                "contact_id": teacher.id,
+                "up_to": last["message_id"],
+            }
+        )
+        layer = get_channel_layer()
+        queued = [
+            await layer.receive(ChatMessageService.WRITER_CHANNEL) for _ in range(3)
+        ]
+        stored_before = await UserChatMessage.objects.acount()
+
+        writer = await run_writer(queued)
+        receipt = await next_event(teacher_socket)
+        writer.stop()
+        await student_socket.disconnect()
+        await teacher_socket.disconnect()
+        return last, queued, stored_before, receipt
+
+    last, queued, stored_before, receipt = scenario()
+
+    assert [row["type"] for row in queued] == [
+        "chat.persist",
+        "chat.persist",
+        "chat.store_receipt",
+    ]
+    assert stored_before == 0
+    assert receipt == {
+        "type": "receipt",
+        "status": "read",
+        "user_id": student.id,
+        "up_to": last["message_id"],
+    }
+    assert list(UserChatMessage.objects.values_list("is_read", flat=True)) == [
+        True,
+        True,
+    ]
+    assert Conversation.objects.get().unread_high == 0
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("echo", [False, True])
+def test_sender_is_acknowledged_directly_and_echo_is_opt_in(
+    in_memory_channel_layer, settings, make_chat_user, echo
+):
+    settings.CHAT_ECHO_TO_OTHER_DEVICES = echo
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+
+    @async_to_sync
+    async def scenario():
+        student_socket = await open_socket(student)
+        phone = await open_socket(teacher)
+        laptop = await open_socket(teacher)
+
+        await phone.send_json_to({"receiver_id": student.id, "message": "Hi"})
+        received = await next_event(student_socket)
+        ack = await next_event(phone)
+        duplicate_ack = await has_event(phone)
+        copy = await next_event(laptop) if echo else await has_event(laptop)
+
+        for socket in (student_socket, phone, laptop):
+            await socket.disconnect()
+        return received, ack, duplicate_ack, copy
+
+    received, ack, duplicate_ack, copy = scenario()
+
+    assert received["status"] == "received"
+    assert ack["status"] == "send"
+    assert ack["receiver_id"] == student.id
+    assert ack["message_id"] == received["message_id"]
+    assert not duplicate_ack
+    if echo:
+        assert copy == ack
+    else:
+        assert not copy
+
+
+def test_message_benchmark_counts_every_message():
+    benchmark = MessageFanoutBenchmark(messages=50)
+    for mode in MessageFanoutBenchmark.MODES:
+        result = async_to_sync(benchmark.run)(mode)
+        assert result["delivered"] == result["acknowledged"] == 50
@@ -0,0 +1,77 @@
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from chat.middleware import JWTAuthMiddleware
+from .test_presence import application
+
+
+def authenticate(scope):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen.update(scope)
+
+    async_to_sync(JWTAuthMiddleware(app))(scope, None, None)
+    return seen
+
+
+def socket_scope(token):
+    return {"type": "websocket", "path": f"/ws/chat/{token}/", "query_string": b""}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reconnects_reuse_the_cached_user(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    token = str(AccessToken.for_user(teacher))
+
+    with CaptureQueriesContext(connection) as first:
+        scope = authenticate(socket_scope(token))
+    with CaptureQueriesContext(connection) as again:
+        reconnect = authenticate(socket_scope(token))
+
+    assert len(first) == 1
+    assert len(again) == 0
+    for user in (scope["user"], reconnect["user"]):
+        assert user.is_authenticated
+        assert (user.id, user.first_name, user.is_teacher) == (teacher.id, "Tina", True)
+    assert reconnect["auth_error"] is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_token_can_come_from_the_query_string(make_chat_user):
+    student = make_chat_user("sam", is_student=True)
+    token = str(AccessToken.for_user(student))
+
+    scope = authenticate(
+        {
+            "type": "websocket",
+            "path": "/ws/chat/",
+            "query_string": f"token={token}".encode(),
+        }
+    )
+
+    assert scope["user"].id == student.id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bad_tokens_are_rejected(make_chat_user):
+    ghost = make_chat_user("ghost", is_student=True)
+    token = str(AccessToken.for_user(ghost))
+    ghost.delete()
+
+    assert authenticate(socket_scope("not-a-token"))["auth_error"] == "invalid_token"
+    assert authenticate(socket_scope(token))["auth_error"] == "unknown_user"
+    assert not authenticate(socket_scope(token))["user"].is_authenticated
+
+
+@pytest.mark.django_db(transaction=True)
+def test_socket_with_a_bad_token_is_closed(in_memory_channel_layer):
+    @async_to_sync
+    async def connect():
+        communicator = WebsocketCommunicator(application, "/ws/chat/not-a-token/")
+        return await communicator.connect()
+
+    assert connect() == (False, 4002)
@@ -0,0 +1,258 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from channels.routing import URLRouter
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from chat.loadtest import PresenceLoadTest
+from chat.middleware import JWTAuthMiddleware
+from chat.routing import websocket_urlpatterns
+from chat.services import PresenceService
+from parents.models import Parent, StudentParentRelationship
+from teachers.models import SchoolClass, Section
+
+application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+async def open_socket(user):
+    communicator = WebsocketCommunicator(
+        application, f"/ws/chat/{AccessToken.for_user(user)}/"
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+    return communicator
+
+
+async def next_event(communicator):
+    return json.loads(await communicator.receive_from(timeout=1))
+
+
+async def has_event(communicator):
+    return not await communicator.receive_nothing(timeout=0.1)
+
+
+@pytest.fixture
+def other_section(academic_year):
+    return Section.objects.create(
+        school_class=SchoolClass.objects.create(class_name="11"),
+        section_name="B",
+        academic_year=academic_year,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_presence_only_reaches_contacts_in_shared_sections(
+    in_memory_channel_layer, section, other_section, make_student, make_chat_user
+):
+    teacher = section.class_teacher.user
+    student, other_student = (make_student(name) for name in ("Sam", "Sid"))
+    outsider = make_student("Oli")
+    outsider.class_assigned = other_section
+    outsider.save()
+    parent = Parent.objects.create(
+        user=make_chat_user("pat", is_parent=True), occupation="Engineer"
+    )
+    StudentParentRelationship.objects.create(
+        parent=parent, student=student, relationship_type="Mother"
+    )
+
+    @async_to_sync
+    async def scenario():
+        parent_socket = await open_socket(parent.user)
+        teacher_socket = await open_socket(teacher)
+        assert await next_event(parent_socket) == {
+            "type": "user_status",
+            "user_id": teacher.id,
+            "is_online": True,
+        }
+        other_socket = await open_socket(other_student.user)
+        assert (await next_event(teacher_socket))["user_id"] == other_student.user.id
+
+        student_socket = await open_socket(student.user)
+        assert (await next_event(teacher_socket))["user_id"] == student.user.id
+        # Students are not each other's contacts.
+        assert not await has_event(other_socket)
+
+        # The teacher does not teach the outsider's section.
+        outsider_socket = await open_socket(outsider.user)
+        assert not await has_event(teacher_socket)
+        assert not await has_event(outsider_socket)
+
+        await student_socket.disconnect()
+        assert await next_event(teacher_socket) == {
+            "type": "user_status",
+            "user_id": student.user.id,
+            "is_online": False,
+        }
+        assert not await has_event(other_socket)
+
+        for socket in (outsider_socket, other_socket, parent_socket, teacher_socket):
+            await socket.disconnect()
+
+    scenario()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_presence_counts_sockets_without_writing_the_user(
+    in_memory_channel_layer, section, make_student
+):
+    teacher = section.class_teacher.user
+    student = make_student("Sam").user
+
+    @async_to_sync
+    async def scenario():
+        teacher_socket = await open_socket(teacher)
+        first = await open_socket(student)
+        second = await open_socket(student)
+        assert (await next_event(teacher_socket))["is_online"] is True
+        # A second tab does not announce the student again.
+        assert not await has_event(teacher_socket)
+
+        await first.disconnect()
+        assert not await has_event(teacher_socket)
+        assert PresenceService.get_presence([student.id])[student.id]["is_online"]
+
+        await second.disconnect()
+        assert (await next_event(teacher_socket))["is_online"] is False
+        await teacher_socket.disconnect()
+
+    scenario()
+
+    presence = PresenceService.get_presence([student.id])[student.id]
+    assert presence["is_online"] is False
+    assert presence["last_seen"] is not None
+    student.refresh_from_db()
+    assert student.is_online is False
+
+
+@pytest.mark.parametrize(
+    "expired_keys",
+    [
+        pytest.param(["presence:1", "presence:epoch:1"], id="cache-flushed"),
+        pytest.param(["presence:1"], id="counter-expired"),
+    ],
+)
+def test_heartbeat_recounts_every_socket_after_the_counter_expires(expired_keys):
+    async def scenario():
+        _, first = await PresenceService.connect(1)
+        _, second = await PresenceService.connect(1)
+        await cache.adelete_many(expired_keys)
+
+        first = await PresenceService.heartbeat(1, first)
+        second = await PresenceService.heartbeat(1, second)
+        assert await cache.aget("presence:1") == 2
+
+        assert await PresenceService.disconnect(1, first) is False
+        assert (await PresenceService.aget_presence([1]))[1]["is_online"] is True
+        assert await PresenceService.disconnect(1, second) is True
+
+    async_to_sync(scenario)()
+    assert PresenceService.get_presence([1])[1]["is_online"] is False
+
+
+def test_stale_socket_does_not_drop_a_count_it_never_added():
+    async def scenario():
+        _, stale = await PresenceService.connect(1)
+        await cache.aclear()
+        came_online, live = await PresenceService.connect(1)
+        assert came_online is True
+
+        assert await PresenceService.disconnect(1, stale) is False
+        assert (await PresenceService.aget_presence([1]))[1]["is_online"] is True
+        assert await PresenceService.disconnect(1, live) is True
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_contact_list_reads_presence(client, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    online = make_chat_user("sam", is_student=True)
+    offline = make_chat_user("sid", is_student=True)
+    async_to_sync(PresenceService.connect)(online.id)
+
+    client.force_authenticate(teacher)
+    response = client.get(reverse("contact-list"))
+
+    assert response.status_code == 200
+    is_online = {row["id"]: row["is_online"] for row in response.data["results"]}
+    assert is_online == {online.id: True, offline.id: False}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_subscribe_narrows_presence_to_chosen_contacts(
+    in_memory_channel_layer, section, make_student, make_chat_user
+):
+    teacher = section.class_teacher.user
+    watched, ignored = (make_student(name).user for name in ("Sam", "Sid"))
+    other_teacher = make_chat_user("tom", is_teacher=True)
+
+    @async_to_sync
+    async def scenario():
+        teacher_socket = await open_socket(teacher)
+
+        async def subscribe():
+            await teacher_socket.send_json_to(
+                {
+                    "type": "presence.subscribe",
+                    # Teachers are not a teacher's contacts and are dropped.
+                    "user_ids": [watched.id, other_teacher.id],
+                }
+            )
+            return await next_event(teacher_socket)
+
+        assert await subscribe() == {
+            "type": "user_status",
+            "user_id": watched.id,
+            "is_online": False,
+        }
+        assert not await has_event(teacher_socket)
+
+        ignored_socket = await open_socket(ignored)
+        assert not await has_event(teacher_socket)
+
+        watched_socket = await open_socket(watched)
+        assert await next_event(teacher_socket) == {
+            "type": "user_status",
+            "user_id": watched.id,
+            "is_online": True,
+        }
+
+        # Dropping the last subscription brings back the section's presence.
+        await teacher_socket.send_json_to(
+            {"type": "presence.unsubscribe", "user_ids": [watched.id]}
+        )
+        await ignored_socket.disconnect()
+        assert (await next_event(teacher_socket))["user_id"] == ignored.id
+
+        assert (await subscribe())["is_online"] is True
+        await teacher_socket.send_json_to({"type": "presence.unsubscribe"})
+        await watched_socket.disconnect()
+        assert await next_event(teacher_socket) == {
+            "type": "user_status",
+            "user_id": watched.id,
+            "is_online": False,
+        }
+        assert not await has_event(teacher_socket)
+
+        await teacher_socket.disconnect()
+
+    scenario()
+
+
+def test_presence_load_test_scopes_fan_out():
+    def delivered(sections):
+        load_test = PresenceLoadTest(
+            sockets=60, teachers=5, events=60, subscriptions=3, sections=sections
+        )
+        return {
+            mode: async_to_sync(load_test.run)(mode)["delivered"]
+            for mode in PresenceLoadTest.MODES
+        }
+
+    one_section = delivered(sections=1)
+    assert one_section["global"] == 60 * 60
+    assert one_section["subscribed"] < one_section["roster"] < one_section["global"]
+    assert delivered(sections=4)["roster"] < one_section["roster"]
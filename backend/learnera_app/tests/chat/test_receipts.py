@@ -0,0 +1,131 @@
+import pytest
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from chat.models import Conversation, UserChatMessage
+from chat.services import ChatMessageService, ReceiptService
+from .test_presence import has_event, next_event, open_socket
+
+
+@pytest.mark.django_db
+def test_mark_read_is_one_update_and_keeps_the_badge(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    messages = [
+        ChatMessageService.create_message(teacher.id, student.id, f"Message {i}")
+        for i in range(4)
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        updated = ReceiptService.mark_read(student.id, teacher.id, messages[2].id)
+
+    assert updated == 3
+    message_updates = [
+        q for q in queries if q["sql"].startswith('UPDATE "chat_userchatmessage"')
+    ]
+    assert len(message_updates) == 1
+    assert list(
+        UserChatMessage.objects.order_by("id").values_list("is_read", "is_received")
+    ) == [(True, True)] * 3 + [(False, False)]
+    assert Conversation.objects.get().unread_high == 1
+    assert ReceiptService.unread_counts(student) == {teacher.id: 1}
+
+    # Marking the same range again changes nothing.
+    assert ReceiptService.mark_read(student.id, teacher.id, messages[2].id) == 0
+    assert Conversation.objects.get().unread_high == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_receipts_are_sent_to_the_sender(in_memory_channel_layer, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    first, second = (
+        ChatMessageService.create_message(teacher.id, student.id, text)
+        for text in ("Hello", "Homework?")
+    )
+
+    @async_to_sync
+    async def scenario():
+        teacher_socket = await open_socket(teacher)
+        student_socket = await open_socket(student)
+
+        await student_socket.send_json_to(
+            {"type": "messages.delivered", "contact_id": teacher.id, "up_to": second.id}
+        )
+        delivered = await next_event(teacher_socket)
+        await student_socket.send_json_to(
+            {"type": "messages.read", "contact_id": teacher.id, "up_to": first.id}
+        )
+        read = await next_event(teacher_socket)
+        # Nothing new to mark, so no receipt is sent.
+        await student_socket.send_json_to(
+            {"type": "messages.read", "contact_id": teacher.id, "up_to": first.id}
+        )
+        repeated = await has_event(teacher_socket)
+
+        await student_socket.disconnect()
+        await teacher_socket.disconnect()
+        return delivered, read, repeated
+
+    delivered, read, repeated = scenario()
+
+    assert delivered == {
+        "type": "receipt",
+        "status": "delivered",
+        "user_id": student.id,
+        "up_to": second.id,
+    }
+    assert read["status"] == "read"
+    assert read["up_to"] == first.id
+    assert not repeated
+    assert list(
+        UserChatMessage.objects.order_by("id").values_list("is_received", "is_read")
+    ) == [(True, True), (True, False)]
+
+
+@pytest.mark.django_db
+def test_unread_counts_view(client, make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    students = [make_chat_user(name, is_student=True) for name in ("sam", "sid")]
+    for student, count in zip(students, (2, 1)):
+        for _ in range(count):
+            ChatMessageService.create_message(student.id, teacher.id, "Hi")
+    ChatMessageService.create_message(teacher.id, students[0].id, "Reply")
+    client.force_authenticate(teacher)
+
+    response = client.get(reverse("unread-counts"))
+
+    assert response.status_code == 200
+    assert response.data == {
+        "total": 3,
+        "contacts": [
+            {"user_id": students[0].id, "unread_count": 2},
+            {"user_id": students[1].id, "unread_count": 1},
+        ],
+    }
+
+
+@pytest.mark.django_db
+def test_receipts_follow_timestamp_order_not_id_order(make_chat_user):
+    teacher = make_chat_user("tina", is_teacher=True)
+    student = make_chat_user("sam", is_student=True)
+    # Write-behind ids from different workers can disagree with send order.
+    earlier = UserChatMessage.objects.create(
+        id=5000,
+        sender=teacher,
+        receiver=student,
+        message="Sent first",
+        timestamp=timezone.now() - timedelta(seconds=5),
+    )
+    later = UserChatMessage.objects.create(
+        id=4000, sender=teacher, receiver=student, message="Sent second"
+    )
+
+    assert ReceiptService.mark_read(student.id, teacher.id, earlier.id) == 1
+    assert list(
+        UserChatMessage.objects.order_by("timestamp").values_list("id", "is_read")
+    ) == [(earlier.id, True), (later.id, False)]
+    assert ReceiptService.mark_read(student.id, teacher.id, later.id) == 1
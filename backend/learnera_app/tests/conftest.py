@@ -1,11 +1,32 @@
 import pytest
+from datetime import date, timedelta
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
+from students.models import Student
+from teachers.models import (
+    AcademicYear,
+    Exam,
+    MCQChoice,
+    Question,
+    SchoolClass,
+    Section,
+    Subject,
+    Teacher,
+)
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user():
     return User.objects.create_user(
@@ -35,3 +56,124 @@ def auth_client_tokens(user, client):
     access = refresh.access_token
     client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
     return client, str(refresh), str(access)
+
+
+@pytest.fixture
+def admin_api_client(client):
+    admin = User.objects.create_superuser(
+        username="test_admin",
+        password="AdminPass@123",
+        email="admin@example.com",
+    )
+    access = RefreshToken.for_user(admin).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+    return client
+
+
+@pytest.fixture
+def academic_year():
+    return AcademicYear.objects.create(
+        name="2025-2026",
+        start_date=date(2025, 6, 1),
+        end_date=date(2026, 3, 30),
+        is_active=True,
+    )
+
+
+@pytest.fixture
+def teacher():
+    teacher_user = User.objects.create_user(
+        username="test_teacher",
+        password="TestPass@123",
+        email="teacher@example.com",
+        first_name="Tara",
+        last_name="Teacher",
+        is_teacher=True,
+    )
+    return Teacher.objects.create(user=teacher_user)
+
+
+@pytest.fixture
+def section(academic_year, teacher):
+    school_class = SchoolClass.objects.create(class_name="10")
+    return Section.objects.create(
+        school_class=school_class,
+        section_name="A",
+        class_teacher=teacher,
+        academic_year=academic_year,
+        student_count=60,
+    )
+
+
+@pytest.fixture
+def make_student(section, academic_year):
+    def _make_student(first_name, last_name="Student", roll_number=None):
+        student_user = User.objects.create_user(
+            username=f"{first_name.lower()}_{last_name.lower()}",
+            password="TestPass@123",
+            email=f"{first_name.lower()}.{last_name.lower()}@example.com",
+            first_name=first_name,
+            last_name=last_name,
+            is_student=True,
+        )
+        return Student.objects.create(
+            user=student_user,
+            class_assigned=section,
+            academic_year=academic_year,
+            roll_number=roll_number,
+        )
+
+    return _make_student
+
+
+@pytest.fixture
+def exam(section, teacher):
+    exam = Exam.objects.create(
+        title="Unit Test",
+        subject=Subject.objects.create(subject_name="Maths"),
+        teacher=teacher,
+        class_section=section,
+        total_mark=20,
+        duration=60,
+        start_time=timezone.now() - timedelta(minutes=5),
+        end_time=timezone.now() + timedelta(minutes=55),
+        meet_link="https://meet.example.com/exam",
+    )
+    for order in range(1, 4):
+        question = Question.objects.create(
+            exam=exam,
+            question_text=f"MCQ {order}",
+            question_type="MCQ",
+            marks=5,
+            order=order,
+        )
+        MCQChoice.objects.create(
+            question=question, choice_text="Right", is_correct=True
+        )
+        MCQChoice.objects.create(question=question, choice_text="Wrong")
+    Question.objects.create(
+        exam=exam, question_text="Explain", question_type="ESSAY", marks=5, order=4
+    )
+    return exam
+
+
+@pytest.fixture
+def in_memory_channel_layer(settings):
+    settings.CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    }
+
+
+@pytest.fixture
+def make_chat_user():
+    def _make_chat_user(username, **roles):
+        return User.objects.create_user(
+            username=username,
+            password="TestPass@123",
+            email=f"{username}@example.com",
+            first_name=username.title(),
+            last_name="User",
+            **roles,
+        )
+
+    return _make_chat_user
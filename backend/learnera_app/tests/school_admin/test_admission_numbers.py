@@ -0,0 +1,111 @@
+import json
+import threading
+
+import pytest
+from django.db import connection, transaction
+from django.urls import reverse
+from school_admin.services import AdmissionNumberService
+from students.models import Student
+
+
+def held_advisory_locks():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_locks"
+            " WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_reserve_releases_its_lock_before_the_transaction_ends():
+    # The test already runs inside a transaction, like CreateStudentView.
+    block = AdmissionNumberService.reserve(5)
+
+    assert held_advisory_locks() == 0
+    assert block == list(range(block[0], block[0] + 5))
+    assert AdmissionNumberService.allocate() == block[-1] + 1
+    assert AdmissionNumberService.reserve(0) == []
+
+
+@pytest.mark.django_db
+def test_numbers_continue_after_a_rollback():
+    first = AdmissionNumberService.allocate()
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            AdmissionNumberService.reserve(3)
+            raise RuntimeError
+
+    assert AdmissionNumberService.allocate() == first + 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_reservations_get_contiguous_blocks():
+    start = AdmissionNumberService.allocate()
+    threads_count, rounds = 8, 25
+    blocks = []
+    errors = []
+    barrier = threading.Barrier(threads_count)
+
+    def allocate(thread_index):
+        try:
+            barrier.wait()
+            for round_index in range(rounds):
+                # Large blocks make interleaving likely if the lock is missing.
+                size = 1 + (thread_index + round_index) % 4 * 500
+                with transaction.atomic():
+                    blocks.append(AdmissionNumberService.reserve(size))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=allocate, args=(index,))
+        for index in range(threads_count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(blocks) == threads_count * rounds
+    numbers = [number for block in blocks for number in block]
+    assert len(numbers) == len(set(numbers))
+    # Every number after ``start`` went to exactly one block.
+    assert sorted(numbers) == list(range(start + 1, start + 1 + len(numbers)))
+    # Each block is a run of consecutive numbers.
+    assert all(
+        block == list(range(block[0], block[0] + len(block))) for block in blocks
+    )
+
+
+@pytest.mark.django_db
+def test_create_student_view_allocates_from_the_sequence(admin_api_client, section):
+    next_number = AdmissionNumberService.allocate() + 1
+
+    for username in ("amy_s", "ben_s"):
+        response = admin_api_client.post(
+            reverse("add-students"),
+            {
+                "class_assigned": section.id,
+                "user": json.dumps(
+                    {
+                        "username": username,
+                        "email": f"{username}@example.com",
+                        "password": "TestPass@123",
+                        "first_name": username.title(),
+                        "last_name": "Student",
+                    }
+                ),
+            },
+            format="multipart",
+        )
+        assert response.status_code == 201, response.data
+
+    assert list(
+        Student.objects.order_by("user__username").values_list(
+            "admission_number", flat=True
+        )
+    ) == [next_number, next_number + 1]
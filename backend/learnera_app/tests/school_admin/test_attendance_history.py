@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date, timedelta
+from django.urls import reverse
+from teachers.models import Attendance
+
+URL = "admin-attendance-history"
+
+
+@pytest.fixture
+def attendance(section, teacher, academic_year, make_student):
+    students = [
+        make_student(name, roll_number=roll)
+        for roll, name in enumerate(["Anu", "Bala", "Chitra"], start=1)
+    ]
+    return Attendance.objects.bulk_create(
+        [
+            Attendance(
+                student=student,
+                section=section,
+                marked_by=teacher,
+                academic_year=academic_year,
+                date=date(2025, 7, 1) + timedelta(days=offset),
+                status="present" if (offset + index) % 2 else "absent",
+            )
+            for offset in range(4)
+            for index, student in enumerate(students)
+        ]
+    )
+
+
+def body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_keyset_pages_walk_history_in_order(admin_api_client, attendance):
+    url = reverse(URL) + "?page_size=5"
+    seen = []
+    while url:
+        response = admin_api_client.get(url)
+        assert response.status_code == 200
+        seen += [(row["date"], row["id"]) for row in response.data["results"]]
+        url = response.data["next"]
+
+    assert len(seen) == len(attendance) == 12
+    assert seen == sorted(
+        seen, key=lambda key: (-date.fromisoformat(key[0]).toordinal(), key[1])
+    )
+
+
+@pytest.mark.django_db
+def test_plain_request_returns_the_first_page(admin_api_client, attendance):
+    response = admin_api_client.get(reverse(URL))
+
+    assert response.status_code == 200
+    assert not response.streaming
+    assert response.data["next"] is None
+    assert len(response.data["results"]) == 12
+
+
+@pytest.mark.django_db
+def test_streamed_exports_match_paginated_rows(admin_api_client, attendance):
+    page = admin_api_client.get(reverse(URL), {"page_size": 100}).data["results"]
+
+    ndjson = admin_api_client.get(reverse(URL), {"export": "ndjson"})
+    assert ndjson.streaming
+    assert [json.loads(line) for line in body(ndjson).splitlines()] == json.loads(
+        json.dumps(page)
+    )
+
+    present = admin_api_client.get(
+        reverse(URL), {"export": "ndjson", "status": "present"}
+    )
+    rows = [json.loads(line) for line in body(present).splitlines()]
+    assert rows == [
+        row for row in json.loads(json.dumps(page)) if row["status"] == "present"
+    ]
+
+    exported = admin_api_client.get(reverse(URL), {"export": "csv"})
+    assert exported["Content-Type"] == "text/csv"
+    lines = list(csv.reader(io.StringIO(body(exported))))
+    assert lines[0] == [
+        "id",
+        "date",
+        "student_name",
+        "roll_number",
+        "class_name",
+        "section_name",
+        "status",
+    ]
+    assert len(lines) == 13
+    assert lines[1][2:6] == [page[0]["student_name"], page[0]["roll_number"], "10", "A"]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_and_export_rejected(admin_api_client, attendance):
+    assert admin_api_client.get(reverse(URL), {"cursor": "nope"}).status_code == 404
+    assert admin_api_client.get(reverse(URL), {"export": "xml"}).status_code == 400
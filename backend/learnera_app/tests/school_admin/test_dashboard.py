@@ -0,0 +1,164 @@
+import pytest
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from school_admin.benchmarks import DashboardBenchmark
+from school_admin.services import DashboardStatsService
+from parents.models import FeeCategory, FeeStructure, StudentFeePayment
+from students.models import Student
+from teachers.models import Attendance, Exam, Subject
+from teachers.services import AttendanceSummaryService
+
+DASHBOARD_URLS = ["dashboard-stats", "fees-stats", "attendance-overview"]
+
+
+@pytest.fixture
+def dashboard_data(academic_year, section, teacher, make_student):
+    students = [make_student(f"Student{i:02d}") for i in range(20)]
+    today = timezone.localdate()
+
+    attendance = [
+        Attendance(
+            student=student,
+            section=section,
+            marked_by=teacher,
+            academic_year=academic_year,
+            date=today - timedelta(days=offset),
+            status=["present", "absent", "late"][(index + offset) % 3],
+        )
+        for offset in range(5)
+        for index, student in enumerate(students)
+    ]
+    Attendance.objects.bulk_create(attendance)
+    AttendanceSummaryService.rebuild()
+
+    fee_structure = FeeStructure.objects.create(
+        academic_year=academic_year,
+        fee_category=FeeCategory.objects.create(name="Tuition"),
+        amount=1000,
+        due_date=today + timedelta(days=10),
+    )
+    StudentFeePayment.objects.bulk_create(
+        [
+            StudentFeePayment(
+                student=student,
+                fee_structure=fee_structure,
+                total_amount=1000,
+                status=["PAID", "PENDING", "OVERDUE"][index % 3],
+                due_date=today + timedelta(days=index),
+            )
+            for index, student in enumerate(students)
+        ]
+    )
+
+    subject = Subject.objects.create(subject_name="Maths")
+    for days in (-3, 2, 4):
+        Exam.objects.create(
+            title=f"Exam {days}",
+            subject=subject,
+            teacher=teacher,
+            class_section=section,
+            total_mark=50,
+            duration=60,
+            start_time=timezone.now() + timedelta(days=days),
+            end_time=timezone.now() + timedelta(days=days, hours=1),
+            meet_link="https://meet.example.com/exam",
+        )
+    return students
+
+
+def load_dashboard(client):
+    with CaptureQueriesContext(connection) as queries:
+        responses = [client.get(reverse(name)) for name in DASHBOARD_URLS]
+    assert all(response.status_code == 200 for response in responses)
+    return responses, len(queries)
+
+
+@pytest.mark.django_db
+def test_dashboard_payload(admin_api_client, dashboard_data):
+    (stats, fees, overview), _ = load_dashboard(admin_api_client)
+
+    assert stats.data["total_students"] == 20
+    assert stats.data["total_teachers"] == 1
+    assert stats.data["total_parents"] == 0
+    assert stats.data["pending_fees"] == 7
+    assert stats.data["attendance"] == {"present": 33, "absent": 34, "late": 33}
+    assert stats.data["fee_collection"] == {"paid": 7, "pending": 7, "overdue": 6}
+    assert stats.data["upcoming_exams"] == 2
+
+    assert fees.data["total_expected"] == 1000
+    assert fees.data["total_pending_amount"] == 7000
+    assert len(fees.data["upcoming_payments"]) == 3
+
+    assert list(overview.data) == [
+        {
+            "section__school_class__class_name": "10",
+            "present": 7,
+            "absent": 7,
+            "late": 6,
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_dashboard_query_counts(admin_api_client, dashboard_data):
+    _, cold_queries = load_dashboard(admin_api_client)
+    _, warm_queries = load_dashboard(admin_api_client)
+    # One authentication lookup per request; the cold load adds the eight
+    # dashboard queries (19 queries in total before caching).
+    assert cold_queries == len(DASHBOARD_URLS) + 8
+    assert warm_queries == len(DASHBOARD_URLS)
+
+
+@pytest.mark.django_db
+def test_dashboard_counts_the_local_day(dashboard_data):
+    # Half past midnight locally is still the previous day in UTC.
+    local_time = datetime.combine(timezone.localdate(), time(0, 30))
+    now = timezone.make_aware(local_time).astimezone(dt_timezone.utc)
+    assert now.date() != local_time.date()
+
+    with patch("django.utils.timezone.now", return_value=now):
+        dashboard = DashboardStatsService.build_dashboard()
+
+    assert dashboard["attendance_overview"] == [
+        {
+            "section__school_class__class_name": "10",
+            "present": 7,
+            "absent": 7,
+            "late": 6,
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_dashboard_cache_invalidated_by_signals(
+    admin_api_client, dashboard_data, django_capture_on_commit_callbacks
+):
+    url = reverse("dashboard-stats")
+    assert admin_api_client.get(url).data["upcoming_exams"] == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Exam.objects.filter(start_time__lt=timezone.now()).update(
+            start_time=timezone.now() + timedelta(days=1)
+        )
+    # Queryset.update() sends no signals, so the cached payload is still served.
+    assert admin_api_client.get(url).data["upcoming_exams"] == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        dashboard_data[0].delete()
+    response = admin_api_client.get(url)
+    assert response.data["total_students"] == 19
+    assert response.data["upcoming_exams"] == 3
+
+
+@pytest.mark.django_db
+def test_benchmark_runs_every_mode():
+    results = DashboardBenchmark(20, repeat=1).run()
+
+    assert [result["mode"] for result in results] == ["legacy", "cold", "warm"]
+    legacy, cold, warm = (result["queries"] for result in results)
+    assert warm < cold < legacy
+    assert not Student.objects.exists()
@@ -0,0 +1,203 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from school_admin import email as email_module
+from school_admin.email import EmailService
+from school_admin.models import EmailOutbox
+
+
+@pytest.fixture(autouse=True)
+def locmem_email(settings):
+    settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    settings.DEFAULT_FROM_EMAIL = "noreply@learnera.test"
+
+
+def queue_welcome(username):
+    EmailService.send_welcome_email(
+        user_type="Student",
+        email=f"{username}@example.com",
+        username=username,
+        set_password_link="https://learnera.test/set-password/",
+    )
+
+
+def statuses_by_recipient():
+    return {
+        to[0]: status for to, status in EmailOutbox.objects.values_list("to", "status")
+    }
+
+
+@pytest.mark.django_db
+def test_welcome_email_is_queued_on_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with transaction.atomic():
+            queue_welcome("alice")
+            assert not EmailOutbox.objects.exists()
+
+    assert len(callbacks) == 1
+    row = EmailOutbox.objects.get()
+    assert row.status == EmailOutbox.STATUS_PENDING
+    assert row.to == ["alice@example.com"]
+    assert "alice" in row.html_body
+    assert mail.outbox == []
+
+
+@pytest.mark.django_db
+def test_rolled_back_transaction_queues_nothing(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with transaction.atomic():
+            queue_welcome("alice")
+            transaction.set_rollback(True)
+
+    assert callbacks == []
+    assert not EmailOutbox.objects.exists()
+
+
+@pytest.mark.django_db
+def test_deliver_pending_sends_batch_over_one_connection(
+    django_capture_on_commit_callbacks, monkeypatch
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        for username in ("alice", "bob", "carol"):
+            queue_welcome(username)
+
+    connections = []
+    get_connection = email_module.get_connection
+
+    def counting_get_connection(*args, **kwargs):
+        connection = get_connection(*args, **kwargs)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(email_module, "get_connection", counting_get_connection)
+
+    assert EmailService.deliver_pending(batch_size=2) == 2
+    assert len(connections) == 1
+    assert EmailService.deliver_pending(batch_size=2) == 1
+    assert EmailService.deliver_pending(batch_size=2) == 0
+
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        "alice@example.com",
+        "bob@example.com",
+        "carol@example.com",
+    ]
+    assert mail.outbox[0].alternatives[0][1] == "text/html"
+    assert not EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).exists()
+
+
+@pytest.mark.django_db
+def test_failed_email_is_retried_with_backoff(
+    django_capture_on_commit_callbacks, monkeypatch
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_welcome("alice")
+
+    def refuse(self, messages):
+        raise ConnectionError("mail server unavailable")
+
+    monkeypatch.setattr(EmailBackend, "send_messages", refuse)
+    started = timezone.now()
+
+    assert EmailService.deliver_pending() == 0
+    row = EmailOutbox.objects.get()
+    assert row.status == EmailOutbox.STATUS_PENDING
+    assert row.attempts == 1
+    assert row.last_error == "mail server unavailable"
+    assert row.next_attempt_at >= started + EmailService.RETRY_DELAY
+
+    # Not due yet, so the next run leaves it alone.
+    assert EmailService.deliver_pending() == 0
+    assert EmailOutbox.objects.get().attempts == 1
+
+    for attempt in range(2, EmailService.MAX_ATTEMPTS + 1):
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        EmailService.deliver_pending()
+        row.refresh_from_db()
+        assert row.attempts == attempt
+
+    assert row.status == EmailOutbox.STATUS_FAILED
+    assert mail.outbox == []
+
+
+@pytest.mark.django_db
+def test_send_queued_emails_command_drains_outbox(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        for index in range(5):
+            queue_welcome(f"student{index}")
+
+    call_command("send_queued_emails", "--batch-size", "2")
+
+    assert len(mail.outbox) == 5
+    assert EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count() == 5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_emails_are_sent_outside_a_transaction(monkeypatch):
+    for username in ("alice", "bob", "carol"):
+        queue_welcome(username)
+
+    send_messages = EmailBackend.send_messages
+    statuses = []
+
+    def send_second_fails(self, messages):
+        # Nothing is locked while we talk to the mail server, and the
+        # earlier sends are already saved.
+        assert not connection.in_atomic_block
+        statuses.append(sorted(EmailOutbox.objects.values_list("status", flat=True)))
+        if messages[0].to == ["bob@example.com"]:
+            raise ConnectionError("mailbox unavailable")
+        return send_messages(self, messages)
+
+    monkeypatch.setattr(EmailBackend, "send_messages", send_second_fails)
+
+    assert EmailService.deliver_pending() == 2
+    assert statuses[1] == ["sending", "sending", "sent"]
+    assert statuses_by_recipient() == {
+        "alice@example.com": "sent",
+        "bob@example.com": "pending",
+        "carol@example.com": "sent",
+    }
+    assert len(mail.outbox) == 2
+
+
+@pytest.mark.django_db
+def test_expired_lease_is_claimed_again(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_welcome("alice")
+        queue_welcome("bob")
+    # A worker claimed both and died; bob's claim used the last attempt.
+    EmailOutbox.objects.update(
+        status=EmailOutbox.STATUS_SENDING,
+        next_attempt_at=timezone.now() - EmailService.LEASE,
+        attempts=1,
+    )
+    EmailOutbox.objects.filter(to=["bob@example.com"]).update(
+        attempts=EmailService.MAX_ATTEMPTS
+    )
+
+    assert EmailService.deliver_pending() == 1
+    assert [message.to for message in mail.outbox] == [["alice@example.com"]]
+    assert statuses_by_recipient() == {
+        "alice@example.com": "sent",
+        "bob@example.com": "failed",
+    }
+
+
+@pytest.mark.django_db
+def test_claimed_email_is_left_alone_during_its_lease(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_welcome("alice")
+    EmailOutbox.objects.update(
+        status=EmailOutbox.STATUS_SENDING,
+        next_attempt_at=timezone.now() + EmailService.LEASE,
+    )
+
+    assert EmailService.deliver_pending() == 0
+    assert mail.outbox == []
@@ -0,0 +1,101 @@
+import pytest
+from django.template import TemplateDoesNotExist
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from learnera_app import email_templates
+from learnera_app.email_templates import clear_email_templates, get_email_template
+from school_admin.email import EmailService
+
+
+@pytest.fixture(autouse=True)
+def fresh_templates(settings):
+    settings.DEFAULT_FROM_EMAIL = "noreply@learnera.test"
+    clear_email_templates()
+    yield
+    clear_email_templates()
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    calls = {"get_template": 0, "strip_tags": 0}
+
+    def wrap(name, function):
+        def counting(*args, **kwargs):
+            calls[name] += 1
+            return function(*args, **kwargs)
+
+        monkeypatch.setattr(email_templates, name, counting)
+
+    wrap("get_template", email_templates.get_template)
+    wrap("strip_tags", email_templates.strip_tags)
+    return calls
+
+
+def welcome_context(username):
+    return {
+        "username": username,
+        "set_password_link": f"https://learnera.test/set-password/{username}/",
+    }
+
+
+def test_render_matches_uncached_rendering():
+    context = {"app_name": "Learnera", "user_type": "Student"}
+    template = get_email_template(
+        "emails/welcome_email.html",
+        fields=("username", "set_password_link"),
+        **context,
+    )
+
+    html, plain = template.render(welcome_context("alice"))
+
+    expected = render_to_string(
+        "emails/welcome_email.html", {**context, **welcome_context("alice")}
+    )
+    assert html == expected
+    assert plain == strip_tags(expected)
+
+
+def test_bulk_welcome_emails_compile_and_strip_once(counted):
+    recipients = [
+        {"email": f"student{index}@example.com", **welcome_context(f"student{index}")}
+        for index in range(20)
+    ]
+
+    messages = EmailService.build_welcome_emails("Student", recipients)
+    messages += EmailService.build_welcome_emails("Student", recipients[:5])
+
+    assert counted == {"get_template": 1, "strip_tags": 1}
+    assert len(messages) == 25
+    assert messages[3].to == ["student3@example.com"]
+    assert "Username: student3" in " ".join(messages[3].body.split())
+    assert "student3" in messages[3].alternatives[0][0]
+    assert "student4" not in messages[3].body
+
+
+def test_shared_context_gets_its_own_template(counted):
+    EmailService.build_welcome_emails("Student", [])
+    EmailService.build_welcome_emails("Teacher", [])
+
+    assert counted["strip_tags"] == 2
+
+
+def test_missing_template_is_remembered(counted):
+    for _ in range(3):
+        with pytest.raises(TemplateDoesNotExist):
+            get_email_template("emails/missing.html", fields=("otp",))
+
+    assert counted["get_template"] == 1
+
+
+def test_render_requires_every_field():
+    template = get_email_template(
+        "emails/welcome_email.html", fields=("username", "set_password_link")
+    )
+
+    with pytest.raises(KeyError):
+        template.render({"username": "alice"})
+
+
+def test_invalid_user_type():
+    with pytest.raises(ValueError):
+        EmailService.build_welcome_emails("Admin", [])
@@ -0,0 +1,97 @@
+import pytest
+from django.contrib.auth.models import update_last_login
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from learnera_app.settings import redis_db_url
+from parents.models import FeeCategory
+from teachers.models import Subject
+
+
+def get_list(client, name):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse(name))
+    assert response.status_code == 200
+    return response.data, len(queries)
+
+
+@pytest.mark.django_db
+def test_subject_list_served_from_cache_until_changed(
+    admin_api_client, django_capture_on_commit_callbacks
+):
+    Subject.objects.create(subject_name="Maths")
+    first, cold_queries = get_list(admin_api_client, "subjects")
+    cached, warm_queries = get_list(admin_api_client, "subjects")
+
+    assert cached == first
+    # Only the JWT user lookup is left once the list is cached.
+    assert warm_queries == cold_queries - 1 == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = admin_api_client.post(
+            reverse("subjects"), {"subject_name": "Physics"}, format="json"
+        )
+    assert response.status_code == 201
+
+    subjects, _ = get_list(admin_api_client, "subjects")
+    assert [s["subject_name"] for s in subjects] == ["Maths", "Physics"]
+
+
+@pytest.mark.django_db
+def test_class_list_invalidated_by_related_models(
+    admin_api_client, section, django_capture_on_commit_callbacks
+):
+    classes, _ = get_list(admin_api_client, "class-list")
+    assert classes[0]["sections"][0]["section_name"] == "A"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        section.section_name = "B"
+        section.save()
+
+    classes, _ = get_list(admin_api_client, "class-list")
+    assert classes[0]["sections"][0]["section_name"] == "B"
+
+
+@pytest.mark.django_db
+def test_fee_category_delete_invalidates_cache(
+    admin_api_client, django_capture_on_commit_callbacks
+):
+    category = FeeCategory.objects.create(name="Tuition")
+    categories, _ = get_list(admin_api_client, "fee-category")
+    assert len(categories) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        admin_api_client.delete(reverse("fee-category-detail", args=[category.pk]))
+
+    categories, _ = get_list(admin_api_client, "fee-category")
+    assert categories == []
+
+
+@pytest.mark.django_db
+def test_class_list_only_invalidated_by_teacher_name_changes(
+    admin_api_client, section, django_capture_on_commit_callbacks
+):
+    teacher = section.class_teacher.user
+    get_list(admin_api_client, "class-list")
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        update_last_login(None, teacher)
+    assert callbacks == []
+    _, warm_queries = get_list(admin_api_client, "class-list")
+    assert warm_queries == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        teacher.first_name = "Renamed"
+        teacher.save(update_fields=["first_name"])
+
+    classes, _ = get_list(admin_api_client, "class-list")
+    assert classes[0]["sections"][0]["class_teacher_info"]["name"] == "Renamed "
+
+
+def test_redis_db_url_replaces_the_database():
+    assert redis_db_url("redis://cache:6379", 1) == "redis://cache:6379/1"
+    assert redis_db_url("redis://cache:6379/0", 1) == "redis://cache:6379/1"
+    assert (
+        redis_db_url("rediss://:secret@cache:6380/2?ssl_cert_reqs=none&db=2", 1)
+        == "rediss://:secret@cache:6380/1?ssl_cert_reqs=none"
+    )
@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from school_admin.benchmarks import RollNumberBenchmark
+from school_admin.services import RollNumberService
+from students.models import Student
+from teachers.models import Section
+
+
+def roll_numbers(section):
+    return list(
+        Student.objects.filter(class_assigned=section)
+        .order_by("roll_number")
+        .values_list("user__first_name", "roll_number")
+    )
+
+
+def reorder(section, academic_year):
+    with CaptureQueriesContext(connection) as queries:
+        changed = RollNumberService.reorder([section.id], academic_year.id)
+    return changed, len(queries)
+
+
+@pytest.mark.django_db
+def test_reorder_numbers_section_by_name(section, academic_year, make_student):
+    for index, name in enumerate(["Cara", "Abel", "Bea"], start=1):
+        make_student(name, roll_number=index)
+
+    changed, _ = reorder(section, academic_year)
+
+    assert changed == 3
+    assert roll_numbers(section) == [("Abel", 1), ("Bea", 2), ("Cara", 3)]
+    assert reorder(section, academic_year)[0] == 0
+
+
+@pytest.mark.django_db
+def test_reorder_shifts_every_student_in_one_update(
+    section, academic_year, make_student
+):
+    for index in range(1, 6):
+        make_student(f"Name{index}", roll_number=index)
+    make_student("Aaron")
+
+    changed, small_queries = reorder(section, academic_year)
+    assert changed == 6
+    assert roll_numbers(section)[:2] == [("Aaron", 1), ("Name1", 2)]
+
+    for index in range(6, 30):
+        make_student(f"Name{index:02d}")
+    make_student("Aardvark")
+    _, large_queries = reorder(section, academic_year)
+
+    assert large_queries == small_queries
+    assert [roll for _, roll in roll_numbers(section)] == list(range(1, 32))
+
+
+@pytest.mark.django_db
+def test_reorder_keeps_sections_apart(section, academic_year, make_student):
+    other = Section.objects.create(
+        school_class=section.school_class,
+        section_name="B",
+        academic_year=academic_year,
+    )
+    make_student("Zed")
+    Student.objects.filter(pk=make_student("Amy").pk).update(class_assigned=other)
+    make_student("Bob")
+
+    RollNumberService.reorder([section.id, other.id], academic_year.id)
+
+    assert roll_numbers(section) == [("Bob", 1), ("Zed", 2)]
+    assert roll_numbers(other) == [("Amy", 1)]
+
+
+@pytest.mark.django_db
+def test_assign_roll_number_returns_the_new_number(
+    section, academic_year, make_student
+):
+    make_student("Bea", roll_number=1)
+    student = make_student("Abel")
+
+    assert RollNumberService.assign_roll_number(student, section, academic_year) == 1
+    assert roll_numbers(section) == [("Abel", 1), ("Bea", 2)]
+
+
+@pytest.mark.django_db
+def test_benchmark_runs_both_modes():
+    results = RollNumberBenchmark(20, repeat=1).run()
+
+    assert [result["mode"] for result in results] == ["legacy", "window"]
+    assert results[1]["queries"] < results[0]["queries"]
+    assert not Student.objects.exists()
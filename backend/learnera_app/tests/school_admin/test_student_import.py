@@ -0,0 +1,165 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from parents.models import Parent, StudentParentRelationship
+from school_admin.models import EmailOutbox
+from students.models import Student
+
+User = get_user_model()
+
+HEADER = ",".join(
+    [
+        "username",
+        "email",
+        "first_name",
+        "last_name",
+        "class_name",
+        "section_name",
+        "date_of_birth",
+        "father_username",
+    ]
+)
+
+
+def csv_upload(*lines, name="students.csv"):
+    content = "\n".join((HEADER,) + lines) + "\n"
+    return SimpleUploadedFile(name, content.encode(), content_type="text/csv")
+
+
+def import_students(client, upload):
+    return client.post(reverse("import-students"), {"file": upload}, format="multipart")
+
+
+@pytest.fixture
+def father():
+    return Parent.objects.create(
+        user=User.objects.create_user(
+            username="paul_parent",
+            password="TestPass@123",
+            email="paul@example.com",
+            is_parent=True,
+        ),
+        occupation="Engineer",
+    )
+
+
+@pytest.mark.django_db
+def test_import_creates_students_in_bulk(
+    admin_api_client, section, make_student, father, django_capture_on_commit_callbacks
+):
+    make_student("Mia")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = import_students(
+            admin_api_client,
+            csv_upload(
+                "zoe_s,zoe@example.com,Zoe,Smith,10,A,2012-04-01,paul_parent",
+                "adam_s,adam@example.com,Adam,Stone,10,A,,",
+                "",
+                "lena_s,lena@example.com,Lena,Stark,10,A,,",
+            ),
+        )
+
+    assert response.status_code == 201, response.data
+    assert response.data["created"] == 3
+    assert response.data["errors"] == []
+    assert [row["row"] for row in response.data["students"]] == [2, 3, 5]
+    admission_numbers = [row["admission_number"] for row in response.data["students"]]
+    first = admission_numbers[0]
+    assert admission_numbers == [first, first + 1, first + 2]
+    # Alphabetical by first name, existing students included.
+    assert [row["roll_number"] for row in response.data["students"]] == [4, 1, 2]
+    assert Student.objects.get(user__username="mia_student").roll_number == 3
+
+    zoe = User.objects.get(username="zoe_s")
+    assert zoe.is_student and not zoe.has_usable_password()
+    assert str(zoe.date_of_birth) == "2012-04-01"
+    assert StudentParentRelationship.objects.get(student__user=zoe).parent == father
+
+    section.refresh_from_db()
+    assert section.available_students == 3
+    assert sorted(EmailOutbox.objects.values_list("to", flat=True)) == [
+        ["adam@example.com"],
+        ["lena@example.com"],
+        ["zoe@example.com"],
+    ]
+
+
+@pytest.mark.django_db
+def test_import_reports_every_bad_row_and_creates_nothing(
+    admin_api_client, section, make_student
+):
+    make_student("Mia")
+
+    response = import_students(
+        admin_api_client,
+        csv_upload(
+            "zoe_s,zoe@example.com,Zoe,Smith,10,A,,",
+            "zoe_s,zoe2@example.com,Zoe,Second,10,A,,",
+            "ann_s,mia.student@example.com,Ann,Smith,10,A,,",
+            "ben_s,ben@example.com,Ben,Smith,10,Z,,",
+            "cal_s,not-an-email,Cal,Smith,10,A,31-12-2012,",
+            "dan_s,dan@example.com,Dan,Smith,10,A,,nobody",
+        ),
+    )
+
+    assert response.status_code == 400
+    assert response.data["rows"] == 6
+    assert response.data["created"] == 0
+    errors = {row["row"]: set(row["errors"]) for row in response.data["errors"]}
+    assert errors == {
+        3: {"username"},
+        4: {"email"},
+        5: {"class_assigned"},
+        6: {"email", "date_of_birth"},
+        7: {"father_username"},
+    }
+    assert not User.objects.filter(username="zoe_s").exists()
+    assert Student.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_import_respects_section_capacity(admin_api_client, section):
+    section.student_count = 1
+    section.save()
+
+    response = import_students(
+        admin_api_client,
+        csv_upload(
+            "s1,s1@example.com,Sam,Smith,10,A,,",
+            "s2,s2@example.com,Sue,Smith,10,A,,",
+        ),
+    )
+
+    assert response.status_code == 400
+    assert [row["row"] for row in response.data["errors"]] == [3]
+    assert "maximum student limit" in str(response.data["errors"][0]["errors"])
+
+
+@pytest.mark.django_db
+def test_import_rejects_other_file_types(admin_api_client, section):
+    response = import_students(
+        admin_api_client, csv_upload("s1,s1@example.com,Sam,Smith,10,A,,", name="a.txt")
+    )
+
+    assert response.status_code == 400
+    assert response.data == {"error": "Upload a .csv or .xlsx file."}
+
+
+@pytest.mark.django_db
+def test_import_reads_xlsx(admin_api_client, section, tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Username", "Email", "First Name", "Last Name", "Class Assigned"])
+    sheet.append(["s1", "s1@example.com", "Sam", "Smith", section.id])
+    path = tmp_path / "students.xlsx"
+    workbook.save(path)
+
+    response = import_students(
+        admin_api_client, SimpleUploadedFile("students.xlsx", path.read_bytes())
+    )
+
+    assert response.status_code == 201, response.data
+    assert Student.objects.get().class_assigned == section
@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from parents.models import Parent, StudentParentRelationship
+
+User = get_user_model()
+
+
+def add_parents(student):
+    for relationship_type in ("Father", "Mother"):
+        name = f"{student.user.first_name}{relationship_type}"
+        parent = Parent.objects.create(
+            user=User.objects.create_user(
+                username=name.lower(),
+                password="TestPass@123",
+                email=f"{name.lower()}@example.com",
+                first_name=name,
+                last_name="Parent",
+                is_parent=True,
+            ),
+            occupation="Engineer",
+        )
+        StudentParentRelationship.objects.create(
+            parent=parent, student=student, relationship_type=relationship_type
+        )
+
+
+def list_students(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("show-students"))
+    assert response.status_code == 200
+    return response.data["results"], len(queries)
+
+
+@pytest.mark.django_db
+def test_show_students_query_count_is_constant(admin_api_client, make_student):
+    for index in range(2):
+        add_parents(make_student(f"First{index}", roll_number=index + 1))
+    small_page, small_queries = list_students(admin_api_client)
+
+    for index in range(2, 10):
+        add_parents(make_student(f"First{index}", roll_number=index + 1))
+    full_page, full_queries = list_students(admin_api_client)
+
+    assert len(small_page) == 2
+    assert len(full_page) == 10
+    assert full_queries == small_queries
+    assert full_page[0]["class_assigned"]["class_name"] == "10"
+    assert full_page[0]["parents"] == [
+        {"parent_name": "First0Father Parent", "relationship_type": "Father"},
+        {"parent_name": "First0Mother Parent", "relationship_type": "Mother"},
+    ]
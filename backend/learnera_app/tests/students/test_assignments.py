@@ -0,0 +1,76 @@
+import pytest
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from teachers.models import Assignment, AssignmentSubmission, Subject
+
+
+@pytest.fixture
+def student(make_student):
+    return make_student("Anu")
+
+
+@pytest.fixture
+def student_client(client, student):
+    access = RefreshToken.for_user(student.user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+    return client
+
+
+def create_assignments(count, section, teacher):
+    subject = Subject.objects.create(subject_name="Maths")
+    return [
+        Assignment.objects.create(
+            title=f"Assignment {index}",
+            description="Solve the problems",
+            status="published",
+            subject=subject,
+            class_section=section,
+            teacher=teacher,
+            last_date=timezone.now() + timedelta(days=7),
+        )
+        for index in range(count)
+    ]
+
+
+def list_assignments(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("student-assignment"))
+    assert response.status_code == 200
+    return response.data, len(queries)
+
+
+@pytest.mark.django_db
+def test_assignment_list_resolves_submissions_from_prefetch(
+    student_client, student, section, teacher, make_student
+):
+    assignments = create_assignments(2, section, teacher)
+    _, small_queries = list_assignments(student_client)
+
+    assignments += create_assignments(6, section, teacher)
+    submission = AssignmentSubmission.objects.create(
+        assignment=assignments[0],
+        student=student,
+        is_submitted=True,
+        work_file="student_assignments/work.pdf",
+        grade=8,
+    )
+    AssignmentSubmission.objects.create(
+        assignment=assignments[1],
+        student=make_student("Bala"),
+        is_submitted=True,
+        work_file="student_assignments/other.pdf",
+    )
+    data, full_queries = list_assignments(student_client)
+
+    assert len(data) == 8
+    assert full_queries == small_queries
+    by_id = {item["id"]: item for item in data}
+    assert by_id[assignments[0].id]["is_submitted"] is True
+    assert by_id[assignments[0].id]["submission_id"] == submission.id
+    assert by_id[assignments[0].id]["grade"] == 8
+    assert by_id[assignments[1].id]["is_submitted"] is False
+    assert by_id[assignments[1].id]["submission_id"] is None
@@ -0,0 +1,160 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from teachers.models import Question, StudentExam
+from teachers.serializers import StudentExamSerializer
+
+
+@pytest.fixture
+def student(make_student):
+    return make_student("Anu")
+
+
+@pytest.fixture
+def student_client(client, student):
+    access = RefreshToken.for_user(student.user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+    return client
+
+
+@pytest.fixture
+def student_exam(exam, student):
+    return StudentExam.objects.create(
+        exam=exam, student=student, status="IN_PROGRESS", start_time=timezone.now()
+    )
+
+
+def choice(question, correct):
+    return question.choice_questions.get(is_correct=correct).id
+
+
+@pytest.mark.django_db
+def test_submit_exam_scores_mcq_answers(student_client, exam, student_exam):
+    mcq_1, mcq_2, mcq_3, essay = exam.exam_questions.all()
+    payload = {
+        "answers": [
+            {"question": mcq_1.id, "selected_choice": choice(mcq_1, True)},
+            {"question": mcq_2.id, "selected_choice": choice(mcq_2, False)},
+            {"question": mcq_3.id},
+            {"question": essay.id, "answer_text": "Because"},
+        ]
+    }
+    with CaptureQueriesContext(connection) as queries:
+        response = student_client.post(
+            reverse("submit-exam", args=[exam.id]), payload, format="json"
+        )
+
+    assert response.status_code == 200
+    marks = {a["question"]: a["marks_obtained"] for a in response.data["answers"]}
+    assert marks == {
+        mcq_1.id: "5.00",
+        mcq_2.id: "0.00",
+        mcq_3.id: "0.00",
+        essay.id: None,
+    }
+    student_exam.refresh_from_db()
+    assert student_exam.status == "SUBMITTED"
+    # Questions and choices are loaded once however many answers are submitted.
+    question_queries = [
+        q for q in queries.captured_queries if 'FROM "teachers_question"' in q["sql"]
+    ]
+    assert len(question_queries) <= 2
+
+
+@pytest.mark.django_db
+def test_submit_exam_rejects_invalid_answers_without_writing(
+    student_client, exam, student_exam
+):
+    mcq_1, mcq_2, *_ = exam.exam_questions.all()
+    payload = {
+        "answers": [
+            {"question": mcq_1.id, "selected_choice": choice(mcq_1, True)},
+            {"question": mcq_2.id, "selected_choice": choice(mcq_1, False)},
+            {"question": 999999, "answer_text": "?"},
+        ]
+    }
+    response = student_client.post(
+        reverse("submit-exam", args=[exam.id]), payload, format="json"
+    )
+
+    assert response.status_code == 400
+    assert [error["question"] for error in response.data["details"]] == [
+        mcq_2.id,
+        999999,
+    ]
+    student_exam.refresh_from_db()
+    assert student_exam.status == "IN_PROGRESS"
+    assert not student_exam.student_answers.exists()
+
+
+@pytest.mark.django_db
+def test_opening_exam_prewarms_rows_and_paper(
+    student_client, student, make_student, exam, django_capture_on_commit_callbacks
+):
+    classmate = make_student("Bala")
+    with django_capture_on_commit_callbacks(execute=True):
+        exam.status = "ONGOING"
+        exam.save()
+
+    assert set(
+        StudentExam.objects.filter(exam=exam).values_list("student_id", flat=True)
+    ) == {student.id, classmate.id}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = student_client.get(reverse("student-detail-list", args=[exam.id]))
+    assert response.status_code == 200
+    assert not any("teachers_question" in q["sql"] for q in queries.captured_queries)
+
+    paper = response.json()
+    assert paper["total_questions"] == 4
+    assert len(paper["question"]) == 4
+    for question in paper["question"]:
+        for choice in question["choices"]:
+            assert set(choice) == {"id", "choice_text"}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = student_client.post(reverse("start-exam", args=[exam.id]))
+    assert response.status_code == 200
+    assert response.data["status"] == "IN_PROGRESS"
+    assert response.data["progress"] == "0/4"
+    assert set(response.data) == set(StudentExamSerializer.Meta.fields)
+    assert [q["sql"].split()[0] for q in queries.captured_queries].count("UPDATE") == 1
+    assert StudentExam.objects.get(exam=exam, student=student).status == "IN_PROGRESS"
+
+    response = student_client.post(reverse("start-exam", args=[exam.id]))
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_only_status_changes_prewarm_the_exam(
+    student, exam, django_capture_on_commit_callbacks
+):
+    # Creating the exam (published by default) does not prewarm it.
+    assert not StudentExam.objects.filter(exam=exam).exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        exam.title = "Renamed"
+        exam.save()
+    assert not StudentExam.objects.filter(exam=exam).exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        exam.status = "ONGOING"
+        exam.save()
+    assert StudentExam.objects.filter(exam=exam, student=student).exists()
+
+
+@pytest.mark.django_db
+def test_exam_paper_refreshed_when_questions_change(
+    student_client, exam, django_capture_on_commit_callbacks
+):
+    url = reverse("student-detail-list", args=[exam.id])
+    assert student_client.get(url).json()["total_questions"] == 4
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Question.objects.create(
+            exam=exam, question_text="More", question_type="ESSAY", marks=5, order=5
+        )
+    assert student_client.get(url).json()["total_questions"] == 5
@@ -0,0 +1,110 @@
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from teachers.models import (
+    Attendance,
+    AttendanceDailySummary,
+    AttendanceMonthlySummary,
+)
+
+
+@pytest.fixture
+def teacher_client(client, teacher):
+    access = RefreshToken.for_user(teacher.user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+    return client
+
+
+@pytest.fixture
+def students(make_student):
+    return [make_student(name) for name in ["Anu", "Bala", "Chitra"]]
+
+
+def mark(client, day, students, statuses):
+    payload = {
+        "date": day.isoformat(),
+        "attendance_data": [
+            {"student": student.id, "status": status}
+            for student, status in zip(students, statuses)
+        ],
+    }
+    return client.post(reverse("mark-attendance"), payload, format="json")
+
+
+@pytest.mark.django_db
+def test_mark_attendance_updates_rollups(teacher_client, section, students):
+    mark(teacher_client, date(2025, 7, 1), students, ["present", "absent", "late"])
+    response = mark(
+        teacher_client, date(2025, 7, 2), students, ["present", "present", "late"]
+    )
+
+    assert response.status_code == 201
+    assert AttendanceDailySummary.objects.filter(section=section).count() == 2
+
+    monthly = AttendanceMonthlySummary.objects.get(section=section)
+    assert monthly.month == date(2025, 7, 1)
+    assert monthly.academic_year_id == section.academic_year_id
+    assert (monthly.present_count, monthly.absent_count, monthly.late_count) == (
+        3,
+        1,
+        2,
+    )
+
+
+@pytest.mark.django_db
+def test_attendance_edit_and_delete_refresh_rollups(teacher_client, section, students):
+    mark(teacher_client, date(2025, 7, 1), students, ["present", "absent", "late"])
+
+    record = Attendance.objects.get(student=students[1], date=date(2025, 7, 1))
+    record.status = "present"
+    record.save()
+
+    daily = AttendanceDailySummary.objects.get(section=section)
+    assert (daily.present_count, daily.absent_count) == (2, 0)
+
+    Attendance.objects.filter(section=section).delete()
+    assert not AttendanceDailySummary.objects.exists()
+    assert not AttendanceMonthlySummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_rollups(teacher_client, section, students):
+    mark(teacher_client, date(2025, 7, 1), students, ["present", "absent", "late"])
+    mark(teacher_client, date(2025, 8, 4), students, ["late", "absent", "absent"])
+
+    def snapshot():
+        return sorted(
+            AttendanceMonthlySummary.objects.values_list(
+                "section_id", "month", "present_count", "absent_count", "late_count"
+            )
+        )
+
+    incremental = snapshot()
+    AttendanceMonthlySummary.objects.all().delete()
+    call_command("rebuild_attendance_summary")
+
+    assert snapshot() == incremental
+    assert AttendanceDailySummary.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_monthly_statistics_reads_rollups(teacher_client, section, students):
+    mark(teacher_client, date(2025, 7, 1), students, ["present", "absent", "late"])
+    mark(teacher_client, date(2025, 7, 2), students, ["present", "present", "late"])
+
+    response = teacher_client.get(reverse("monthly-statistics"), {"year": "2025"})
+
+    assert response.status_code == 200
+    assert len(response.data) == 1
+    assert response.data[0]["present_count"] == 3
+    assert response.data[0]["late_count"] == 2
+    assert response.data[0]["total_students"] == 3
+
+    # 2025-07-01 is a Tuesday, so only one marked day matches.
+    response = teacher_client.get(
+        reverse("monthly-statistics"), {"year": "2025", "weekday": "2"}
+    )
+    assert response.data[0]["present_count"] == 1
+    assert response.data[0]["absent_count"] == 1
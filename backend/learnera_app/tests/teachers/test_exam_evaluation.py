@@ -0,0 +1,195 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from teachers.models import StudentAnswer, StudentExam
+
+
+@pytest.fixture
+def teacher_client(client, teacher):
+    access = RefreshToken.for_user(teacher.user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+    return client
+
+
+@pytest.fixture
+def submitted_exams(exam, make_student):
+    mcq, *_, essay = exam.exam_questions.all()
+    right_choice = mcq.choice_questions.get(is_correct=True)
+    student_exams = []
+    for name in ("Anu", "Bala", "Chitra"):
+        student_exam = StudentExam.objects.create(
+            exam=exam,
+            student=make_student(name),
+            status="SUBMITTED",
+            start_time=timezone.now(),
+            submit_time=timezone.now(),
+        )
+        StudentAnswer.objects.create(
+            student_exam=student_exam,
+            question=mcq,
+            selected_choice=right_choice,
+            marks_obtained=5,
+        )
+        StudentAnswer.objects.create(
+            student_exam=student_exam, question=essay, answer_text="Because"
+        )
+        student_exams.append(student_exam)
+    return student_exams
+
+
+def essay_answer(student_exam):
+    return student_exam.student_answers.get(question__question_type="ESSAY")
+
+
+@pytest.mark.django_db
+def test_evaluate_exam_totals_all_answers(teacher_client, submitted_exams):
+    student_exam = submitted_exams[0]
+    answer = essay_answer(student_exam)
+
+    response = teacher_client.patch(
+        reverse("evaluate-answer", args=[student_exam.id]),
+        {
+            "answers": [
+                {"id": answer.id, "marks_obtained": 3, "evaluation_comment": "Good"}
+            ]
+        },
+        format="json",
+    )
+
+    assert response.status_code == 200
+    # The MCQ marks given at submission count towards the total.
+    assert response.data["total_score"] == 8.0
+    assert response.data["answers"][0]["evaluation_comment"] == "Good"
+    student_exam.refresh_from_db()
+    assert student_exam.status == "EVALUATED"
+    answer.refresh_from_db()
+    assert answer.evaluated_by.user.username == "test_teacher"
+
+
+@pytest.mark.django_db
+def test_batch_evaluation_uses_constant_queries(teacher_client, submitted_exams):
+    payload = {
+        "evaluations": [
+            {
+                "student_exam": student_exam.id,
+                "answers": [
+                    {"id": essay_answer(student_exam).id, "marks_obtained": marks}
+                ],
+            }
+            for student_exam, marks in zip(submitted_exams, [1, 2, 4])
+        ]
+    }
+
+    with CaptureQueriesContext(connection) as queries:
+        response = teacher_client.post(
+            reverse("evaluate-answers-batch"), payload, format="json"
+        )
+
+    assert response.status_code == 200
+    assert [r["total_score"] for r in response.data["results"]] == [6.0, 7.0, 9.0]
+    updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 2
+
+
+@pytest.mark.django_db
+def test_evaluation_rejects_marks_above_question_maximum(
+    teacher_client, submitted_exams
+):
+    student_exam = submitted_exams[0]
+    response = teacher_client.patch(
+        reverse("evaluate-answer", args=[student_exam.id]),
+        {"answers": [{"id": essay_answer(student_exam).id, "marks_obtained": 9}]},
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["detail"] == "Marks cannot exceed maximum marks: 5"
+    student_exam.refresh_from_db()
+    assert student_exam.status == "SUBMITTED"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "marks, reason",
+    [
+        ("NaN", "A valid number is required."),
+        ("Infinity", "A valid number is required."),
+        ("five", "A valid number is required."),
+        ("2.125", "Ensure that there are no more than 2 decimal places."),
+        (
+            "1234",
+            "Ensure that there are no more than 3 digits before the decimal point.",
+        ),
+    ],
+)
+def test_evaluation_rejects_invalid_marks(
+    teacher_client, submitted_exams, marks, reason
+):
+    student_exam = submitted_exams[0]
+    response = teacher_client.patch(
+        reverse("evaluate-answer", args=[student_exam.id]),
+        {"answers": [{"id": essay_answer(student_exam).id, "marks_obtained": marks}]},
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["detail"] == f"Invalid marks: {reason}"
+    student_exam.refresh_from_db()
+    assert student_exam.status == "SUBMITTED"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("batch", [False, True])
+def test_evaluation_of_unsubmitted_exam_is_not_found(
+    teacher_client, submitted_exams, batch
+):
+    student_exam = submitted_exams[0]
+    answers = [{"id": essay_answer(student_exam).id, "marks_obtained": 3}]
+    student_exam.status = "IN_PROGRESS"
+    student_exam.save()
+
+    if batch:
+        response = teacher_client.post(
+            reverse("evaluate-answers-batch"),
+            {"evaluations": [{"student_exam": student_exam.id, "answers": answers}]},
+            format="json",
+        )
+    else:
+        response = teacher_client.patch(
+            reverse("evaluate-answer", args=[student_exam.id]),
+            {"answers": answers},
+            format="json",
+        )
+
+    assert response.status_code == 404
+    missing = teacher_client.patch(
+        reverse("evaluate-answer", args=[999999]), {"answers": answers}, format="json"
+    )
+    assert missing.status_code == 404
+
+
+@pytest.mark.django_db
+def test_batch_evaluation_rejects_duplicate_exams(teacher_client, submitted_exams):
+    student_exam = submitted_exams[0]
+    answer_id = essay_answer(student_exam).id
+    response = teacher_client.post(
+        reverse("evaluate-answers-batch"),
+        {
+            "evaluations": [
+                {
+                    "student_exam": student_exam.id,
+                    "answers": [{"id": answer_id, "marks_obtained": marks}],
+                }
+                for marks in (1, 4)
+            ]
+        },
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["detail"] == f"Duplicate student_exam id: {student_exam.id}"
+    student_exam.refresh_from_db()
+    assert student_exam.status == "SUBMITTED"
@@ -0,0 +1,71 @@
+import pytest
+from datetime import date
+from django.urls import reverse
+from teachers.models import CalendarDay, SchoolCalendar, WorkingDayIndex
+from teachers.services import SchoolCalendarService
+
+
+@pytest.mark.django_db
+def test_months_without_calendar_fall_back_to_weekdays():
+    # July 2025 starts on a Tuesday: 23 weekdays, 4 Mondays, 5 Tuesdays.
+    assert SchoolCalendarService.working_days(2025, 7) == 23
+    assert SchoolCalendarService.working_days(2025, 7, "1") == 4
+    assert SchoolCalendarService.working_days(2025, 7, "2") == 5
+    assert SchoolCalendarService.working_days(2025, 7, "6") == 0
+
+
+@pytest.mark.django_db
+def test_calendar_days_update_working_day_index(
+    admin_api_client, academic_year, django_capture_on_commit_callbacks
+):
+    url = reverse("school-calendar-days")
+    response = admin_api_client.post(
+        url,
+        {"date": "2025-08-15", "day_type": "HOLIDAY", "description": "Independence"},
+        format="json",
+    )
+    assert response.status_code == 201
+    admin_api_client.post(
+        url, {"date": "2025-08-09", "day_type": "WORKING_SATURDAY"}, format="json"
+    )
+
+    school_calendar = SchoolCalendar.objects.get(academic_year=academic_year)
+    assert WorkingDayIndex.objects.filter(calendar=school_calendar).count() == 10
+
+    # August 2025 has 21 weekdays; one holiday (Friday) and one working Saturday.
+    assert (
+        SchoolCalendarService.working_days(2025, 8, academic_year=academic_year) == 21
+    )
+    assert SchoolCalendarService.working_days(2025, 8, "5", academic_year) == 4
+    assert SchoolCalendarService.working_days(2025, 8, "6", academic_year) == 1
+
+    holiday = CalendarDay.objects.get(date=date(2025, 8, 15))
+    with django_capture_on_commit_callbacks(execute=True):
+        response = admin_api_client.delete(
+            reverse("school-calendar-day-detail", args=[holiday.pk])
+        )
+    assert response.status_code == 204
+    assert (
+        SchoolCalendarService.working_days(2025, 8, academic_year=academic_year) == 22
+    )
+
+
+@pytest.mark.django_db
+def test_calendar_day_validation(admin_api_client, academic_year):
+    url = reverse("school-calendar-days")
+    not_saturday = admin_api_client.post(
+        url, {"date": "2025-08-11", "day_type": "WORKING_SATURDAY"}, format="json"
+    )
+    outside_year = admin_api_client.post(
+        url, {"date": "2026-05-01", "day_type": "HOLIDAY"}, format="json"
+    )
+    assert not_saturday.status_code == 400
+    assert outside_year.status_code == 400
+
+    admin_api_client.post(
+        url, {"date": "2025-08-15", "day_type": "HOLIDAY"}, format="json"
+    )
+    duplicate = admin_api_client.post(
+        url, {"date": "2025-08-15", "day_type": "HOLIDAY"}, format="json"
+    )
+    assert duplicate.status_code == 400
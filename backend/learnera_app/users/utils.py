@@ -1,8 +1,7 @@
 import random
 from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from learnera_app.email_templates import get_email_template
 from loguru import logger
 
 
@@ -24,8 +23,13 @@ def send_otp(email, otp, purpose="Verification"):
         }
 
         try:
-            html_message = render_to_string("emails/otp_email.html", context)
-            plain_message = strip_tags(html_message)
+            html_message, plain_message = get_email_template(
+                "emails/otp_email.html",
+                fields=("otp",),
+                purpose=purpose,
+                app_name=context["app_name"],
+                support_email=context["support_email"],
+            ).render({"otp": otp})
         except:
             plain_message = f"""
 Hello,
@@ -44,19 +48,19 @@ If you need help, contact us at {context['support_email']}
             """.strip()
             html_message = None
 
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=getattr(
-                    settings, "DEFAULT_FROM_EMAIL", "learnerapp999@gmail.com"
-                ),
-                recipient_list=[email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-
-            logger.info(f"OTP email sent successfully to {email}")
-            return True
+        send_mail(
+            subject=subject,
+            message=plain_message,
+            from_email=getattr(
+                settings, "DEFAULT_FROM_EMAIL", "learnerapp999@gmail.com"
+            ),
+            recipient_list=[email],
+            html_message=html_message,
+            fail_silently=False,
+        )
+
+        logger.info(f"OTP email sent successfully to {email}")
+        return True
 
     except Exception as e:
         logger.error(f"Failed to send OTP email to {email}: {str(e)}")
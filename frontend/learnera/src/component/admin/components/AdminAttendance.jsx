@@ -26,6 +26,7 @@ import api from "../../../api";
 
 const AdminAttendance = () => {
   const [attendanceData, setAttendanceData] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [statistics, setStatistics] = useState([]);
   const [classes, setClasses] = useState([]);
   const [sections, setSections] = useState([]);
@@ -101,7 +102,8 @@ const AdminAttendance = () => {
         api.get("school_admin/student-attendance-history/", { params: filters }),
         api.get("school_admin/student-statistics/", { params: filters }),
       ]);
-      setAttendanceData(attendanceResponse.data);
+      setAttendanceData(attendanceResponse.data.results);
+      setNextPage(attendanceResponse.data.next);
       setStatistics(statsResponse.data);
     } catch (error) {
       setError(error.response?.data?.message || "Failed to fetch attendance data");
@@ -110,6 +112,16 @@ const AdminAttendance = () => {
     }
   };
 
+  const fetchMore = async () => {
+    try {
+      const response = await api.get(nextPage);
+      setAttendanceData((rows) => [...rows, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      setError(error.response?.data?.message || "Failed to fetch attendance data");
+    }
+  };
+
   const getCurrentMonthStats = () => {
     const currentStats = statistics.find(
       (stat) => new Date(stat.month).getMonth() + 1 === filters.month
@@ -375,6 +387,17 @@ const AdminAttendance = () => {
             </table>
           </div>
 
+          {nextPage && (
+            <div className="mt-4 text-center">
+              <button
+                onClick={fetchMore}
+                className="px-4 py-2 rounded-sm text-white bg-gradient-to-r from-[#0D2E76] to-[#1842DC]"
+              >
+                Load more
+              </button>
+            </div>
+          )}
+
           {error && (
             <div className="mt-4 p-4 bg-red-100 text-red-800 rounded">
               {error}
@@ -44,7 +44,13 @@ const AvatarFallback = ({ children, className = "" }) => (
   </div>
 );
 
-const UserList = ({ users, onSelectUser, selectedUser, onBackPress }) => {
+const UserList = ({
+  users,
+  onSelectUser,
+  selectedUser,
+  onBackPress,
+  onLoadMore,
+}) => {
   const [searchTerm, setSearchTerm] = useState("");
 
   const filteredUsers = users.filter((user) =>
@@ -160,6 +166,17 @@ const UserList = ({ users, onSelectUser, selectedUser, onBackPress }) => {
             </div>
           ))
         )}
+
+        {onLoadMore && (
+          <div className="pt-2 text-center">
+            <button
+              onClick={onLoadMore}
+              className="px-4 py-2 text-sm text-blue-600 hover:bg-white rounded-xl transition-all duration-200"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -435,6 +452,7 @@ const ChatWindow = ({
 
 const ChatPage = () => {
   const [users, setUsers] = useState([]);
+  const [nextContacts, setNextContacts] = useState(null);
   const [selectedUser, setSelectedUser] = useState(null);
   const [messages, setMessages] = useState([]);
   const [websocket, setWebsocket] = useState(null);
@@ -613,8 +631,26 @@ const ChatPage = () => {
       setCurrentUser(userResponse.data);
 
       const contactsResponse = await api.get("chat/contact-list/");
-      setUsers(sortContactList(contactsResponse.data));
+      setUsers(sortContactList(contactsResponse.data.results));
+      setNextContacts(contactsResponse.data.next);
+    } catch (error) {
+      console.error(error);
+    }
+  };
+
+  const fetchMoreContacts = async () => {
+    try {
+      const response = await api.get(nextContacts);
+      setUsers((prevUsers) => {
+        const loaded = new Set(prevUsers.map((user) => user.id));
+        return sortContactList([
+          ...prevUsers,
+          ...response.data.results.filter((user) => !loaded.has(user.id)),
+        ]);
+      });
+      setNextContacts(response.data.next);
     } catch (error) {
+      toast.error("Failed to load more contacts");
       console.error(error);
     }
   };
@@ -695,6 +731,7 @@ const ChatPage = () => {
             users={users}
             onSelectUser={handleSelectUser}
             selectedUser={selectedUser}
+            onLoadMore={nextContacts ? fetchMoreContacts : null}
           />
         ) : (
           <ChatWindow
@@ -714,6 +751,7 @@ const ChatPage = () => {
             users={users}
             onSelectUser={handleSelectUser}
             selectedUser={selectedUser}
+            onLoadMore={nextContacts ? fetchMoreContacts : null}
           />
         </div>
         <div className="flex-1 bg-white">